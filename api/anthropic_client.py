@@ -1,22 +1,41 @@
-import base64
 import os
-from anthropic import Anthropic, APIError
 import logging
+import threading
 
-
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
-if not ANTHROPIC_API_KEY:
-    logger.error("❌ Configuration error: ANTHROPIC_API_KEY not found in environment or .env file.")
-    raise RuntimeError(
-        "Configuration error: ANTHROPIC_API_KEY not found. "
-        "Please set it as an environment variable or in your .env file."
-    )
+_lock = threading.Lock()
+_clients = {}
+
+
+def is_configured() -> bool:
+    return bool(os.getenv("ANTHROPIC_API_KEY"))
+
+
+def _api_key() -> str:
+    key = os.getenv("ANTHROPIC_API_KEY")
+    if not key:
+        logger.error("❌ Configuration error: ANTHROPIC_API_KEY not found in environment or .env file.")
+        raise RuntimeError(
+            "Configuration error: ANTHROPIC_API_KEY not found. "
+            "Please set it as an environment variable or in your .env file."
+        )
+    return key
 
-# Initialize Claude client
-llm_client = Anthropic(api_key=ANTHROPIC_API_KEY)
 
+def get_llm_client():
+    """Shared synchronous Claude client; the SDK is imported on first use."""
+    with _lock:
+        if "sync" not in _clients:
+            from anthropic import Anthropic
+            _clients["sync"] = Anthropic(api_key=_api_key())
+        return _clients["sync"]
 
 
+def get_async_llm_client():
+    """Shared AsyncAnthropic client used by the LLM gateway (api/llm_gateway.py)."""
+    with _lock:
+        if "async" not in _clients:
+            from anthropic import AsyncAnthropic
+            _clients["async"] = AsyncAnthropic(api_key=_api_key())
+        return _clients["async"]
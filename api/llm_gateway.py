@@ -0,0 +1,401 @@
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_STREAM_END = object()
+
+# OpenAI reasoning models count their hidden reasoning against max_completion_tokens
+REASONING_MODEL_PREFIXES = ('gpt-5', 'o1', 'o3', 'o4')
+
+
+class TruncatedReply(RuntimeError):
+    """The provider hit its output token limit before producing any reply text."""
+
+
+def to_anthropic_messages(messages: List[Dict[str, str]]):
+    """Convert OpenAI-style messages into (system, messages) for the Anthropic Messages API.
+    System texts become separate blocks and the last one is marked for prompt caching, so the
+    stable prefix (instructions + retrieved context) is billed at the cached rate on repeats.
+    OpenAI caches long prompt prefixes automatically, which is why system/RAG blocks go first.
+    """
+    from anthropic import NOT_GIVEN
+    system_texts = [m['content'] for m in messages if m['role'] == 'system']
+    system_text = [{"type": "text", "text": t} for t in system_texts] if system_texts else NOT_GIVEN
+    if system_texts:
+        system_text[-1]["cache_control"] = {"type": "ephemeral"}
+    conv_msgs = []
+    for m in messages:
+        if m['role'] == 'system':
+            continue
+        role = 'user' if m['role'] == 'user' else 'assistant'
+        conv_msgs.append({"role": role, "content": [{"type": "text", "text": m['content']}]})
+    return system_text, conv_msgs
+
+
+class OpenAIProvider:
+    name = 'openai'
+
+    def __init__(self, client_factory: Callable[[], Any], model: str):
+        self._client_factory = client_factory
+        self.model = model
+        self.reasoning = model.startswith(REASONING_MODEL_PREFIXES)
+        # Extra completion tokens for the reasoning pass, so it cannot use up the reply's share
+        self.reasoning_headroom = int(os.getenv('OPENAI_REASONING_HEADROOM', '4000'))
+        self.reasoning_effort = os.getenv('OPENAI_REASONING_EFFORT', 'low')
+
+    @property
+    def client(self):
+        # SDK client is created on the first request, not at app import
+        return self._client_factory()
+
+    def _limits(self, max_output_tokens: int) -> Dict[str, Any]:
+        if not self.reasoning:
+            return {'max_completion_tokens': max_output_tokens}
+        limits = {'max_completion_tokens': max_output_tokens + self.reasoning_headroom}
+        if self.reasoning_effort:
+            limits['reasoning_effort'] = self.reasoning_effort
+        return limits
+
+    async def complete(self, messages, max_output_tokens: int) -> str:
+        completion = await self.client.chat.completions.create(model=self.model, messages=messages,
+                                                               **self._limits(max_output_tokens))
+        choice = completion.choices[0]
+        if not choice.message.content and choice.finish_reason == 'length':
+            raise TruncatedReply(f"{self.model} used its {max_output_tokens}-token output limit without a reply")
+        return choice.message.content
+
+    async def stream(self, messages, max_output_tokens: int) -> AsyncIterator[str]:
+        chunks = await self.client.chat.completions.create(model=self.model, messages=messages, stream=True,
+                                                           **self._limits(max_output_tokens))
+        produced = False
+        async for chunk in chunks:
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if choice.delta and choice.delta.content:
+                produced = True
+                yield choice.delta.content
+            elif choice.finish_reason == 'length' and not produced:
+                raise TruncatedReply(f"{self.model} used its {max_output_tokens}-token output limit without a reply")
+
+
+class AnthropicProvider:
+    name = 'anthropic'
+
+    def __init__(self, client_factory: Callable[[], Any], model: str):
+        self._client_factory = client_factory
+        self.model = model
+
+    @property
+    def client(self):
+        # SDK client is created on the first request, not at app import
+        return self._client_factory()
+
+    async def complete(self, messages, max_output_tokens: int) -> str:
+        system_text, conv_msgs = to_anthropic_messages(messages)
+        resp = await self.client.messages.create(
+            model=self.model,
+            system=system_text,
+            max_tokens=max_output_tokens,
+            messages=conv_msgs
+        )
+        return "".join([b.text for b in (resp.content or []) if getattr(b, 'type', '') == 'text'])
+
+    async def stream(self, messages, max_output_tokens: int) -> AsyncIterator[str]:
+        system_text, conv_msgs = to_anthropic_messages(messages)
+        async with self.client.messages.stream(
+            model=self.model,
+            system=system_text,
+            max_tokens=max_output_tokens,
+            messages=conv_msgs
+        ) as resp_stream:
+            async for text in resp_stream.text_stream:
+                if text:
+                    yield text
+
+
+class ProviderMetrics:
+    """Rolling latency/error counters for one provider."""
+
+    def __init__(self, window: int = 200):
+        self.latencies = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.wins = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        lat = sorted(self.latencies)
+
+        def pct(p):
+            return round(lat[min(int(p * len(lat)), len(lat) - 1)], 3) if lat else None
+
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'in_flight': self.in_flight,
+            'served': self.wins,
+            'latency_p50_s': pct(0.5),
+            'latency_p95_s': pct(0.95),
+        }
+
+
+class LLMGateway:
+    """Routes completions to the async OpenAI/Anthropic clients from a private event loop.
+    - caps concurrent requests per provider (semaphore),
+    - falls back to the next provider on errors or when the primary has not answered
+      within `fallback_after` seconds,
+    - optionally hedges: sends to all providers at once and returns the first answer,
+    - records per-provider latency metrics.
+    Flask handlers stay synchronous; `complete` and `stream` block the calling thread only.
+    """
+
+    def __init__(self, providers: Dict[str, Any], max_concurrency: Optional[Dict[str, int]] = None,
+                 timeout: float = 120.0, fallback_after: Optional[float] = 20.0, hedge: bool = False):
+        self.providers = providers
+        self.max_concurrency = {name: (max_concurrency or {}).get(name, 8) for name in providers}
+        self.timeout = timeout
+        self.fallback_after = fallback_after if fallback_after else None
+        self.hedge = hedge
+        self.metrics = {name: ProviderMetrics() for name in providers}
+        self.fallbacks = 0
+        self.hedged = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_pid: Optional[int] = None
+        self._loop_lock = threading.Lock()
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    @classmethod
+    def from_env(cls, client_factories: Dict[str, Optional[Callable[[], Any]]], model_for: Callable[[str], str]) -> Optional['LLMGateway']:
+        """Build a gateway over the configured providers (factory is None when not configured)."""
+        adapters = {'openai': OpenAIProvider, 'anthropic': AnthropicProvider}
+        providers = {name: adapters[name](factory, model_for(name)) for name, factory in client_factories.items() if factory is not None}
+        if not providers:
+            return None
+        return cls(
+            providers,
+            max_concurrency={name: int(os.getenv(f'LLM_MAX_CONCURRENCY_{name.upper()}', '8')) for name in providers},
+            timeout=float(os.getenv('LLM_TIMEOUT', '120')),
+            fallback_after=float(os.getenv('LLM_FALLBACK_AFTER', '20')),
+            hedge=os.getenv('LLM_HEDGE', '0') == '1',
+        )
+
+    # --- loop plumbing ---
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the gateway's event loop thread on first use (and again in a forked worker,
+        since threads do not survive fork)."""
+        with self._loop_lock:
+            if self._loop is None or self._loop_pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                self._loop_pid = os.getpid()
+                self._semaphores = {}
+                threading.Thread(target=self._loop.run_forever, name='llm-gateway', daemon=True).start()
+            return self._loop
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()).result()
+
+    def _semaphore(self, name: str) -> asyncio.Semaphore:
+        sem = self._semaphores.get(name)
+        if sem is None:
+            sem = asyncio.Semaphore(self.max_concurrency[name])
+            self._semaphores[name] = sem
+        return sem
+
+    def order(self, primary: str) -> List[str]:
+        """Primary provider first, then the others as fallbacks."""
+        names = list(self.providers)
+        if primary in names:
+            names.remove(primary)
+            names.insert(0, primary)
+        return names
+
+    # --- completions ---
+
+    async def _call(self, name: str, messages, max_output_tokens: int) -> Tuple[str, str]:
+        m = self.metrics[name]
+        async with self._semaphore(name):
+            m.requests += 1
+            m.in_flight += 1
+            start = time.monotonic()
+            try:
+                reply = await asyncio.wait_for(self.providers[name].complete(messages, max_output_tokens), self.timeout)
+            except Exception:
+                m.errors += 1
+                raise
+            finally:
+                m.in_flight -= 1
+            m.latencies.append(time.monotonic() - start)
+            return name, reply
+
+    async def _first_success(self, pending: set, remaining: List[str], messages, max_output_tokens: int,
+                             wait_for_next: Optional[float]) -> Tuple[str, str]:
+        """Wait for the first successful task; start the next provider when a task fails or
+        `wait_for_next` seconds pass without an answer. Cancels the losers."""
+        last_error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=wait_for_next if remaining else None,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Primary is slow: race it against the next provider
+                    self.fallbacks += 1
+                    pending.add(asyncio.ensure_future(self._call(remaining.pop(0), messages, max_output_tokens)))
+                    continue
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+                    logger.warning("LLM provider call failed: %s", last_error)
+                if not pending and remaining:
+                    self.fallbacks += 1
+                    pending.add(asyncio.ensure_future(self._call(remaining.pop(0), messages, max_output_tokens)))
+            raise last_error or RuntimeError("No LLM provider available")
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _complete(self, primary: str, messages, max_output_tokens: int, hedge: bool) -> Tuple[str, str]:
+        names = self.order(primary)
+        if hedge and len(names) > 1:
+            self.hedged += 1
+            pending = {asyncio.ensure_future(self._call(n, messages, max_output_tokens)) for n in names}
+            return await self._first_success(pending, [], messages, max_output_tokens, None)
+        pending = {asyncio.ensure_future(self._call(names[0], messages, max_output_tokens))}
+        return await self._first_success(pending, names[1:], messages, max_output_tokens, self.fallback_after)
+
+    def complete(self, primary: str, messages, max_output_tokens: int = 2000, hedge: Optional[bool] = None) -> Tuple[str, str]:
+        """Return (provider_used, reply)."""
+        name, reply = self._run(self._complete(primary, messages, max_output_tokens, self.hedge if hedge is None else hedge))
+        self.metrics[name].wins += 1
+        return name, reply
+
+    # --- streaming ---
+
+    async def _try_stream(self, name: str, messages, max_output_tokens: int, out: 'queue.Queue',
+                          first_token_timeout: float, winner: Dict[str, Any]) -> bool:
+        """Stream from one provider. Returns True once it has served the reply (or failed
+        after output started); raises if it fails before its first token. When several
+        providers race (hedging), only the first to produce a token streams; the others
+        return False. The provider's generator is always closed."""
+        m = self.metrics[name]
+        started = False
+        agen = None
+        async with self._semaphore(name):
+            m.requests += 1
+            m.in_flight += 1
+            start = time.monotonic()
+            try:
+                agen = self.providers[name].stream(messages, max_output_tokens)
+                try:
+                    first = await asyncio.wait_for(agen.__anext__(), first_token_timeout)
+                except StopAsyncIteration:
+                    first = None
+                if winner.get('name') is not None:
+                    return False
+                winner['name'] = name
+                winner['event'].set()
+                started = True
+                m.latencies.append(time.monotonic() - start)  # time to first token
+                m.wins += 1
+                out.put(('provider', name))
+                if first is not None:
+                    out.put(('delta', first))
+                    async for delta in agen:
+                        out.put(('delta', delta))
+                out.put(_STREAM_END)
+                return True
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                m.errors += 1
+                if started:
+                    out.put(('error', e))
+                    return True
+                raise
+            finally:
+                m.in_flight -= 1
+                if agen is not None:
+                    await agen.aclose()
+
+    async def _pump(self, names: List[str], messages, max_output_tokens: int, out: 'queue.Queue', hedge: bool):
+        """Stream from the first provider that produces a token. Without hedging providers are
+        tried in order, falling back when one fails or is silent for `fallback_after` seconds
+        before its first token; with hedging all start at once. Errors after output has
+        started are surfaced as-is."""
+        winner: Dict[str, Any] = {'name': None, 'event': asyncio.Event()}
+        last_error = None
+        if not (hedge and len(names) > 1):
+            for name in names:
+                try:
+                    if await self._try_stream(name, messages, max_output_tokens, out,
+                                              self.fallback_after or self.timeout, winner):
+                        return
+                except Exception as e:
+                    last_error = e
+                    self.fallbacks += 1
+                    logger.warning("LLM provider %s failed before first token: %s", name, e)
+            out.put(('error', last_error or RuntimeError("No LLM provider available")))
+            return
+
+        self.hedged += 1
+        tasks = {asyncio.ensure_future(self._try_stream(n, messages, max_output_tokens, out, self.timeout, winner)): n
+                 for n in names}
+        won = asyncio.ensure_future(winner['event'].wait())
+        pending = set(tasks)
+        try:
+            while pending and not won.done():
+                done, _ = await asyncio.wait(pending | {won}, return_when=asyncio.FIRST_COMPLETED)
+                for task in done - {won}:
+                    pending.discard(task)
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        logger.warning("LLM provider %s failed before first token: %s", tasks[task], last_error)
+            if winner['name'] is None:
+                out.put(('error', last_error or RuntimeError("No LLM provider available")))
+                return
+            for task, name in tasks.items():
+                if name != winner['name']:
+                    task.cancel()
+            await next(t for t, n in tasks.items() if n == winner['name'])
+        finally:
+            won.cancel()
+            for task in tasks:
+                task.cancel()
+
+    def stream(self, primary: str, messages, max_output_tokens: int = 2000,
+               hedge: Optional[bool] = None) -> Iterator[Tuple[str, str]]:
+        """Yield ('provider', name) once, then ('delta', text) fragments. Raises on failure."""
+        out: 'queue.Queue' = queue.Queue()
+        hedge = self.hedge if hedge is None else hedge
+        future = asyncio.run_coroutine_threadsafe(
+            self._pump(self.order(primary), messages, max_output_tokens, out, hedge), self._ensure_loop())
+        try:
+            while True:
+                item = out.get(timeout=self.timeout)
+                if item is _STREAM_END:
+                    return
+                if item[0] == 'error':
+                    raise item[1]
+                yield item
+        finally:
+            # Client disconnected or we are done: stop the producer
+            future.cancel()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'providers': {name: m.snapshot() for name, m in self.metrics.items()},
+            'max_concurrency': self.max_concurrency,
+            'fallback_after_s': self.fallback_after,
+            'hedge': self.hedge,
+            'fallbacks': self.fallbacks,
+            'hedged_requests': self.hedged,
+        }
@@ -1,18 +1,41 @@
 import os
-from openai import OpenAI
 import logging
+import threading
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if not OPENAI_API_KEY:
-    logger.error("❌ Configuration error: OPENAI_API_KEY not found in environment or .env file.")
-    raise RuntimeError(
-        "Configuration error: OPENAI_API_KEY not found. "
-        "Please set it as an environment variable or in your .env file."
-    )
+_lock = threading.Lock()
+_clients = {}
 
-llm_client = OpenAI(api_key=OPENAI_API_KEY)
 
+def is_configured() -> bool:
+    return bool(os.getenv("OPENAI_API_KEY"))
 
+
+def _api_key() -> str:
+    key = os.getenv("OPENAI_API_KEY")
+    if not key:
+        logger.error("❌ Configuration error: OPENAI_API_KEY not found in environment or .env file.")
+        raise RuntimeError(
+            "Configuration error: OPENAI_API_KEY not found. "
+            "Please set it as an environment variable or in your .env file."
+        )
+    return key
+
+
+def get_llm_client():
+    """Shared synchronous OpenAI client; the SDK is imported on first use."""
+    with _lock:
+        if "sync" not in _clients:
+            from openai import OpenAI
+            _clients["sync"] = OpenAI(api_key=_api_key())
+        return _clients["sync"]
+
+
+def get_async_llm_client():
+    """Shared AsyncOpenAI client used by the LLM gateway (api/llm_gateway.py)."""
+    with _lock:
+        if "async" not in _clients:
+            from openai import AsyncOpenAI
+            _clients["async"] = AsyncOpenAI(api_key=_api_key())
+        return _clients["async"]
@@ -1,25 +1,40 @@
 import os
-from qdrant_client import QdrantClient
 import logging
-from importlib.metadata import version
+import threading
 
-print("Qdrant client version:", version("qdrant-client"))
-
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-QDRANT_URL = os.getenv("QDRANT_URL")
-QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
-if not (QDRANT_URL and QDRANT_API_KEY):
-    logger.error("❌ Configuration error: QDRANT_URL or QDRANT_API_KEY not found in environment or .env file.")
-    raise RuntimeError(
-        "Configuration error: QDRANT_URL or QDRANT_API_KEY not found. "
-        "Please set it as an environment variable or in your .env file."
-    )
+_lock = threading.Lock()
+_client = None
+
+
+def is_configured() -> bool:
+    return bool(os.getenv("QDRANT_URL") and os.getenv("QDRANT_API_KEY"))
+
+
+def client_version() -> str:
+    from importlib.metadata import version
+    return version("qdrant-client")
+
 
 def get_remote_client():
-    return QdrantClient(
-        url=QDRANT_URL,
-        api_key=QDRANT_API_KEY,
-        https=True
-)
+    """Shared Qdrant client, created (and the SDK imported) on first use."""
+    global _client
+    with _lock:
+        if _client is None:
+            QDRANT_URL = os.getenv("QDRANT_URL")
+            QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+            if not (QDRANT_URL and QDRANT_API_KEY):
+                logger.error("❌ Configuration error: QDRANT_URL or QDRANT_API_KEY not found in environment or .env file.")
+                raise RuntimeError(
+                    "Configuration error: QDRANT_URL or QDRANT_API_KEY not found. "
+                    "Please set it as an environment variable or in your .env file."
+                )
+            from qdrant_client import QdrantClient
+            logger.info("Qdrant client version: %s", client_version())
+            _client = QdrantClient(
+                url=QDRANT_URL,
+                api_key=QDRANT_API_KEY,
+                https=True
+            )
+        return _client
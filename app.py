@@ -1,38 +1,36 @@
-from flask import Flask, render_template, request, redirect, url_for, session, abort, jsonify
+from flask import Flask, render_template, request, redirect, url_for, session, abort, jsonify, Response, stream_with_context
+from werkzeug.datastructures import MultiDict
 from functools import wraps
 from datetime import datetime
 import json
 import os
 import re
 from src.OPAClient import OPAClient
-from src.services.data_format import has_data_answers_for_request, build_opa_input_for_request
+from src.services.data_format import has_data_answers_for_request, build_opa_input_for_request, data_answers_link
 from src.services.onboarding import build_onboarding_opa_input
+from src.services.questionnaires import QuestionnaireRegistry
+from src.services.form_engine import FormEngine
+from src.services.validation import InputValidators, question_labels
+from src.services.answer_store import get_store
+from src.services.request_index import RequestIndex, SORTS, STATUSES
+from src.services.user_views import UserViews
+from src.services.project_search import ProjectSearchIndex
+from src.services.retrieval import RETRIEVAL_MODES, normalize_filters, build_qdrant_filter, reciprocal_rank_fusion
+from src.services.retrieval_cache import RetrievalCache
+from src.services.response_cache import ResponseCache, response_key
+from src.services.context_builder import build_context
+from api.llm_gateway import LLMGateway
+# OpenAI, Anthropic and Qdrant are optional. Their SDKs are imported and clients created
+# lazily on first use, so workers start without paying for them.
+from api import openai_client, anthropic_client, qdrant_remote_client
+from src.services import sparse_index
 
 app = Flask(__name__)
 # NOTE: Replace this with a secure random value in production
 app.secret_key = 'dev-secret-key-change-me'
 
-# --- AI Assistant dependencies ---
-# OpenAI (optional)
-try:
-    from api.openai_client import llm_client as openai_llm_client
-except Exception as _e:
-    openai_llm_client = None
-
-# Anthropic (optional)
-try:
-    from api.anthropic_client import llm_client as anthropic_llm_client
-except Exception:
-    anthropic_llm_client = None
-
-# Qdrant is optional; we only use it if available and configured
-try:
-    from api.qdrant_remote_client import get_remote_client as get_qdrant_client
-except Exception:
-    get_qdrant_client = None
-
 # In-memory stores initialized from registry file
-users = {}  # username -> {password: str}
+users = {}  # username -> {password: str, assistant_cache: bool}
 projects_catalog = []  # list of projects
 project_participants = {}  # project_id -> list[usernames]
 user_projects = {}  # username -> list[project_id]
@@ -53,7 +51,10 @@ def load_registry():
         data = {"users": [], "projects": [], "project_participants": {}}
 
     # Initialize users dict; if passwords aren't present, default to empty string
-    users = {u.get('id'): {"password": u.get('password', '')} for u in data.get('users', []) if u.get('id')}
+    users = {
+        u.get('id'): {"password": u.get('password', ''), "assistant_cache": u.get('assistant_cache', True)}
+        for u in data.get('users', []) if u.get('id')
+    }
 
     # Projects and participants directly from registry
     projects_catalog = data.get('projects', [])
@@ -76,7 +77,9 @@ def save_registry():
     data = {
         "projects": projects_catalog,
         "project_participants": project_participants,
-        "users": [{"id": uname, **({"password": rec.get("password")} if rec.get("password") else {})}
+        "users": [{"id": uname,
+                   **({"password": rec.get("password")} if rec.get("password") else {}),
+                   **({"assistant_cache": False} if rec.get("assistant_cache") is False else {})}
                   for uname, rec in users.items()]
     }
     try:
@@ -92,6 +95,19 @@ def save_registry():
 # Load data at startup
 load_registry()
 
+# Questionnaire definitions are parsed and validated once, then hot-reloaded on change
+questionnaire_registry = QuestionnaireRegistry(
+    check_interval=None if os.getenv('QUESTIONNAIRE_RELOAD', '1') == '0' else 2.0
+)
+questionnaire_registry.load_all()
+form_engine = FormEngine(questionnaire_registry)
+form_engine.compile_all()
+# Submissions are checked against the compiled *_input_schema.json validators before they are stored
+input_validators = InputValidators(form_engine.schemas)
+# Questionnaire submissions: one JSON file each, or compact segments (ANSWER_STORE_MODE=segments)
+answer_store = get_store(os.path.dirname(__file__))
+INVALID_ANSWERS_MESSAGE = 'Some answers are not valid. Please review the fields listed below and submit again.'
+
 # --- Assistant helpers ---
 
 def sanitize_filename(name: str) -> str:
@@ -105,37 +121,116 @@ def sanitize_filename(name: str) -> str:
 
 def get_embeddings(text: str):
     # Embeddings supported via OpenAI only (optional)
-    if openai_llm_client is None:
+    if not openai_client.is_configured():
         return None
     try:
-        resp = openai_llm_client.embeddings.create(model=os.getenv('EMBEDDINGS_MODEL', 'text-embedding-3-small'), input=text)
+        resp = openai_client.get_llm_client().embeddings.create(model=os.getenv('EMBEDDINGS_MODEL', 'text-embedding-3-small'), input=text)
         return resp.data[0].embedding
     except Exception as e:
         print(f"Embeddings error: {e}")
         return None
 
 
-def qdrant_search(query: str, collection: str = None, limit: int = 5):
+def qdrant_search(query: str, collection: str = None, limit: int = 5, filters: dict = None):
     collection = collection or os.getenv('QDRANT_COLLECTION', 'compliance_docs')
-    if get_qdrant_client is None:
+    if not qdrant_remote_client.is_configured():
         return []
     vec = get_embeddings(query)
     if not vec:
         return []
     try:
-        client = get_qdrant_client()
-        hits = client.search(collection_name=collection, query_vector=vec, limit=limit)
+        client = qdrant_remote_client.get_remote_client()
+        hits = client.search(collection_name=collection, query_vector=vec, limit=limit,
+                             query_filter=build_qdrant_filter(filters))
         contexts = []
         for h in hits:
             payload = getattr(h, 'payload', {}) or {}
             text = payload.get('text') or payload.get('content') or ''
             meta = {k: v for k, v in payload.items() if k not in ('text', 'content')}
-            contexts.append({'text': text, 'meta': meta, 'score': getattr(h, 'score', None)})
+            contexts.append({'id': str(getattr(h, 'id', '')) or None, 'text': text, 'meta': meta, 'score': getattr(h, 'score', None)})
         return contexts
     except Exception as e:
         print(f"Qdrant search error: {e}")
         return []
 
+
+def bm25_search(query: str, collection: str = None, limit: int = 5, filters: dict = None):
+    """Sparse keyword search over the BM25 index built next to the vector store at ingestion."""
+    collection = collection or os.getenv('QDRANT_COLLECTION', 'compliance_docs')
+    index = sparse_index.get_index(collection)
+    if index is None:
+        return []
+    return index.search(query, limit=limit, filters=filters)
+
+
+# Cache of RAG lookups (per worker); invalidated when ingestion bumps the collection version
+retrieval_cache = RetrievalCache(
+    max_entries=int(os.getenv('RAG_CACHE_SIZE', '512')),
+    ttl_seconds=float(os.getenv('RAG_CACHE_TTL', '3600')),
+) if os.getenv('RAG_CACHE_ENABLED', '1') != '0' else None
+
+
+def retrieve_contexts(query: str, mode: str = 'dense', collection: str = None, limit: int = 5, filters: dict = None):
+    """Retrieve RAG contexts in 'dense', 'sparse' or 'hybrid' (reciprocal rank fusion) mode,
+    serving repeated queries from the retrieval cache."""
+    collection = collection or os.getenv('QDRANT_COLLECTION', 'compliance_docs')
+    if retrieval_cache is None:
+        return _retrieve_contexts(query, mode, collection, limit, filters)
+    key = RetrievalCache.make_key(query, collection, limit, mode, filters)
+    cached = retrieval_cache.get(key)
+    if cached is not None:
+        return cached
+    contexts = _retrieve_contexts(query, mode, collection, limit, filters)
+    # Empty results usually mean the store was unreachable; don't pin them for a whole TTL
+    if contexts:
+        retrieval_cache.put(key, contexts)
+    return contexts
+
+
+def _retrieve_contexts(query: str, mode: str, collection: str, limit: int, filters: dict):
+    if mode == 'sparse':
+        return bm25_search(query, collection, limit, filters)
+    if mode == 'hybrid':
+        # Over-fetch from both retrievers so fusion has candidates to re-rank
+        depth = max(limit * 4, 20)
+        ranked = {
+            'dense': qdrant_search(query, collection, depth, filters),
+            'sparse': bm25_search(query, collection, depth, filters),
+        }
+        return reciprocal_rank_fusion(ranked, limit=limit)
+    return qdrant_search(query, collection, limit, filters)
+
+
+# Assistant reply cache shared by workers through the on-disk store
+response_cache = ResponseCache(
+    cache_dir=os.getenv('ASSISTANT_CACHE_DIR') or os.path.join(os.path.dirname(__file__), 'static', 'data', 'cache', 'assistant_responses'),
+    ttl_seconds=float(os.getenv('ASSISTANT_CACHE_TTL', '86400')),
+) if os.getenv('ASSISTANT_CACHE_ENABLED', '1') != '0' else None
+
+
+def provider_model(provider: str) -> str:
+    if provider == 'openai':
+        return os.getenv('OPENAI_MODEL', 'gpt-5')
+    return os.getenv('ANTHROPIC_MODEL', 'claude-sonnet-4-20250514')
+
+
+# Async provider gateway: concurrency caps, fallback/hedging and latency metrics
+llm_gateway = LLMGateway.from_env({
+    'openai': openai_client.get_async_llm_client if openai_client.is_configured() else None,
+    'anthropic': anthropic_client.get_async_llm_client if anthropic_client.is_configured() else None,
+}, provider_model)
+
+
+def llm_complete(provider: str, messages: list, max_output_tokens: int = 2000, hedge: bool = None):
+    """Send the conversation through the gateway; returns (provider_used, reply text)."""
+    return llm_gateway.complete(provider, messages, max_output_tokens, hedge=hedge)
+
+
+def llm_stream(provider: str, messages: list, max_output_tokens: int = 2000, hedge: bool = None):
+    """Yield ('provider', name) and then ('delta', text) fragments as they are generated."""
+    return llm_gateway.stream(provider, messages, max_output_tokens, hedge=hedge)
+
+
 # --- Onboarding requests helpers ---
 
 def load_onboarding_requests():
@@ -163,6 +258,65 @@ def save_onboarding_requests(records):
         print(f"Warning: failed to save onboarding requests: {e}")
 
 
+# Paged/filtered views over the request store (rebuilt whenever the file changes)
+request_index = RequestIndex(
+    os.path.join(os.path.dirname(__file__), 'static', 'data', 'db', 'onboarding_requests.json'),
+    load_onboarding_requests
+)
+
+# Per-user dashboard aggregates, kept up to date by the handlers that change them
+user_views = UserViews(request_index.path, load_onboarding_requests)
+user_views.rebuild(projects_catalog, project_participants)
+
+# Text and facet search over the catalog for the explore page
+project_search = ProjectSearchIndex()
+project_search.build(projects_catalog)
+
+
+def explore_search(username: str, args):
+    """One page of projects the user can join, filtered by query args q, tag, sensitivity (repeatable),
+    limit and cursor. Raises ValueError on an invalid cursor."""
+    return project_search.search(
+        q=args.get('q', ''),
+        tags=args.getlist('tag'),
+        sensitivity=args.getlist('sensitivity'),
+        exclude=user_views.member_project_ids(username),
+        limit=args.get('limit', type=int),
+        cursor=args.get('cursor') or None,
+    )
+
+
+def request_listing(view: str, username: str, args, project_id=None):
+    """One page of onboarding requests for a listing, annotated with project titles.
+    view: 'owner' (requests for the user's projects), 'project' (one project) or 'mine' (the user's own).
+    Filters come from query args: status, project, applicant, from, to (YYYY-MM-DD), sort, limit, cursor.
+    Returns (rows, next_cursor); raises ValueError on invalid filters or cursor.
+    """
+    titles = user_views.project_titles()
+    if view == 'mine':
+        # Restricting to existing projects hides requests for deleted projects
+        scope = {'projects': list(titles), 'applicant': username}
+    elif view == 'project':
+        scope = {'projects': [str(project_id)], 'applicant': args.get('applicant') or None}
+    else:
+        owned = [str(p.get('id')) for p in user_views.owned_projects(username)]
+        if args.get('project'):
+            owned = [pid for pid in owned if pid == args.get('project')]
+        scope = {'projects': owned, 'applicant': args.get('applicant') or None}
+    page = request_index.query(
+        status=args.get('status') or None,
+        date_from=args.get('from') or None,
+        date_to=args.get('to') or None,
+        sort=args.get('sort') or 'pending',
+        limit=args.get('limit', type=int),
+        cursor=args.get('cursor') or None,
+        **scope
+    )
+    rows = [{**rec, '_id': rid, 'project_title': titles.get(str(rec.get('project_id')))}
+            for rid, rec in page['items']]
+    return rows, page['next_cursor']
+
+
 def login_required(view_func):
     @wraps(view_func)
     def wrapper(*args, **kwargs):
@@ -224,39 +378,59 @@ def logout():
 def dashboard():
     username = session['user']
     # Projects owned by the user only
-    owned_list = [p for p in projects_catalog if p.get('owner') == username]
+    owned_list = user_views.owned_projects(username)
 
-    # Load this user's onboarding requests with status and project title
-    requests = []
+    # First page of this user's onboarding requests (pending first); more are loaded via /api/requests
     try:
-        all_reqs = load_onboarding_requests()
-        for idx, rec in enumerate(all_reqs):
-            if rec.get('username') != username:
-                continue
-            proj = next((p for p in projects_catalog if str(p.get('id')) == str(rec.get('project_id'))), None)
-            if not proj:
-                continue
-            requests.append({
-                **rec,
-                '_id': idx,
-                'project_title': proj.get('title'),
-            })
-        # Most recent first; pending at top
-        requests.sort(key=lambda r: ({'submitted': 0, 'accepted': 1, 'rejected': 1}.get(r.get('status','submitted'),1), r.get('submitted_at','')), reverse=False)
-    except Exception:
-        requests = []
+        requests, next_cursor = request_listing('mine', username, request.args)
+    except ValueError:
+        requests, next_cursor = request_listing('mine', username, MultiDict())
 
-    return render_template('dashboard.html', username=username, own_projects=owned_list, user_requests=requests, participants=project_participants)
+    return render_template('dashboard.html', username=username, own_projects=owned_list, user_requests=requests,
+                           requests_cursor=next_cursor, participants=project_participants,
+                           summary=user_views.summary(username))
 
 
 @app.route('/explore')
 @login_required
 def explore_projects():
     username = session['user']
-    # Exclude projects the user owns or already participates in
-    own_ids = set(user_projects.get(username, [])) | {pid for pid, members in project_participants.items() if username in members}
-    explore_list = [p for p in projects_catalog if p.get('id') not in own_ids]
-    return render_template('explore_projects.html', projects=explore_list)
+    # Projects the user neither owns nor participates in, narrowed by search and facets
+    error = None
+    try:
+        result = explore_search(username, request.args)
+    except ValueError as e:
+        error = str(e)
+        result = explore_search(username, MultiDict())
+    filters = {'q': request.args.get('q', ''), 'tag': request.args.getlist('tag'),
+               'sensitivity': request.args.getlist('sensitivity')}
+    more_url = url_for('api_projects_search', **{k: v for k, v in filters.items() if v})
+    return render_template('explore_projects.html', projects=result['items'], total=result['total'],
+                           facets=result['facets'], next_cursor=result['next_cursor'], filters=filters,
+                           more_url=more_url, error=error)
+
+
+@app.route('/api/projects/search')
+@login_required
+def api_projects_search():
+    """Search projects the user can join. Query args: q (prefix-matched words over title, tags, study
+    objective, data types and sensitivity), tag and sensitivity (repeatable facet filters), limit, cursor.
+    Returns items, total, facet counts and next_cursor; rows=1 adds the rendered list items as 'html'.
+    """
+    username = session['user']
+    try:
+        result = explore_search(username, request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    out = {
+        "items": [{k: p.get(k) for k in ('id', 'title', 'owner', 'tags', 'type')} for p in result['items']],
+        "total": result['total'],
+        "facets": result['facets'],
+        "next_cursor": result['next_cursor'],
+    }
+    if request.args.get('rows') == '1':
+        out["html"] = render_template('_project_rows.html', projects=result['items'])
+    return jsonify(out)
 
 
 @app.route('/fdp/new', methods=['GET', 'POST'])
@@ -265,14 +439,8 @@ def fdp_new():
     username = session['user']
     error = None
 
-    # Load new-project questionnaire config (fields for the form)
-    q_path = os.path.join(os.path.dirname(__file__), 'static', 'data', 'schemas', 'new_project_questionnaire.json')
-    try:
-        with open(q_path, 'r', encoding='utf-8') as f:
-            new_proj_q = json.load(f)
-    except Exception:
-        # Fallback minimal structure if file missing or invalid
-        new_proj_q = {"title": "New FDP Project", "sections": []}
+    # New-project questionnaire config (fields for the form)
+    new_proj_q = questionnaire_registry.get('new_project')
 
     if request.method == 'POST':
         title = request.form.get('title', '').strip()
@@ -333,6 +501,8 @@ def fdp_new():
             project_participants.setdefault(project['id'], [])
             if username not in project_participants[project['id']]:
                 project_participants[project['id']].append(username)
+            user_views.project_created(project, project_participants[project['id']])
+            project_search.add(project)
             # Persist to registry so the new project is saved
             save_registry()
             return redirect(url_for('dashboard'))
@@ -350,63 +520,21 @@ def fdp_expected_data_format():
     """Project owner describes expected/preferred data formats.
     Renders a JSON-driven form and stores results under static/data/db/data_format_expectations.
     """
-    # Load owner expectations questionnaire
-    q_path = os.path.join(os.path.dirname(__file__), 'static', 'data', 'schemas', 'data_format_expectations_questionnaire.json')
-    try:
-        with open(q_path, 'r', encoding='utf-8') as f:
-            questionnaire = json.load(f)
-    except Exception:
-        questionnaire = {"title": "Expected Data Formats", "sections": []}
+    # Owner expectations questionnaire
+    questionnaire = questionnaire_registry.get('data_format_expectations')
 
     error = None
     if request.method == 'POST':
-        # Parse flat answers like other forms
-        answers = {}
-        for section in questionnaire.get('sections', []):
-            for q in section.get('questions', []):
-                qid = q.get('id'); qtype = q.get('type')
-                if not qid:
-                    continue
-                form_key = qid.replace('.', '__')
-                if qtype in ['text', 'email', 'textarea', 'radio']:
-                    val = request.form.get(form_key, '').strip()
-                    answers[qid] = val
-                elif qtype == 'multiselect':
-                    vals = request.form.getlist(form_key)
-                    other_enabled = q.get('otherOption')
-                    other_val = request.form.get(form_key + '__other', '').strip() if other_enabled else ''
-                    if other_val:
-                        vals.append(other_val)
-                    answers[qid] = vals
-                else:
-                    answers[qid] = request.form.get(form_key, '').strip()
-
-        # Build structured expectations by splitting on '.' after the 'expect' prefix
-        structured = {}
-        for k, v in answers.items():
-            parts = k.split('.')
-            # Expect keys like expect.storage.files.acceptable
-            if len(parts) >= 3 and parts[0] == 'expect':
-                grp = parts[1]  # storage, schema, delivery
-                structured.setdefault(grp, {})
-                # join the rest into nested keys
-                node = structured[grp]
-                for i in range(2, len(parts)):
-                    p = parts[i]
-                    if i == len(parts) - 1:
-                        node[p] = v
-                    else:
-                        node = node.setdefault(p, {})
-            else:
-                structured.setdefault('meta', {})[k] = v
+        # Flat answers plus expectations nested below the 'expect' prefix (see form_engine)
+        answers, structured = form_engine.parse('data_format_expectations', request.form)
+        field_errors = input_validators.validate('data_format_expectations', structured, question_labels(questionnaire))
+        if field_errors:
+            return render_template('onboarding_form.html', project={'id': '', 'title': 'New FDP Project'}, questionnaire=questionnaire,
+                                   error=INVALID_ANSWERS_MESSAGE, field_errors=field_errors, form_action=url_for('fdp_expected_data_format')), 400
 
         # Persist
         ts = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
         username = session['user']
-        base_dir = os.path.join(os.path.dirname(__file__), 'static', 'data', 'db', 'data_format_expectations')
-        os.makedirs(base_dir, exist_ok=True)
-        fname = f"owner_{username}_{ts}.json"
-        fpath = os.path.join(base_dir, fname)
         payload = {
             'username': username,
             'submitted_at': ts,
@@ -414,8 +542,7 @@ def fdp_expected_data_format():
             'expectations': structured
         }
         try:
-            with open(fpath, 'w', encoding='utf-8') as f:
-                json.dump(payload, f, ensure_ascii=False, indent=2)
+            answer_store.save('data_format_expectations', f"owner_{username}_{ts}", payload)
         except Exception as e:
             error = f"Failed to save expectations: {e}"
 
@@ -451,24 +578,16 @@ def project_manage(project_id):
     is_owner = (project.get('owner') == username)
     participants = project_participants.get(project_id, [])
 
-    # Load onboarding requests for this project (owner-only view)
-    project_reqs = []
+    # First page of onboarding requests for this project (owner-only view)
+    project_reqs, next_cursor = [], None
     if is_owner:
-        all_reqs = load_onboarding_requests()
-        for idx, rec in enumerate(all_reqs):
-            if str(rec.get('project_id')) != str(project_id):
-                continue
-            project_reqs.append({
-                **rec,
-                '_id': idx,
-            })
-        # Sort: pending first, then by submitted_at desc
-        def sort_key(r):
-            pri = {'submitted': 0, 'accepted': 1, 'rejected': 1}.get(r.get('status', 'submitted'), 1)
-            return (pri, r.get('submitted_at', ''),)
-        project_reqs.sort(key=lambda r: ( {'submitted':0,'accepted':1,'rejected':1}.get(r.get('status','submitted'),1), r.get('submitted_at','') ), reverse=False)
-
-    return render_template('project_manage.html', project=project, participants=participants, is_owner=is_owner, project_requests=project_reqs)
+        try:
+            project_reqs, next_cursor = request_listing('project', username, request.args, project_id=project_id)
+        except ValueError:
+            project_reqs, next_cursor = request_listing('project', username, MultiDict(), project_id=project_id)
+
+    return render_template('project_manage.html', project=project, participants=participants, is_owner=is_owner,
+                           project_requests=project_reqs, requests_cursor=next_cursor)
 
 
 @app.route('/onboarding/<project_id>', methods=['GET', 'POST'])
@@ -479,95 +598,22 @@ def onboarding(project_id):
     if not project:
         return redirect(url_for('dashboard'))
 
-    # Load questionnaire definition
-    q_path = os.path.join(os.path.dirname(__file__), 'static', 'data', 'schemas', 'onboarding_questionnaire.json')
-    try:
-        with open(q_path, 'r', encoding='utf-8') as f:
-            questionnaire = json.load(f)
-    except Exception as e:
-        questionnaire = {"title": "Onboarding Questionnaire", "sections": []}
+    # Questionnaire definition
+    questionnaire = questionnaire_registry.get('onboarding')
 
     error = None
     if request.method == 'POST':
-        # Collect answers from the posted form
-        answers = {}
-        for section in questionnaire.get('sections', []):
-            for q in section.get('questions', []):
-                qid = q.get('id')
-                qtype = q.get('type')
-                if not qid:
-                    continue
-                form_key = qid.replace('.', '__')
-                if qtype in ['text', 'email', 'textarea', 'radio']:
-                    val = request.form.get(form_key, '').strip()
-                    answers[qid] = val
-                elif qtype == 'multiselect':
-                    vals = request.form.getlist(form_key)
-                    # Handle optional other input
-                    other_enabled = q.get('otherOption')
-                    other_key = form_key + '__other'
-                    other_val = request.form.get(other_key, '').strip() if other_enabled else ''
-                    if other_val:
-                        vals.append(other_val)
-                    answers[qid] = vals
-                else:
-                    # Fallback to string
-                    answers[qid] = request.form.get(form_key, '').strip()
-
-        # Build nested input object per onboarding_input_schema.json
-        def yn_to_bool(v):
-            return True if str(v).strip().lower() in ("yes", "true", "1") else False if str(v).strip().lower() in ("no", "false", "0") else None
-
-        nested_input = {
-            "organization": {
-                "name": (answers.get('organization.name') or None),
-                "primaryContact": {
-                    "name": (answers.get('organization.primaryContact.name') or None),
-                    "role": (answers.get('organization.primaryContact.role') or None),
-                    "email": (answers.get('organization.primaryContact.email') or None),
-                    "phone": (answers.get('organization.primaryContact.phone') or None)
-                },
-                "dpoContact": {
-                    "name": (answers.get('organization.dpoContact.name') or None),
-                    "role": (answers.get('organization.dpoContact.role') or None),
-                    "email": (answers.get('organization.dpoContact.email') or None)
-                },
-                "jurisdictions": answers.get('organization.jurisdictions') or []
-            },
-            "dataNature": {
-                "involvesHumanResearch": yn_to_bool(answers.get('dataNature.involvesHumanResearch')),
-                "retrospectiveConsent": answers.get('dataNature.retrospectiveConsent') or None
-            },
-            "ethicalLegal": {
-                "irbApproval": answers.get('ethicalLegal.irbApproval') or None
-            },
-            "identifiability": {
-                "directIdentifiers": yn_to_bool(answers.get('identifiability.directIdentifiers')),
-                "quasiIdentifiers": yn_to_bool(answers.get('identifiability.quasiIdentifiers')),
-                "processingLevel": answers.get('identifiability.processingLevel') or None
-            },
-            "securityInfrastructure": {
-                "auditLoggingRequired": answers.get('securityInfrastructure.auditLoggingRequired') or None,
-                "networkConnectionPolicy": answers.get('securityInfrastructure.networkConnectionPolicy') or None,
-                "securityCertifications": answers.get('securityInfrastructure.securityCertifications') or []
-            },
-            "dataGovernance": {
-                "agreementsExist": yn_to_bool(answers.get('dataGovernance.agreementsExist')),
-                "modelUpdatesAllowed": answers.get('dataGovernance.modelUpdatesAllowed') or None,
-                "requiresPerRoundApproval": yn_to_bool(answers.get('dataGovernance.requiresPerRoundApproval'))
-            },
-            "retentionRevocation": {
-                "requiresUnlearning": answers.get('retentionRevocation.requiresUnlearning') or None
-            }
-        }
-
-        # Persist answers to a timestamped JSON file
+        # Collect answers and build the nested input object per onboarding_input_schema.json
+        answers, nested_input = form_engine.parse('onboarding', request.form)
+        field_errors = input_validators.validate('onboarding', nested_input, question_labels(questionnaire))
+        if field_errors:
+            return render_template('onboarding_form.html', project=project, questionnaire=questionnaire,
+                                   error=INVALID_ANSWERS_MESSAGE, field_errors=field_errors), 400
+
+        # Persist answers as a timestamped record
         ts = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
         username = session['user']
-        ans_dir = os.path.join(os.path.dirname(__file__), 'static', 'data', 'db', 'onboarding_answers')
-        os.makedirs(ans_dir, exist_ok=True)
-        ans_filename = f"{project_id}_{username}_{ts}.json"
-        ans_path = os.path.join(ans_dir, ans_filename)
+        answers_rel = None
         payload = {
             'project_id': project_id,
             'username': username,
@@ -576,8 +622,7 @@ def onboarding(project_id):
             'input': nested_input
         }
         try:
-            with open(ans_path, 'w', encoding='utf-8') as f:
-                json.dump(payload, f, ensure_ascii=False, indent=2)
+            answers_rel = answer_store.save('onboarding_answers', f"{project_id}_{username}_{ts}", payload)
         except Exception as e:
             error = f"Failed to save answers: {e}"
 
@@ -585,17 +630,12 @@ def onboarding(project_id):
             # Append a record to onboarding_requests.json
             req_path = os.path.join(os.path.dirname(__file__), 'static', 'data', 'db', 'onboarding_requests.json')
 
-            # Try to locate a data format answers file for this project/user (latest by timestamp)
+            # Try to locate data format answers for this project/user (latest by timestamp)
             data_answers_rel = None
             try:
-                df_dir = os.path.join(os.path.dirname(__file__), 'static', 'data', 'db', 'data_format_answers')
-                if os.path.isdir(df_dir):
-                    prefix = f"{project_id}_{username}_"
-                    df_files = [f for f in os.listdir(df_dir) if f.startswith(prefix) and f.endswith('.json')]
-                    if df_files:
-                        df_files.sort(reverse=True)
-                        df_abs = os.path.join(df_dir, df_files[0])
-                        data_answers_rel = os.path.relpath(df_abs, os.path.dirname(__file__)).replace('\\', '/')
+                df_key = answer_store.latest('data_format_answers', f"{project_id}_{username}_")
+                if df_key:
+                    data_answers_rel = answer_store.link('data_format_answers', df_key)
             except Exception:
                 data_answers_rel = None
 
@@ -603,7 +643,7 @@ def onboarding(project_id):
                 'project_id': project_id,
                 'username': username,
                 'submitted_at': ts,
-                'answers_file': os.path.relpath(ans_path, os.path.dirname(__file__)).replace('\\', '/') ,
+                'answers_file': answers_rel,
                 'status': 'submitted'
             }
             if data_answers_rel:
@@ -621,6 +661,7 @@ def onboarding(project_id):
                 existing.append(record)
                 with open(req_path, 'w', encoding='utf-8') as f:
                     json.dump(existing, f, ensure_ascii=False, indent=2)
+                user_views.request_submitted(len(existing) - 1, record)
             except Exception as e:
                 error = f"Failed to register onboarding request: {e}"
 
@@ -661,6 +702,7 @@ def project_edit(project_id):
     if tags_raw:
         project['tags'] = [t.strip() for t in tags_raw.split(',') if t.strip()]
 
+    project_search.update(project)
     save_registry()
     return redirect(url_for('project_manage', project_id=project_id))
 
@@ -683,6 +725,8 @@ def project_delete(project_id):
         pass
 
     # Clean participants map
+    user_views.project_deleted(project, project_participants.get(project_id, []))
+    project_search.remove(project_id)
     if project_id in project_participants:
         project_participants.pop(project_id, None)
 
@@ -703,23 +747,49 @@ def project_delete(project_id):
 @login_required
 def onboarding_requests():
     username = session['user']
-    all_reqs = load_onboarding_requests()
-    # Annotate requests with indices and project title
-    annotated = []
-    for idx, rec in enumerate(all_reqs):
-        proj = next((p for p in projects_catalog if str(p.get('id')) == str(rec.get('project_id'))), None)
-        if not proj:
-            continue
-        if proj.get('owner') != username:
-            continue
-        annotated.append({
-            **rec,
-            '_id': idx,
-            'project_title': proj.get('title'),
-        })
-    # Sort: pending first
-    annotated.sort(key=lambda r: {'submitted': 0, 'accepted': 1, 'rejected': 1}.get(r.get('status','submitted'), 1))
-    return render_template('onboarding_requests.html', requests=annotated)
+    error = None
+    try:
+        rows, next_cursor = request_listing('owner', username, request.args)
+    except ValueError as e:
+        error = str(e)
+        rows, next_cursor = request_listing('owner', username, MultiDict())
+    owned = [p for p in projects_catalog if p.get('owner') == username]
+    filters = {k: request.args.get(k, '') for k in ('status', 'project', 'applicant', 'from', 'to', 'sort')}
+    more_url = url_for('api_requests', view='owner', **{k: v for k, v in filters.items() if v})
+    return render_template('onboarding_requests.html', requests=rows, next_cursor=next_cursor, filters=filters, more_url=more_url,
+                           owned_projects=owned, statuses=STATUSES, sorts=SORTS, error=error)
+
+
+@app.route('/api/requests')
+@login_required
+def api_requests():
+    """Paged onboarding requests as JSON.
+    view=owner (default): requests for projects the user owns; view=project&project=<id>: one owned
+    project; view=mine: the user's own requests. Filters: status, project, applicant, from, to,
+    sort (pending|newest|oldest), limit, cursor. rows=1 adds the rendered table rows as 'html'.
+    """
+    username = session['user']
+    view = request.args.get('view', 'owner')
+    project_id = request.args.get('project')
+    if view not in ('owner', 'project', 'mine'):
+        return jsonify({"error": "view must be owner, project or mine"}), 400
+    if view == 'project':
+        project = next((p for p in projects_catalog if str(p.get('id')) == str(project_id)), None)
+        if not project:
+            abort(404)
+        if project.get('owner') != username:
+            abort(403)
+    try:
+        rows, next_cursor = request_listing(view, username, request.args, project_id=project_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    out = {
+        "items": [{**{k: v for k, v in r.items() if k != '_id'}, "id": r['_id']} for r in rows],
+        "next_cursor": next_cursor,
+    }
+    if request.args.get('rows') == '1':
+        out["html"] = render_template('_request_rows.html', rows=rows, variant=view)
+    return jsonify(out)
 
 
 @app.route('/requests/<int:req_id>')
@@ -741,23 +811,23 @@ def onboarding_request_detail(req_id):
     answers_path = rec.get('answers_file')
     if answers_path:
         try:
-            # answers_file is relative to repo root (app dir). Build absolute path
-            abs_path = os.path.join(os.path.dirname(__file__), answers_path.replace('/', os.sep))
-            with open(abs_path, 'r', encoding='utf-8') as f:
-                payload = json.load(f)
-                # Prefer structured input if available; fall back to flat answers
-                if isinstance(payload.get('input'), dict):
-                    def flatten(prefix, obj, out):
-                        if isinstance(obj, dict):
-                            for k, v in obj.items():
-                                flatten(f"{prefix}.{k}" if prefix else k, v, out)
-                        else:
-                            out[prefix] = v if (v := obj) is not None else ''
-                    flat = {}
-                    flatten('', payload.get('input'), flat)
-                    answers = flat
-                else:
-                    answers = payload.get('answers', {})
+            # answers_file is a link relative to repo root (app dir), resolved by the answer store
+            payload = answer_store.resolve(answers_path)
+            if payload is None:
+                raise FileNotFoundError(answers_path)
+            # Prefer structured input if available; fall back to flat answers
+            if isinstance(payload.get('input'), dict):
+                def flatten(prefix, obj, out):
+                    if isinstance(obj, dict):
+                        for k, v in obj.items():
+                            flatten(f"{prefix}.{k}" if prefix else k, v, out)
+                    else:
+                        out[prefix] = v if (v := obj) is not None else ''
+                flat = {}
+                flatten('', payload.get('input'), flat)
+                answers = flat
+            else:
+                answers = payload.get('answers', {})
         except Exception as e:
             answers = {'_error': f'Failed to load answers: {e}'}
 
@@ -947,26 +1017,23 @@ def onboarding_request_questionnaire_answers(req_id):
     # Load the referenced answers_file if any and flatten its 'input' structure when present
     answers = {}
     answers_rel = rec.get('answers_file')
-    answers_abs = None
     load_error = None
     try:
         if answers_rel:
-            answers_abs = os.path.join(os.path.dirname(__file__), answers_rel.replace('/', os.sep))
-            if os.path.isfile(answers_abs):
-                with open(answers_abs, 'r', encoding='utf-8') as f:
-                    payload = json.load(f)
-                    if isinstance(payload.get('input'), dict):
-                        def flatten(prefix, obj, out):
-                            if isinstance(obj, dict):
-                                for k, v in obj.items():
-                                    flatten(f"{prefix}.{k}" if prefix else k, v, out)
-                            else:
-                                out[prefix] = v if (v := obj) is not None else ''
-                        flat = {}
-                        flatten('', payload.get('input'), flat)
-                        answers = flat
-                    else:
-                        answers = payload.get('answers', {}) or {}
+            payload = answer_store.resolve(answers_rel)
+            if payload is not None:
+                if isinstance(payload.get('input'), dict):
+                    def flatten(prefix, obj, out):
+                        if isinstance(obj, dict):
+                            for k, v in obj.items():
+                                flatten(f"{prefix}.{k}" if prefix else k, v, out)
+                        else:
+                            out[prefix] = v if (v := obj) is not None else ''
+                    flat = {}
+                    flatten('', payload.get('input'), flat)
+                    answers = flat
+                else:
+                    answers = payload.get('answers', {}) or {}
             else:
                 load_error = 'Answers file was referenced but not found on disk.'
         else:
@@ -974,10 +1041,12 @@ def onboarding_request_questionnaire_answers(req_id):
     except Exception as e:
         load_error = f"Failed to load questionnaire answers: {e}"
 
-    # Download link only if file is under static/
+    # Download link: the static file itself, or the record served as JSON when it lives in a segment
     download_href = None
-    if answers_rel and answers_rel.startswith('static/'):
+    if answers_rel and answers_rel.startswith('static/') and answer_store.is_plain_file(answers_rel):
         download_href = url_for('static', filename=answers_rel[7:])
+    elif answers and not load_error:
+        download_href = url_for('onboarding_request_answers_record', req_id=req_id, kind='questionnaire')
 
     return render_template(
         'questionnaire_answers_preview.html',
@@ -1004,42 +1073,30 @@ def onboarding_request_data_format_answers(req_id):
     if proj.get('owner') != session['user']:
         abort(403)
 
-    # Discover the applicant's data-format answers file (prefer explicit link, fallback to latest by pattern)
-    df_abs_path = None
+    # Discover the applicant's data-format answers (prefer explicit link, fallback to latest by pattern)
     df_rel_path = None
     try:
-        linked_rel = rec.get('data_answers_file')
-        if linked_rel:
-            df_abs_path = os.path.join(os.path.dirname(__file__), linked_rel.replace('/', os.sep))
-            df_rel_path = linked_rel
-        if not df_abs_path or not os.path.isfile(df_abs_path):
-            df_dir = os.path.join(os.path.dirname(__file__), 'static', 'data', 'db', 'data_format_answers')
-            if os.path.isdir(df_dir):
-                prefix = f"{rec.get('project_id')}_{rec.get('username')}_"
-                files = [f for f in os.listdir(df_dir) if f.startswith(prefix) and f.endswith('.json')]
-                if files:
-                    files.sort(reverse=True)
-                    df_abs_path = os.path.join(df_dir, files[0])
-                    df_rel_path = os.path.relpath(df_abs_path, os.path.dirname(__file__)).replace('\\','/')
+        df_rel_path = data_answers_link(rec, os.path.dirname(__file__))
     except Exception:
-        df_abs_path = None
+        df_rel_path = None
 
     structured = {}
     load_error = None
     try:
-        if df_abs_path and os.path.isfile(df_abs_path):
-            with open(df_abs_path, 'r', encoding='utf-8') as f:
-                payload = json.load(f)
-                structured = payload.get('data_format') or {}
+        payload = answer_store.resolve(df_rel_path) if df_rel_path else None
+        if payload is not None:
+            structured = payload.get('data_format') or {}
         else:
             load_error = 'No data-format answers file found for this request.'
     except Exception as e:
         load_error = f"Failed to load data-format answers: {e}"
 
-    # Derive a downloadable href if within static/
+    # Derive a downloadable href: the static file, or the record served as JSON
     download_href = None
-    if df_rel_path and df_rel_path.startswith('static/'):
+    if df_rel_path and df_rel_path.startswith('static/') and answer_store.is_plain_file(df_rel_path):
         download_href = url_for('static', filename=df_rel_path[7:])
+    elif structured and not load_error:
+        download_href = url_for('onboarding_request_answers_record', req_id=req_id, kind='data-format')
 
     return render_template(
         'data_format_answers_preview.html',
@@ -1052,6 +1109,27 @@ def onboarding_request_data_format_answers(req_id):
     )
 
 
+@app.route('/requests/<int:req_id>/answers/<kind>.json')
+@login_required
+def onboarding_request_answers_record(req_id, kind):
+    """Download the stored questionnaire or data-format record of a request as JSON
+    (needed when the record lives in a compressed segment rather than a static file)."""
+    all_reqs = load_onboarding_requests()
+    if req_id < 0 or req_id >= len(all_reqs) or kind not in ('questionnaire', 'data-format'):
+        abort(404)
+    rec = all_reqs[req_id]
+    proj = next((p for p in projects_catalog if str(p.get('id')) == str(rec.get('project_id'))), None)
+    if not proj:
+        abort(404)
+    if proj.get('owner') != session['user']:
+        abort(403)
+    rel = rec.get('answers_file') if kind == 'questionnaire' else data_answers_link(rec, os.path.dirname(__file__))
+    payload = answer_store.resolve(rel) if rel else None
+    if payload is None:
+        abort(404)
+    return jsonify(payload)
+
+
 @app.route('/requests/<int:req_id>/data-format-eval')
 @login_required
 def onboarding_request_data_format_eval(req_id):
@@ -1116,6 +1194,7 @@ def onboarding_request_decide(req_id):
     # Persist
     all_reqs[req_id] = rec
     save_onboarding_requests(all_reqs)
+    user_views.request_decided(req_id, rec)
 
     return redirect(url_for('onboarding_request_detail', req_id=req_id))
 
@@ -1134,13 +1213,28 @@ def assistant_chat():
     use_rag = bool(payload.get('use_rag'))
     llm_choice = (payload.get('llm') or '').lower()  # 'gpt-5' or 'claude-sonnet'
     extra_context = (payload.get('extra_context') or '').strip()
+    stream = bool(payload.get('stream'))  # NDJSON events: contexts, delta..., done | error
+    hedge = payload.get('hedge') if isinstance(payload.get('hedge'), bool) else None  # race both providers
+    # Reply cache: users can opt out for good (/assistant/preferences) or per request ("cache": false)
+    username = session['user']
+    use_cache = (response_cache is not None and payload.get('cache', True) is not False
+                 and users.get(username, {}).get('assistant_cache', True) is not False)
+    rag_mode = (payload.get('rag_mode') or 'dense').lower()  # 'dense', 'sparse' or 'hybrid'
+    if rag_mode not in RETRIEVAL_MODES:
+        rag_mode = 'dense'
+    rag_filters = normalize_filters(payload.get('rag_filters'))  # e.g. {"regulation": "GDPR", "article": 9}
+    try:
+        rag_limit = min(max(int(payload.get('rag_limit') or 5), 1), 20)
+    except (TypeError, ValueError):
+        rag_limit = 5
 
-    # Choose provider
+    # Choose the primary provider; the gateway falls back to the other one on errors/latency
     provider = None  # 'openai' or 'anthropic'
+    available = llm_gateway.providers if llm_gateway is not None else {}
     if llm_choice.startswith('claude'):
-        provider = 'anthropic' if anthropic_llm_client is not None else ('openai' if openai_llm_client is not None else None)
+        provider = 'anthropic' if 'anthropic' in available else ('openai' if 'openai' in available else None)
     else:
-        provider = 'openai' if openai_llm_client is not None else ('anthropic' if anthropic_llm_client is not None else None)
+        provider = 'openai' if 'openai' in available else ('anthropic' if 'anthropic' in available else None)
 
     if provider is None:
         return jsonify({"error": "No LLM client configured (OpenAI/Anthropic)."}), 500
@@ -1151,66 +1245,121 @@ def assistant_chat():
         "Cite specific regulations (e.g., GDPR, HIPAA) when applicable. Be concise and provide actionable guidance."
     )
 
-    messages = [{"role": "system", "content": system_prompt}]
-
     # Add optional RAG and extra context before the user's message
     rag_contexts = []
     if user_message and use_rag:
-        rag_contexts = qdrant_search(user_message)
-    if rag_contexts:
-        context_text = "\n\n".join([f"Source {i+1}: {c.get('text','')[:1500]}" for i, c in enumerate(rag_contexts)])
-        messages.append({"role": "system", "content": f"Relevant retrieved context:\n{context_text}"})
-    if extra_context:
-        messages.append({"role": "system", "content": f"Additional questionnaire/specification context provided by the user:\n{extra_context[:4000]}"})
-
-    # Append history safely (limit to last 20 turns)
-    if isinstance(history, list):
-        for m in history[-20:]:
-            if isinstance(m, dict):
-                r = m.get('role'); c = m.get('content')
-                if r in ("user", "assistant") and isinstance(c, str):
-                    messages.append({"role": r, "content": c})
-
-    if user_message:
-        messages.append({"role": "user", "content": user_message})
+        rag_contexts = retrieve_contexts(user_message, mode=rag_mode, limit=rag_limit, filters=rag_filters)
+
+    # Fit sources, extra context and history into the model's token budget
+    messages, usage = build_context(
+        system_prompt, user_message, history if isinstance(history, list) else [],
+        rag_contexts, extra_context, provider, provider_model(provider)
+    )
+    max_output_tokens = usage['max_output_tokens']
+
+    cache_key = response_key(provider, provider_model(provider), messages) if use_cache else None
+    cached = response_cache.get_entry(cache_key) if cache_key else None
+    cached_reply = cached['reply'] if cached else None
+
+    if stream:
+        def generate():
+            # First event carries the retrieved sources so the UI can show them immediately
+            yield json.dumps({"type": "contexts", "contexts": rag_contexts, "provider": provider, "usage": usage}) + "\n"
+            if cached_reply is not None:
+                yield json.dumps({"type": "delta", "text": cached_reply}) + "\n"
+                yield json.dumps({"type": "done", "cached": True, "provider": cached.get('provider') or provider}) + "\n"
+                return
+            parts = []
+            served_by = provider
+            try:
+                for kind, value in llm_stream(provider, messages, max_output_tokens, hedge=hedge):
+                    if kind == 'provider':
+                        served_by = value
+                        continue
+                    parts.append(value)
+                    yield json.dumps({"type": "delta", "text": value}) + "\n"
+                if cache_key:
+                    # Keyed by the provider that answered, not the requested one
+                    response_cache.put(response_key(served_by, provider_model(served_by), messages),
+                                       "".join(parts), served_by, provider_model(served_by))
+                yield json.dumps({"type": "done", "cached": False, "provider": served_by}) + "\n"
+            except Exception as e:
+                yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+        return Response(
+            stream_with_context(generate()),
+            mimetype='application/x-ndjson',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+
+    if cached_reply is not None:
+        return jsonify({
+            "reply": cached_reply,
+            "provider": cached.get('provider') or provider,
+            "contexts": rag_contexts,
+            "usage": usage,
+            "cached": True,
+        })
 
     try:
-        if provider == 'openai':
-            model = os.getenv('OPENAI_MODEL', 'gpt-5') if llm_choice.startswith('gpt') else os.getenv('OPENAI_MODEL', 'gpt-5')
-            completion = openai_llm_client.chat.completions.create(
-                model=model,
-                messages=messages
-            )
-            reply = completion.choices[0].message.content
-        else:
-            # Anthropic messages format
-            from anthropic import NOT_GIVEN
-            # Convert OpenAI-style to Anthropic-style
-            system_texts = [m['content'] for m in messages if m['role'] == 'system']
-            system_text = "\n\n".join(system_texts) if system_texts else NOT_GIVEN
-            conv_msgs = []
-            for m in messages:
-                if m['role'] == 'system':
-                    continue
-                role = 'user' if m['role'] == 'user' else 'assistant'
-                conv_msgs.append({"role": role, "content": [{"type": "text", "text": m['content']}]})
-            model = os.getenv('ANTHROPIC_MODEL', 'claude-sonnet-4-20250514')
-            resp = anthropic_llm_client.messages.create(
-                model=model,
-                system=system_text,
-                max_tokens=1000,
-                messages=conv_msgs
-            )
-            # Concatenate text blocks from the first message
-            reply = "".join([b.text for b in (resp.content or []) if getattr(b, 'type', '') == 'text'])
+        served_by, reply = llm_complete(provider, messages, max_output_tokens, hedge=hedge)
+        if cache_key:
+            response_cache.put(response_key(served_by, provider_model(served_by), messages),
+                               reply, served_by, provider_model(served_by))
         return jsonify({
             "reply": reply,
+            "provider": served_by,
             "contexts": rag_contexts,
+            "usage": usage,
+            "cached": False,
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/assistant/retrieval-cache')
+@login_required
+def assistant_retrieval_cache_stats():
+    """Hit/miss/eviction counters of this worker's RAG retrieval cache."""
+    if retrieval_cache is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **retrieval_cache.snapshot()})
+
+
+@app.route('/assistant/response-cache')
+@login_required
+def assistant_response_cache_stats():
+    """Hit/miss counters of this worker's assistant reply cache."""
+    if response_cache is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **response_cache.snapshot()})
+
+
+@app.route('/assistant/llm-metrics')
+@login_required
+def assistant_llm_metrics():
+    """Per-provider latency, error and fallback counters of this worker's LLM gateway."""
+    if llm_gateway is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **llm_gateway.snapshot()})
+
+
+@app.route('/assistant/preferences', methods=['GET', 'POST'])
+@login_required
+def assistant_preferences():
+    """Read or update the signed-in user's assistant preferences ({"response_cache": bool})."""
+    username = session['user']
+    user = users.setdefault(username, {"password": ""})
+    if request.method == 'POST':
+        try:
+            payload = request.get_json(force=True) or {}
+        except Exception:
+            payload = {}
+        if 'response_cache' in payload:
+            user['assistant_cache'] = bool(payload.get('response_cache'))
+            save_registry()
+    return jsonify({"response_cache": user.get('assistant_cache', True) is not False})
+
+
 @app.route('/assistant/save', methods=['POST'])
 @login_required
 def assistant_save():
@@ -1248,59 +1397,21 @@ def onboarding_data_format(project_id):
     if not project:
         return redirect(url_for('dashboard'))
 
-    # Load data format questionnaire definition
-    q_path = os.path.join(os.path.dirname(__file__), 'static', 'data', 'schemas', 'data_format_questionnaire.json')
-    try:
-        with open(q_path, 'r', encoding='utf-8') as f:
-            questionnaire = json.load(f)
-    except Exception:
-        questionnaire = {"title": "Data Format Questionnaire", "sections": []}
+    # Data format questionnaire definition
+    questionnaire = questionnaire_registry.get('data_format')
 
     error = None
     if request.method == 'POST':
-        # Collect answers from the posted form (mirrors onboarding parser)
-        answers = {}
-        for section in questionnaire.get('sections', []):
-            for q in section.get('questions', []):
-                qid = q.get('id')
-                qtype = q.get('type')
-                if not qid:
-                    continue
-                form_key = qid.replace('.', '__')
-                if qtype in ['text', 'email', 'textarea', 'radio']:
-                    val = request.form.get(form_key, '').strip()
-                    answers[qid] = val
-                elif qtype == 'multiselect':
-                    vals = request.form.getlist(form_key)
-                    other_enabled = q.get('otherOption')
-                    other_key = form_key + '__other'
-                    other_val = request.form.get(other_key, '').strip() if other_enabled else ''
-                    if other_val:
-                        vals.append(other_val)
-                    answers[qid] = vals
-                else:
-                    answers[qid] = request.form.get(form_key, '').strip()
-
-        # Build structured object grouped by the first segment before '.'
-        structured = {"storage": {}, "schema": {}, "meta": {}, "delivery": {}, "ops": {}}
-        for k, v in answers.items():
-            if '.' in k:
-                grp, rest = k.split('.', 1)
-                if grp in structured:
-                    structured[grp][rest] = v
-                else:
-                    # Put unexpected groups under meta
-                    structured.setdefault('meta', {})[k] = v
-            else:
-                structured.setdefault('meta', {})[k] = v
-
-        # Persist answers to a timestamped JSON file
+        # Collect answers, grouped by the first segment before '.' (unknown groups go under meta)
+        answers, structured = form_engine.parse('data_format', request.form)
+        field_errors = input_validators.validate('data_format', structured, question_labels(questionnaire))
+        if field_errors:
+            return render_template('data_format_form.html', project=project, questionnaire=questionnaire, error=INVALID_ANSWERS_MESSAGE,
+                                   field_errors=field_errors, form_action=url_for('onboarding_data_format', project_id=project_id)), 400
+
+        # Persist answers as a timestamped record
         ts = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
         username = session['user']
-        base_dir = os.path.join(os.path.dirname(__file__), 'static', 'data', 'db', 'data_format_answers')
-        os.makedirs(base_dir, exist_ok=True)
-        fname = f"{project_id}_{username}_{ts}.json"
-        fpath = os.path.join(base_dir, fname)
         payload = {
             'project_id': project_id,
             'username': username,
@@ -1309,8 +1420,7 @@ def onboarding_data_format(project_id):
             'data_format': structured
         }
         try:
-            with open(fpath, 'w', encoding='utf-8') as f:
-                json.dump(payload, f, ensure_ascii=False, indent=2)
+            answer_store.save('data_format_answers', f"{project_id}_{username}_{ts}", payload)
         except Exception as e:
             error = f"Failed to save data format answers: {e}"
 
@@ -0,0 +1,126 @@
+"""Benchmark the FDP pipeline in memory vs streaming mode on a synthetic site CSV.
+
+Writes a CSV with the schema's columns plus unused ones (one of them mostly empty, which
+must not drop rows), then runs run_pipeline for it once in memory and once per chunk size,
+each in a fresh child process, and reports wall time and the child's peak RSS (VmHWM;
+ru_maxrss where /proc is unavailable). Exits non-zero unless every run gives the same result. With --cache the
+streaming runs are repeated through the CSV -> Parquet cache: once converting (miss), once
+reading the cached copy (hit).
+
+    python extra/benchmarks/fdp_stream_bench.py
+    python extra/benchmarks/fdp_stream_bench.py --rows 5e6 --chunks 50000 200000 --json
+    python extra/benchmarks/fdp_stream_bench.py --cache
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'extra', 'running-scenario'))
+
+from fdp_pipeline import run_pipeline  # noqa: E402
+
+SCHEMA = {'columns': {'age': 'int64', 'bmi': 'float64', 'site': 'str', 'visits': 'int32'}}
+
+
+def write_site(path, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    block = 500_000
+    for start in range(0, rows, block):
+        n = min(block, rows - start)
+        df = pd.DataFrame({
+            'age': rng.integers(18, 90, n),
+            'bmi': np.where(rng.random(n) < 0.02, np.nan, rng.normal(25, 4, n).round(2)),
+            'site': rng.choice(['north', 'south', 'east', 'west'], n),
+            'visits': rng.integers(0, 40, n),
+            'notes': np.where(rng.random(n) < 0.7, None, rng.choice(['follow-up', 'referred'], n)),
+            'score': rng.random(n).round(4),
+        })
+        df.to_csv(path, mode='a' if start else 'w', header=not start, index=False)
+
+
+def peak_rss_mb():
+    # VmHWM starts afresh with the exec'd child; ru_maxrss on Linux keeps the forking parent's peak
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _child(conn, data_file, schema_file, output_dir, chunk_size, cache_dir):
+    t0 = time.perf_counter()
+    entry = run_pipeline('bench', data_file, schema_file, output_dir, chunk_size, cache_dir=cache_dir)
+    entry['wall'] = time.perf_counter() - t0
+    entry['peak_rss_mb'] = peak_rss_mb()
+    conn.send(entry)
+    conn.close()
+
+
+def measure(data_file, schema_file, output_dir, chunk_size, cache_dir=None):
+    # spawn: the child's peak RSS must not include the parent's memory
+    ctx = mp.get_context('spawn')
+    parent, child = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_child, args=(child, data_file, schema_file, output_dir, chunk_size, cache_dir))
+    proc.start()
+    entry = parent.recv()
+    proc.join()
+    mode = f"stream/{chunk_size}" if chunk_size else 'memory'
+    if 'cache' in entry:
+        mode += ' (cache hit)' if entry['cache']['hit'] else ' (cache miss)'
+    return {'mode': mode, 'status': entry['status'],
+            'seconds': round(entry['wall'], 3), 'peak_rss_mb': round(entry['peak_rss_mb'], 1),
+            'result': entry.get('result'), 'error': entry.get('error')}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=float, default=2e6)
+    parser.add_argument('--chunks', type=int, nargs='+', default=[50_000, 200_000], help='rows per chunk')
+    parser.add_argument('--cache', action='store_true', help='also run through the CSV -> Parquet cache')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = os.path.join(tmp, 'site.csv')
+        schema_file = os.path.join(tmp, 'schema.json')
+        with open(schema_file, 'w') as f:
+            json.dump(SCHEMA, f)
+        write_site(data_file, int(args.rows))
+        csv_mb = os.path.getsize(data_file) / 1048576
+        rows = [measure(data_file, schema_file, tmp, None)]
+        rows += [measure(data_file, schema_file, tmp, c) for c in args.chunks]
+        if args.cache:
+            cache_dir = os.path.join(tmp, 'cache')
+            for c in args.chunks:
+                rows += [measure(data_file, schema_file, tmp, c, cache_dir)]
+
+    # Every mode must agree: same columns read, same rows dropped
+    consistent = all(r['status'] == 'ok' and r['result'] == rows[0]['result'] for r in rows)
+    if args.json:
+        print(json.dumps({'rows': int(args.rows), 'csv_mb': round(csv_mb, 1), 'consistent': consistent,
+                          'runs': rows}, indent=2))
+        return 0 if consistent else 1
+    print(f"{int(args.rows):,} rows, {csv_mb:.0f} MB CSV")
+    for r in rows:
+        outcome = r['result'] if r['status'] == 'ok' else r['error']
+        print(f"  {r['mode']:<28} {r['seconds']:7.2f}s  {r['peak_rss_mb']:8.1f} MB peak RSS  {outcome}")
+    if not consistent:
+        print("ERROR: results differ between modes")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
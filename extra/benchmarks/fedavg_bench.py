@@ -0,0 +1,98 @@
+"""Benchmark weighted FedAvg for rounds of 10, 100 and 1000 clients.
+
+Each client sends a float32 update of --params parameters (split over a few layers) and a
+random num_samples weight. Per round size, reports time and peak traced memory for:
+
+  - streaming:  StreamingFedAvg, folding each update into a running sum as it arrives
+  - memmap:     the same with memory-mapped accumulators (--memmap)
+  - stacked:    keep every update, then np.average over the stacked arrays (the naive way)
+
+Updates are generated one at a time from a seed, so only the stacked variant holds them all.
+
+    python extra/benchmarks/fedavg_bench.py
+    python extra/benchmarks/fedavg_bench.py --clients 10 100 1000 --params 200000 --memmap --json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, REPO_ROOT)
+
+from src.federatedAggregation import StreamingFedAvg  # noqa: E402
+
+LAYERS = (('dense1', 0.6), ('dense2', 0.3), ('out', 0.1))
+
+
+def updates(n_clients: int, n_params: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    for i in range(n_clients):
+        params = {name: rng.standard_normal(max(1, int(n_params * share)), dtype=np.float32) for name, share in LAYERS}
+        yield f"client_{i}", params, int(rng.integers(50, 5000))
+
+
+def run_streaming(n_clients, n_params, memmap_dir=None):
+    fedavg = StreamingFedAvg(0, memmap_dir=memmap_dir)
+    for cid, params, n in updates(n_clients, n_params):
+        fedavg.add(cid, params, n)
+    result = fedavg.result()
+    fedavg.close()
+    return result
+
+
+def run_stacked(n_clients, n_params):
+    kept = list(updates(n_clients, n_params))
+    weights = np.array([n for _, _, n in kept], dtype=np.float64)
+    return {name: np.average(np.stack([p[name] for _, p, _ in kept]), axis=0, weights=weights) for name, _ in LAYERS}
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {'seconds': round(elapsed, 4), 'peak_mb': round(peak / 1048576, 1)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--params', type=int, default=100000, help='parameters per model update')
+    parser.add_argument('--memmap', action='store_true', help='also run with memory-mapped accumulators')
+    parser.add_argument('--skip-stacked', action='store_true', help='skip the naive variant (needs clients x model memory)')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    rows = []
+    for n in args.clients:
+        row = {'clients': n, 'params': args.params}
+        streamed, row['streaming'] = measure(run_streaming, n, args.params)
+        if args.memmap:
+            with tempfile.TemporaryDirectory() as tmp:
+                _, row['memmap'] = measure(run_streaming, n, args.params, tmp)
+        if not args.skip_stacked:
+            stacked, row['stacked'] = measure(run_stacked, n, args.params)
+            row['max_abs_diff'] = float(max(np.max(np.abs(streamed[k] - stacked[k])) for k in streamed))
+        rows.append(row)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+    for row in rows:
+        parts = [f"{name}: {row[name]['seconds']:.3f}s / {row[name]['peak_mb']:.1f} MB peak"
+                 for name in ('streaming', 'memmap', 'stacked') if name in row]
+        diff = f"  (max diff {row['max_abs_diff']:.2e})" if 'max_abs_diff' in row else ''
+        print(f"{row['clients']:>5} clients x {row['params']} params  " + '  |  '.join(parts) + diff)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
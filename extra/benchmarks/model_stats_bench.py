@@ -0,0 +1,88 @@
+"""Benchmark server-side model update statistics from 1M to 100M parameters.
+
+Times federatedModelStats.parameter_stats (one chunked pass: float64 dot product for the
+norm, min/max for the largest magnitude, NaN detection folded into the norm) against the
+straightforward whole-array version (np.linalg.norm, np.isnan(...).any(), np.abs(...).max()),
+and reports peak traced memory for each. Updates are float32 arrays.
+
+    python extra/benchmarks/model_stats_bench.py
+    python extra/benchmarks/model_stats_bench.py --sizes 1e6 1e7 --chunk 262144 --json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, REPO_ROOT)
+
+from src.federatedModelStats import DEFAULT_CHUNK, parameter_stats  # noqa: E402
+
+
+def whole_array_stats(arrays):
+    flat = np.concatenate([a.reshape(-1) for a in arrays.values()]).astype(np.float64)
+    return {
+        'size_bytes': sum(a.nbytes for a in arrays.values()),
+        'parameter_count': int(flat.size),
+        'gradient_norm': float(np.linalg.norm(flat)),
+        'contains_nan': bool(np.isnan(flat).any()),
+        'max_parameter_value': float(np.abs(flat).max()),
+    }
+
+
+def measure(fn, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        if best is None or elapsed < best[1]['seconds']:
+            best = (result, {'seconds': round(elapsed, 4), 'peak_mb': round(peak / 1048576, 1)})
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1e6, 1e7, 1e8], help='parameters per update')
+    parser.add_argument('--chunk', type=int, default=DEFAULT_CHUNK, help='elements per chunk')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    rows = []
+    for size in (int(s) for s in args.sizes):
+        # Two layers, like a small dense network
+        arrays = {'hidden': rng.standard_normal(size - size // 10, dtype=np.float32),
+                  'out': rng.standard_normal(size // 10, dtype=np.float32)}
+        chunked, chunked_m = measure(parameter_stats, arrays, args.chunk, repeat=args.repeat)
+        whole, whole_m = measure(whole_array_stats, arrays, repeat=args.repeat)
+        rows.append({
+            'parameters': size,
+            'update_mb': round(sum(a.nbytes for a in arrays.values()) / 1048576, 1),
+            'chunked': chunked_m,
+            'whole_array': whole_m,
+            'norm_rel_diff': abs(chunked['gradient_norm'] - whole['gradient_norm']) / whole['gradient_norm'],
+        })
+        del arrays
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+    for r in rows:
+        print(f"{r['parameters']:>11,} params ({r['update_mb']:.0f} MB)  "
+              f"chunked: {r['chunked']['seconds']:.3f}s / {r['chunked']['peak_mb']:.1f} MB peak  |  "
+              f"whole-array: {r['whole_array']['seconds']:.3f}s / {r['whole_array']['peak_mb']:.1f} MB peak  "
+              f"(norm rel diff {r['norm_rel_diff']:.1e})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Benchmark the cost of validating one questionnaire submission.
+
+For each questionnaire with an input schema, builds a realistic submission (every
+question answered from its options), then times per submission:
+
+  - parse:        form_engine parse into the stored object
+  - prebuilt:     InputValidators.validate (validator compiled once at startup)
+  - per-request:  jsonschema.validate, which rebuilds the validator and re-checks the
+                  schema on every call (what validating without a cache would cost)
+
+    python extra/benchmarks/validation_bench.py
+    python extra/benchmarks/validation_bench.py --iterations 5000 --json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, REPO_ROOT)
+
+import jsonschema  # noqa: E402
+from werkzeug.datastructures import MultiDict  # noqa: E402
+
+from src.services.form_engine import FormEngine  # noqa: E402
+from src.services.questionnaires import QuestionnaireRegistry  # noqa: E402
+from src.services.validation import InputValidators, prune_unanswered  # noqa: E402
+
+
+def sample_form(questionnaire, rnd: random.Random) -> MultiDict:
+    items = []
+    for section in questionnaire.get('sections', []):
+        for q in section.get('questions', []):
+            opts = q.get('options') or []
+            if opts:
+                k = rnd.randint(1, min(3, len(opts))) if q.get('type') in ('multiselect', 'checklist') else 1
+                items.extend((q['form_key'], o) for o in rnd.sample(opts, k))
+            elif q.get('type') == 'email':
+                items.append((q['form_key'], 'contact@example.org'))
+            else:
+                items.append((q['form_key'], 'Sample answer'))
+    return MultiDict(items)
+
+
+def per_call_us(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--json', action='store_true', help='print a JSON report')
+    args = parser.parse_args(argv)
+
+    registry = QuestionnaireRegistry(check_interval=None)
+    registry.load_all()
+    engine = FormEngine(registry)
+    validators = InputValidators(engine.schemas)
+    rnd = random.Random(0)
+
+    report = {}
+    for name in engine.shapes:
+        form = sample_form(registry.get(name), rnd)
+        _, structured = engine.parse(name, form)
+        schema = engine.schemas[name]
+        assert not validators.validate(name, structured), f"sample submission for {name} is invalid"
+        pruned = prune_unanswered(structured)
+        slow_iterations = max(args.iterations // 10, 1)
+        report[name] = {
+            'parse_us': round(per_call_us(lambda: engine.parse(name, form), args.iterations), 1),
+            'validate_prebuilt_us': round(per_call_us(lambda: validators.validate(name, structured), args.iterations), 1),
+            'validate_per_request_us': round(per_call_us(
+                lambda: jsonschema.validate(pruned, schema, format_checker=jsonschema.FormatChecker()), slow_iterations), 1),
+        }
+        report[name]['speedup'] = round(report[name]['validate_per_request_us'] / report[name]['validate_prebuilt_us'], 1)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'questionnaire':<28} {'parse us':>9} {'prebuilt us':>12} {'per-request us':>15} {'speedup':>8}")
+        for name, r in report.items():
+            print(f"{name:<28} {r['parse_us']:>9.1f} {r['validate_prebuilt_us']:>12.1f} "
+                  f"{r['validate_per_request_us']:>15.1f} {r['speedup']:>7.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
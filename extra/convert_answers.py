@@ -0,0 +1,44 @@
+"""Convert questionnaire answer files to the compact segment store.
+
+Appends every static/data/db/<collection>/<key>.json record to
+<collection>/segments/<month|project>.jsonl.gz and indexes it (see
+src/services/answer_store.py). Links stored in onboarding_requests.json keep
+resolving because records are addressed by the same logical path in both modes.
+
+    python extra/convert_answers.py                      # convert, keep the JSON files
+    python extra/convert_answers.py --remove             # delete JSON files once indexed
+    python extra/convert_answers.py --partition project  # one segment per project
+
+Run the app with ANSWER_STORE_MODE=segments to write new submissions the same way.
+"""
+import argparse
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, REPO_ROOT)
+
+from src.services.answer_store import COLLECTIONS, AnswerStore  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--collection', action='append', choices=COLLECTIONS,
+                        help='collection to convert (repeatable; default: all)')
+    parser.add_argument('--partition', choices=('month', 'project'), default=None,
+                        help='segment per month (default) or per project')
+    parser.add_argument('--remove', action='store_true', help='delete the JSON files after conversion')
+    args = parser.parse_args(argv)
+
+    store = AnswerStore(REPO_ROOT, mode='segments', partition=args.partition)
+    for collection in args.collection or COLLECTIONS:
+        stats = store.convert(collection, remove=args.remove)
+        ratio = (stats['bytes_before'] / stats['bytes_after']) if stats['bytes_after'] else 0
+        print(f"{collection}: {stats['converted']} converted, {stats['skipped']} already indexed, "
+              f"{stats['removed']} removed, {stats['bytes_before']} -> {stats['bytes_after']} bytes"
+              + (f" ({ratio:.1f}x smaller)" if ratio else ''))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
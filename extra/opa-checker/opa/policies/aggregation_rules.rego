@@ -1,5 +1,7 @@
 package federated.aggregation
 
+import data.federated.privacy
+import future.keywords.every
 import future.keywords.if
 import future.keywords.in
 
@@ -10,6 +12,7 @@ allow_aggregation if {
     minimum_participants_met
     data_quality_sufficient
     privacy_budget_available
+    contribution_limits_ok
 }
 
 # Check minimum number of participants
@@ -32,13 +35,23 @@ all_have_min_samples if {
     }
 }
 
-# Check privacy budget (differential privacy)
+round_project := object.get(input.round, "project_id", "default")
+
+# Check privacy budget (differential privacy) against the ledger totals, including
+# budget reserved by other rounds in flight
 privacy_budget_available if {
-    current_epsilon := data.privacy.current_epsilon_spent
-    epsilon_for_round := input.round.epsilon_cost
-    total_epsilon := current_epsilon + epsilon_for_round
+    total_epsilon := privacy.epsilon_committed(round_project) + input.round.epsilon_cost
+    total_epsilon <= data.privacy_config.total_epsilon_budget
+
+    total_delta := privacy.delta_committed(round_project) + object.get(input.round, "delta_cost", 0)
+    total_delta <= data.privacy_config.total_delta_budget
+}
 
-    total_epsilon <= data.privacy.max_epsilon_budget
+# No participant may exceed its contribution limit (O(1) lookup per participant)
+contribution_limits_ok if {
+    every participant in input.participants {
+        privacy.contribution_count(round_project, participant.client_id) < data.privacy_config.max_contributions_per_client
+    }
 }
 
 # Aggregation decision with details
@@ -47,10 +60,11 @@ aggregation_decision := {
     "round": input.round.number,
     "num_participants": count(input.participants),
     "total_samples": sum([p.num_samples | p := input.participants[_]]),
-    "privacy_budget_remaining": data.privacy.max_epsilon_budget - data.privacy.current_epsilon_spent,
+    "privacy_budget_remaining": data.privacy_config.total_epsilon_budget - privacy.epsilon_committed(round_project),
     "reasons": denial_reasons
 }
 
 denial_reasons contains "insufficient_participants" if not minimum_participants_met
 denial_reasons contains "insufficient_data_quality" if not data_quality_sufficient
-denial_reasons contains "privacy_budget_exhausted" if not privacy_budget_available
\ No newline at end of file
+denial_reasons contains "privacy_budget_exhausted" if not privacy_budget_available
+denial_reasons contains "contribution_limit_reached" if not contribution_limits_ok
\ No newline at end of file
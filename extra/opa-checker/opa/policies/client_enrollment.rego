@@ -7,37 +7,16 @@ import future.keywords.in
 default allow := false
 
 # Allow enrollment if all conditions are met
-allow if {
-    client_authenticated
-    client_meets_requirements
-    not client_blacklisted
-    enrollment_window_open
-}
+allow if eligible(input.client)
 
 # Check if client is authenticated
-client_authenticated if {
-    input.client.certificate_valid
-    input.client.identity != ""
-}
+client_authenticated if authenticated(input.client)
 
 # Check client meets minimum requirements
-client_meets_requirements if {
-    input.client.dataset_size >= data.enrollment.min_dataset_size
-    input.client.cpu_cores >= data.enrollment.min_cpu_cores
-    input.client.memory_gb >= data.enrollment.min_memory_gb
-}
-
-# Cache client blacklist lookups
-#client_blacklisted := cached_blacklist[input.client.id]
-#
-#cached_blacklist[client_id] := true if {
-#    client_id := data.blacklist.client_ids[_]
-#}
+client_meets_requirements if meets_requirements(input.client)
 
 # Check if client is blacklisted
-client_blacklisted if {
-    input.client.id in data.blacklist.client_ids
-}
+client_blacklisted if blacklisted(input.client)
 
 # Check if enrollment is open
 enrollment_window_open if {
@@ -54,7 +33,57 @@ enrollment_decision := {
     "reasons": reasons
 }
 
-reasons contains "authenticated" if client_authenticated
-reasons contains "meets_requirements" if client_meets_requirements
-reasons contains "blacklisted" if client_blacklisted
-reasons contains "window_closed" if not enrollment_window_open
\ No newline at end of file
+reasons := client_reasons(input.client)
+
+# Batch enrollment check for a whole round in one query:
+#   input: {"clients": [{"id": ..., ...}, ...]}
+# One decision per client, in input order.
+batch_decisions := [decision |
+    some client in input.clients
+    decision := {
+        "allowed": eligible(client),
+        "client_id": object.get(client, "id", null),
+        "reasons": client_reasons(client)
+    }
+]
+
+# --- Per-client checks, shared by the single and batch rules ---
+
+authenticated(client) := true if {
+    client.certificate_valid
+    client.identity != ""
+} else := false
+
+meets_requirements(client) := true if {
+    client.dataset_size >= data.enrollment.min_dataset_size
+    client.cpu_cores >= data.enrollment.min_cpu_cores
+    client.memory_gb >= data.enrollment.min_memory_gb
+} else := false
+
+# data.blacklist.clients is a keyed object ({id: true}), kept up to date by
+# src/clientRegistryPublisher.py, so this is a constant-time lookup
+blacklisted(client) := true if {
+    data.blacklist.clients[client.id]
+} else := false
+
+eligible(client) := true if {
+    authenticated(client)
+    meets_requirements(client)
+    not blacklisted(client)
+    enrollment_window_open
+} else := false
+
+client_reasons(client) := {reason |
+    flags := {
+        "authenticated": authenticated(client),
+        "meets_requirements": meets_requirements(client),
+        "blacklisted": blacklisted(client),
+        "window_closed": enrollment_window_closed
+    }
+    some reason, flag in flags
+    flag == true
+}
+
+enrollment_window_closed := false if {
+    enrollment_window_open
+} else := true
@@ -7,34 +7,21 @@ default allow := false
 
 # Allow model update if valid
 allow if {
-    valid_model_size
-    valid_parameter_count
-    valid_gradient_norm
-    no_suspicious_patterns
-    client_authorized
+    report := update_report(input.client, input.model, object.get(input, "round_number", null))
+    report.valid
 }
 
 # Check model size is within bounds
-valid_model_size if {
-    input.model.size_bytes <= data.limits.max_model_size_mb * 1048576
-    input.model.size_bytes >= data.limits.min_model_size_mb * 1048576
-}
+valid_model_size if model_size_ok(input.model)
 
 # Check parameter count matches expected
-valid_parameter_count if {
-    input.model.parameter_count == data.model_config.expected_parameters
-}
+valid_parameter_count if parameter_count_ok(input.model)
 
 # Check gradient norm (防止梯度爆炸攻击)
-valid_gradient_norm if {
-    input.model.gradient_norm <= data.security.max_gradient_norm
-}
+valid_gradient_norm if gradient_norm_ok(input.model)
 
 # Detect suspicious patterns
-no_suspicious_patterns if {
-    not has_nan_values
-    not has_extreme_outliers
-}
+no_suspicious_patterns if model_clean(input.model)
 
 has_nan_values if {
     input.model.contains_nan == true
@@ -45,20 +32,60 @@ has_extreme_outliers if {
 }
 
 # Check client is authorized for this round
-client_authorized if {
-    input.client.id in data.current_round.selected_clients
-}
+client_authorized if authorized(input.client)
 
 # Validation report
-validation_report := {
-    "valid": allow,
-    "client_id": input.client.id,
-    "round": input.round_number,
-    "checks": {
-        "size": valid_model_size,
-        "parameters": valid_parameter_count,
-        "gradient_norm": valid_gradient_norm,
-        "no_suspicious": no_suspicious_patterns,
-        "authorized": client_authorized
+validation_report := update_report(input.client, input.model, object.get(input, "round_number", null))
+
+# Batch validation of a whole round in one query:
+#   input: {"round_number": n, "updates": [{"client": {"id": ...}, "model": {...}}, ...]}
+# One report per update, in input order.
+batch_reports := [report |
+    some update in input.updates
+    report := update_report(object.get(update, "client", {}), object.get(update, "model", {}), object.get(input, "round_number", null))
+]
+
+# --- Per-update checks, shared by the single and batch rules ---
+
+model_size_ok(model) := true if {
+    model.size_bytes <= data.limits.max_model_size_mb * 1048576
+    model.size_bytes >= data.limits.min_model_size_mb * 1048576
+} else := false
+
+parameter_count_ok(model) := true if {
+    model.parameter_count == data.model_config.expected_parameters
+} else := false
+
+gradient_norm_ok(model) := true if {
+    model.gradient_norm <= data.security.max_gradient_norm
+} else := false
+
+model_clean(model) := true if {
+    not model.contains_nan == true
+    not model.max_parameter_value > data.security.parameter_threshold
+} else := false
+
+# data.current_round.selected is a keyed object ({id: true}); constant-time lookup
+authorized(client) := true if {
+    data.current_round.selected[client.id]
+} else := false
+
+all_passed(checks) := false if {
+    some check in checks
+    check == false
+} else := true
+
+update_report(client, model, round_number) := {
+    "valid": all_passed(checks),
+    "client_id": object.get(client, "id", null),
+    "round": round_number,
+    "checks": checks
+} if {
+    checks := {
+        "size": model_size_ok(model),
+        "parameters": parameter_count_ok(model),
+        "gradient_norm": gradient_norm_ok(model),
+        "no_suspicious": model_clean(model),
+        "authorized": authorized(client)
     }
-}
\ No newline at end of file
+}
@@ -11,30 +11,61 @@ allow if {
     client_contribution_limit_ok
 }
 
+# Budget state per project, pushed by the privacy ledger (src/privacyLedger.py):
+#   data.privacy_state.projects[<project_id>] = {epsilon_spent, delta_spent, epsilon_reserved,
+#                                                delta_reserved, rounds, contribution_counts}
+default ledger_projects := {}
+
+ledger_projects := data.privacy_state.projects
+
+empty_state := {
+    "epsilon_spent": 0,
+    "delta_spent": 0,
+    "epsilon_reserved": 0,
+    "delta_reserved": 0,
+    "rounds": 0,
+    "contribution_counts": {}
+}
+
+project_state(project_id) := object.get(ledger_projects, project_id, empty_state)
+
+# O(1) lookup of a client's contributions, instead of scanning the contribution history
+contribution_count(project_id, client_id) := n if {
+    state := project_state(project_id)
+    n := object.get(object.get(state, "contribution_counts", {}), client_id, 0)
+}
+
+# Spent plus reserved by rounds still in flight
+epsilon_committed(project_id) := total if {
+    state := project_state(project_id)
+    total := state.epsilon_spent + state.epsilon_reserved
+}
+
+delta_committed(project_id) := total if {
+    state := project_state(project_id)
+    total := state.delta_spent + state.delta_reserved
+}
+
+input_project := object.get(input, "project_id", "default")
+
 within_epsilon_budget if {
-    current := data.privacy_state.epsilon_spent
-    requested := input.operation.epsilon_cost
-    total := current + requested
+    total := epsilon_committed(input_project) + input.operation.epsilon_cost
     total <= data.privacy_config.total_epsilon_budget
 }
 
 within_delta_budget if {
-    current := data.privacy_state.delta_spent
-    requested := input.operation.delta_cost
-    total := current + requested
+    total := delta_committed(input_project) + input.operation.delta_cost
     total <= data.privacy_config.total_delta_budget
 }
 
 # Limit how much one client can contribute (防止单点隐私泄露)
 client_contribution_limit_ok if {
-    client_id := input.client.id
-    client_contributions := [c | c := data.privacy_state.contributions[_]; c.client_id == client_id]
-    count(client_contributions) < data.privacy_config.max_contributions_per_client
+    contribution_count(input_project, input.client.id) < data.privacy_config.max_contributions_per_client
 }
 
 # Calculate remaining budget
 remaining_budget := {
-    "epsilon": data.privacy_config.total_epsilon_budget - data.privacy_state.epsilon_spent,
-    "delta": data.privacy_config.total_delta_budget - data.privacy_state.delta_spent,
-    "client_contributions_left": data.privacy_config.max_contributions_per_client - count([c | c := data.privacy_state.contributions[_]; c.client_id == input.client.id])
-}
\ No newline at end of file
+    "epsilon": data.privacy_config.total_epsilon_budget - epsilon_committed(input_project),
+    "delta": data.privacy_config.total_delta_budget - delta_committed(input_project),
+    "client_contributions_left": data.privacy_config.max_contributions_per_client - contribution_count(input_project, input.client.id)
+}
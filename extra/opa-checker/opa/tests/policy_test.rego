@@ -1,7 +1,10 @@
 package federated.enrollment_test
 
 import data.federated.enrollment
+import data.federated.model_validation
+import data.federated.privacy
 import future.keywords.if
+import future.keywords.in
 
 test_valid_enrollment if {
     result := enrollment.allow with input as {
@@ -22,7 +25,7 @@ test_valid_enrollment if {
             "end_time": 9999999999999999999
         },
         "blacklist": {
-            "client_ids": []
+            "clients": {}
         }
     }
 
@@ -48,9 +51,81 @@ test_blacklisted_client if {
             "end_time": 9999999999999999999
         },
         "blacklist": {
-            "client_ids": ["bad_client"]
+            "clients": {"bad_client": true}
         }
     }
 
     result == false
-}
\ No newline at end of file
+}
+
+test_batch_enrollment_maps_to_clients if {
+    decisions := enrollment.batch_decisions with input as {
+        "clients": [
+            {"id": "good_client", "certificate_valid": true, "identity": "good@example.com",
+             "dataset_size": 500, "cpu_cores": 4, "memory_gb": 8},
+            {"id": "bad_client", "certificate_valid": true, "identity": "bad@example.com",
+             "dataset_size": 500, "cpu_cores": 4, "memory_gb": 8}
+        ]
+    } with data as {
+        "enrollment": {
+            "min_dataset_size": 100,
+            "min_cpu_cores": 2,
+            "min_memory_gb": 4,
+            "start_time": 0,
+            "end_time": 9999999999999999999
+        },
+        "blacklist": {
+            "clients": {"bad_client": true}
+        }
+    }
+
+    decisions[0].client_id == "good_client"
+    decisions[0].allowed == true
+    decisions[1].client_id == "bad_client"
+    decisions[1].allowed == false
+    "blacklisted" in decisions[1].reasons
+}
+
+test_batch_model_validation if {
+    reports := model_validation.batch_reports with input as {
+        "round_number": 5,
+        "updates": [
+            {"client": {"id": "client_1"}, "model": {"size_bytes": 4194304, "parameter_count": 1000000,
+             "gradient_norm": 1.5, "contains_nan": false, "max_parameter_value": 3.2}},
+            {"client": {"id": "client_9"}, "model": {"size_bytes": 4194304, "parameter_count": 1000000,
+             "gradient_norm": 1.5, "contains_nan": true, "max_parameter_value": 3.2}}
+        ]
+    } with data as {
+        "limits": {"max_model_size_mb": 50, "min_model_size_mb": 1},
+        "model_config": {"expected_parameters": 1000000},
+        "security": {"max_gradient_norm": 10.0, "parameter_threshold": 1000.0},
+        "current_round": {"round_number": 5, "selected": {"client_1": true, "client_2": true}}
+    }
+
+    reports[0].valid == true
+    reports[1].client_id == "client_9"
+    reports[1].valid == false
+    reports[1].checks.no_suspicious == false
+    reports[1].checks.authorized == false
+}
+
+test_privacy_budget_uses_ledger_totals if {
+    ledger := {
+        "privacy_config": {
+            "total_epsilon_budget": 10.0,
+            "total_delta_budget": 0.00001,
+            "max_contributions_per_client": 2
+        },
+        "privacy_state": {"projects": {"p1": {
+            "epsilon_spent": 9.0, "delta_spent": 0, "epsilon_reserved": 0.5, "delta_reserved": 0,
+            "rounds": 3, "contribution_counts": {"client_1": 1, "client_2": 2}
+        }}}
+    }
+
+    privacy.allow with input as {"project_id": "p1", "client": {"id": "client_1"},
+                                  "operation": {"epsilon_cost": 0.5, "delta_cost": 0}} with data as ledger
+    not privacy.allow with input as {"project_id": "p1", "client": {"id": "client_1"},
+                                      "operation": {"epsilon_cost": 0.6, "delta_cost": 0}} with data as ledger
+    not privacy.allow with input as {"project_id": "p1", "client": {"id": "client_2"},
+                                      "operation": {"epsilon_cost": 0.1, "delta_cost": 0}} with data as ledger
+}
@@ -0,0 +1,115 @@
+"""Profile the cold-start cost of importing the Flask app.
+
+Runs `python -X importtime -c "import app"` in fresh interpreters, reports the
+slowest modules (self and cumulative import time) and the wall-clock cold start,
+and optionally fails when startup regresses:
+
+    python extra/profile_startup.py                 # top 25 modules
+    python extra/profile_startup.py --max-ms 1500   # exit 1 if cold start is slower
+    python extra/profile_startup.py --json
+
+Importing the app must not pull in the LLM/vector-store SDKs; they are created on
+first use (see api/*_client.py). Any of LAZY_MODULES showing up at import time is
+reported as a regression as well.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+LAZY_MODULES = ('openai', 'anthropic', 'qdrant_client', 'tiktoken', 'sentence_transformers', 'llama_index',
+                'numpy')
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_profile(target: str = 'app'):
+    """Return [(module, self_us, cumulative_us, depth)] for one cold import of target."""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {target}'],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {target} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), (len(m.group(3)) - 1) // 2))
+    return rows
+
+
+def cold_start_ms(target: str = 'app', runs: int = 5) -> float:
+    """Best-of-N wall-clock time of a fresh interpreter importing target."""
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', f'import {target}'], cwd=REPO_ROOT, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    baseline = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], check=True)
+        elapsed = (time.perf_counter() - start) * 1000
+        baseline = elapsed if baseline is None else min(baseline, elapsed)
+    return max(best - baseline, 0.0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', default='app', help='module to import (default: app)')
+    parser.add_argument('--top', type=int, default=25, help='number of modules to list')
+    parser.add_argument('--runs', type=int, default=5, help='cold starts to time (best of N)')
+    parser.add_argument('--max-ms', type=float, default=None, help='fail if cold start exceeds this (ms)')
+    parser.add_argument('--json', action='store_true', help='print a JSON report')
+    args = parser.parse_args(argv)
+
+    rows = import_profile(args.target)
+    top_level = {}
+    for name, self_us, cum_us, depth in rows:
+        root = name.split('.')[0]
+        top_level[root] = top_level.get(root, 0) + self_us
+    eager_lazy = sorted({name.split('.')[0] for name, *_ in rows if name.split('.')[0] in LAZY_MODULES})
+    startup_ms = cold_start_ms(args.target, args.runs)
+
+    report = {
+        'target': args.target,
+        'cold_start_ms': round(startup_ms, 1),
+        'total_import_ms': round(sum(r[1] for r in rows) / 1000, 1),
+        'slowest_modules': [
+            {'module': n, 'self_ms': round(s / 1000, 2), 'cumulative_ms': round(c / 1000, 2)}
+            for n, s, c, _ in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]
+        ],
+        'by_package_ms': {k: round(v / 1000, 2) for k, v in sorted(top_level.items(), key=lambda kv: kv[1], reverse=True)[:args.top]},
+        'eagerly_imported_optional_sdks': eager_lazy,
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"Cold start of `import {args.target}`: {report['cold_start_ms']} ms "
+              f"(imports: {report['total_import_ms']} ms)\n")
+        print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        for r in report['slowest_modules']:
+            print(f"{r['cumulative_ms']:>14.2f} {r['self_ms']:>9.2f}  {r['module']}")
+        print("\nBy top-level package (self time):")
+        for k, v in report['by_package_ms'].items():
+            print(f"{v:>14.2f}  {k}")
+
+    failed = False
+    if eager_lazy:
+        print(f"\nREGRESSION: optional SDKs imported at startup: {', '.join(eager_lazy)}", file=sys.stderr)
+        failed = True
+    if args.max_ms is not None and startup_ms > args.max_ms:
+        print(f"\nREGRESSION: cold start {startup_ms:.1f} ms exceeds {args.max_ms:.1f} ms", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
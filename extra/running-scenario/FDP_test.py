@@ -1,6 +1,9 @@
-import pandas as pd
+import argparse
 import json
-from pathlib import Path
+import os
+
+from fdp_pipeline import DEFAULT_CHUNK_SIZE, MANIFEST_NAME, run_clients
+from fdp_readers import declared_formats
 
 # ---------------- CONFIG ----------------
 CLIENT_FILES = {
@@ -8,73 +11,55 @@ CLIENT_FILES = {
     "client_2": "../data/client2.csv"
 }
 SCHEMA_FILE = "schema.json"  # expected schema: column names & types
-OUTPUT_DIR = Path("results")
-OUTPUT_DIR.mkdir(exist_ok=True)
-
-# ---------------- HELPERS ----------------
-def read_data(file_path):
-    """Read CSV file"""
-    df = pd.read_csv(file_path)
-    return df
-
-def match_to_schema(df, schema):
-    """Validate DataFrame against expected schema"""
-    expected_cols = schema["columns"]
-    missing_cols = [c for c in expected_cols if c not in df.columns]
-    if missing_cols:
-        raise ValueError(f"Missing columns: {missing_cols}")
-    # Optionally, enforce types
-    for col, col_type in schema["columns"].items():
-        df[col] = df[col].astype(col_type)
-    return df
-
-def filter_data(df, filters=None):
-    """Apply optional filters (example: drop rows with NaNs)"""
-    if filters is None:
-        filters = {}
-    filtered = df.dropna()
-    return filtered
-
-def perform_stat_test(df):
-    """Simple test: count number of rows"""
-    row_count = len(df)
-    return {"row_count": row_count}
+OUTPUT_DIR = "results"
 
-# ---------------- MAIN PIPELINE ----------------
-def run_pipeline(client_name, data_file, schema_file):
-    print(f"Processing {client_name}...")
 
-    # Step 1: readData
-    raw_data = read_data(data_file)
+def parse_clients(pairs):
+    """NAME=PATH pairs -> {name: path}"""
+    clients = {}
+    for pair in pairs:
+        name, sep, path = pair.partition("=")
+        if not sep or not name or not path:
+            raise argparse.ArgumentTypeError(f"expected NAME=PATH, got {pair!r}")
+        clients[name] = path
+    return clients
 
-    # Step 2: matchToSchema
-    with open(schema_file, "r") as f:
-        schema = json.load(f)
-    matched_data = match_to_schema(raw_data, schema)
-
-    # Step 3: filterData
-    filtered_data = filter_data(matched_data)
-
-    # Step 4: performTest
-    test_result = perform_stat_test(filtered_data)
-
-    # Save result
-    output_file = OUTPUT_DIR / f"{client_name}_test_result.json"
-    with open(output_file, "w") as f:
-        json.dump(test_result, f, indent=2)
-
-    print(f"{client_name} done. Result: {test_result}")
-    return test_result
 
 # ---------------- RUN TEST ----------------
 if __name__ == "__main__":
-    results = {}
-    for client_name, data_file in CLIENT_FILES.items():
-        try:
-            result = run_pipeline(client_name, data_file, SCHEMA_FILE)
-            results[client_name] = result
-        except Exception as e:
-            print(f"Pipeline failed for {client_name}: {e}")
+    parser = argparse.ArgumentParser(description="Run the FDP pipeline for every client in parallel.")
+    parser.add_argument("--client", action="append", default=[], metavar="NAME=PATH",
+                        help="client data file (repeatable); defaults to CLIENT_FILES")
+    parser.add_argument("--schema", default=SCHEMA_FILE)
+    parser.add_argument("--output", default=OUTPUT_DIR)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("FDP_WORKERS", "0")) or None,
+                        help="parallel site processes (default: CPU count)")
+    parser.add_argument("--timeout", type=float, default=None, help="per-site timeout in seconds")
+    parser.add_argument("--stream", action="store_true", help="read each CSV in chunks (bounded memory)")
+    parser.add_argument("--format", default=None,
+                        help='declared data format, e.g. "Parquet" or "CSV/TSV" (default: from the file extension)')
+    parser.add_argument("--answers", default=None,
+                        help="data-format answers JSON; its declared storage.files formats select the reader")
+    parser.add_argument("--cache-dir", default=os.getenv("FDP_CACHE_DIR"),
+                        help="convert CSV input to Parquet here once and reuse it until the CSV changes")
+    parser.add_argument("--chunk-size", type=int, default=int(os.getenv("FDP_CHUNK_SIZE", DEFAULT_CHUNK_SIZE)),
+                        help=f"rows per chunk with --stream (default: {DEFAULT_CHUNK_SIZE})")
+    args = parser.parse_args()
+
+    clients = parse_clients(args.client) if args.client else CLIENT_FILES
+    data_format = declared_formats(args.answers) if args.answers else args.format
+    manifest = run_clients(clients, args.schema, args.output, workers=args.workers, timeout=args.timeout,
+                           chunk_size=args.chunk_size if args.stream else None, data_format=data_format,
+                           cache_dir=args.cache_dir)
 
+    print("\nRows with missing values in the schema's columns are dropped; other columns are "
+          "not read, so their missing values no longer drop rows (counts may exceed earlier runs).")
     print("\nSummary of all clients:")
-    print(json.dumps(results, indent=2))
+    print(json.dumps({name: entry.get("result") for name, entry in manifest["clients"].items()
+                      if entry["status"] == "ok"}, indent=2))
+    if manifest["combined"].get("statistics"):
+        print("\nCombined statistics:")
+        print(json.dumps(manifest["combined"]["statistics"], indent=2))
+    print(f"{len(manifest['succeeded'])} succeeded, {len(manifest['failed'])} failed in "
+          f"{manifest['wall_seconds']:.2f}s (sum of sites {manifest['sum_site_seconds']:.2f}s). "
+          f"Manifest: {os.path.join(args.output, MANIFEST_NAME)}")
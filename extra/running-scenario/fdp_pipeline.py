@@ -0,0 +1,344 @@
+"""Reusable FDP pipeline runner.
+
+Runs the per-site pipeline (readData -> filterData -> matchToSchema -> performTest) for
+many simulated sites in parallel, one OS process per site, so a federated scenario takes
+about as long as its slowest site rather than the sum of all sites. Each site's steps are
+timed; a failing step, an exception or even a crashed/hung worker process only fails that
+site. A combined manifest (results/manifest.json) records every site's status, step
+timings, result and error.
+
+Every mode reads only the schema's columns, so only missing values in those columns drop
+rows (before the streaming mode existed, the whole file was read and a missing value in
+any column dropped the row; row counts for files with sparse extra columns are higher now).
+
+With a chunk_size the site runs in streaming mode: the CSV is parsed in chunks, with only
+the schema's columns (usecols) and their dtypes applied at parse time, each chunk is
+filtered and tested, and the per-chunk results are merged. Peak memory is then bounded by
+the chunk size rather than the dataset size.
+
+The reader follows the declared data format (see fdp_readers): Parquet, Arrow/Feather and
+ORC files are read with column projection and predicate pushdown, and with a cache_dir
+CSV files are converted to Parquet once and read from the cached copy afterwards.
+
+Besides the row count, perform_stat_test computes the mergeable statistics declared in the
+schema's "statistics" section (see fdp_stats). Sites report only their serialised
+statistics; run_clients merges them into the manifest's "combined" section.
+
+    from fdp_pipeline import run_clients
+    manifest = run_clients({"client_1": "../data/client1.csv"}, "schema.json", workers=8)
+    manifest = run_clients({"client_1": "../data/client1.csv"}, "schema.json", chunk_size=100_000)
+"""
+import contextlib
+import json
+import multiprocessing as mp
+import os
+import time
+import traceback
+from datetime import datetime, timezone
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from fdp_readers import apply_filters, cached_parquet, header_columns, iter_frames, read_frame, resolve_format, \
+    schema_filters
+from fdp_stats import compute_statistics, merge_statistics, summarize_statistics
+
+MANIFEST_NAME = "manifest.json"
+DEFAULT_CHUNK_SIZE = 100_000  # rows per chunk in streaming mode
+
+
+# ---------------- STEPS ----------------
+def read_data(file_path, fmt="csv", schema=None):
+    """Read data file (CSV, or the declared format), projected to the schema's columns;
+    columnar files also get its filters pushed down"""
+    df = read_frame(file_path, fmt, schema)
+    if schema is not None:
+        missing_cols = [c for c in schema["columns"] if c not in df.columns]
+        if missing_cols:
+            raise ValueError(f"Missing columns: {missing_cols}")
+    return df
+
+
+def match_to_schema(df, schema):
+    """Validate DataFrame against expected schema"""
+    expected_cols = schema["columns"]
+    missing_cols = [c for c in expected_cols if c not in df.columns]
+    if missing_cols:
+        raise ValueError(f"Missing columns: {missing_cols}")
+    # Optionally, enforce types
+    for col, col_type in schema["columns"].items():
+        df[col] = df[col].astype(col_type)
+    return df
+
+
+def schema_read_options(schema):
+    """read_csv options applying the schema while parsing: usecols, dtype, parse_dates.
+    Integer and bool columns are left to the parser's inference (a missing value cannot be
+    held by a plain int column, and nullable types parse ~3x slower); match_to_schema casts
+    them to the declared type once rows with missing values are filtered out."""
+    dtype, parse_dates = {}, []
+    for col, col_type in schema["columns"].items():
+        if str(col_type).startswith("datetime"):
+            parse_dates.append(col)
+        elif pd.api.types.pandas_dtype(col_type).kind not in "iub":
+            dtype[col] = col_type
+    return {"usecols": list(schema["columns"]), "dtype": dtype, "parse_dates": parse_dates or None}
+
+
+def read_data_chunks(file_path, schema, chunk_size=DEFAULT_CHUNK_SIZE, fmt="csv"):
+    """Read data file in chunks of chunk_size rows, typed by the schema at parse time"""
+    header = header_columns(file_path, fmt)
+    missing_cols = [c for c in schema["columns"] if c not in header]
+    if missing_cols:
+        raise ValueError(f"Missing columns: {missing_cols}")
+    return iter_frames(file_path, fmt, schema, chunk_size, csv_options=schema_read_options(schema))
+
+
+def filter_data(df, filters=None):
+    """Apply optional filters: drop rows with NaNs, then keep rows matching all
+    [column, op, value] filters"""
+    if filters is None:
+        filters = []
+    filtered = apply_filters(df.dropna(), filters)
+    return filtered
+
+
+def perform_stat_test(df, statistics=None):
+    """Count number of rows and compute the declared mergeable statistics"""
+    row_count = len(df)
+    if not statistics:
+        return {"row_count": row_count}
+    return {"row_count": row_count, "statistics": compute_statistics(df, statistics)}
+
+
+def merge_stat_results(a, b):
+    """Combine perform_stat_test results of two disjoint parts of a dataset (two chunks,
+    or two sites)"""
+    merged = {"row_count": a["row_count"] + b["row_count"]}
+    if "statistics" in a or "statistics" in b:
+        merged["statistics"] = merge_statistics(a.get("statistics") or {}, b.get("statistics") or {})
+    return merged
+
+
+def combine_results(results, statistics=None):
+    """Central combination of the sites' results: totals and final statistic values"""
+    combined = None
+    for result in results:
+        combined = result if combined is None else merge_stat_results(combined, result)
+    combined = dict(combined or {"row_count": 0})
+    if "statistics" in combined:
+        combined["statistics"] = summarize_statistics(combined["statistics"], statistics)
+    return combined
+
+
+def load_schema(schema_file):
+    with open(schema_file, "r") as f:
+        return json.load(f)
+
+
+# ---------------- ONE SITE ----------------
+class StepTimer:
+    """Records name, duration and output rows of each pipeline step. A step run once per
+    chunk accumulates its time and rows."""
+
+    def __init__(self):
+        self._steps: Dict[str, Dict[str, Any]] = {}
+        self.current: Optional[str] = None
+
+    @property
+    def steps(self) -> List[Dict[str, Any]]:
+        return [{**s, "seconds": round(s["seconds"], 6)} for s in self._steps.values()]
+
+    def run(self, name: str, fn: Callable, *args, **kwargs):
+        self.current = name
+        t0 = time.perf_counter()
+        out = fn(*args, **kwargs)
+        step = self._steps.setdefault(name, {"name": name, "seconds": 0.0})
+        step["seconds"] += time.perf_counter() - t0
+        if isinstance(out, pd.DataFrame):
+            step["rows"] = step.get("rows", 0) + int(len(out))
+        self.current = None
+        return out
+
+
+def _run_in_memory(timer, data_file, schema, fmt):
+    # Same column projection and step order as streaming, so both modes give the same result:
+    # columns outside the schema never drop rows, and integer columns are cast only after
+    # rows with missing values are filtered out
+    # Step 1: readData
+    raw_data = timer.run("read_data", read_data, data_file, fmt, schema)
+    # Step 2: filterData
+    filtered_data = timer.run("filter_data", filter_data, raw_data, schema_filters(schema))
+    # Step 3: matchToSchema
+    matched_data = timer.run("match_to_schema", match_to_schema, filtered_data, schema)
+    # Step 4: performTest
+    return timer.run("perform_stat_test", perform_stat_test, matched_data, schema.get("statistics"))
+
+
+def _run_streaming(timer, data_file, schema, fmt, chunk_size, entry):
+    # Columns and dtypes are applied while parsing; rows are filtered before the remaining
+    # casts to the declared types
+    reader = timer.run("read_data", read_data_chunks, data_file, schema, chunk_size, fmt)
+    filters = schema_filters(schema)
+    test_result = None
+    chunks = 0
+    with contextlib.closing(reader):
+        while True:
+            chunk = timer.run("read_data", next, reader, None)
+            if chunk is None:
+                break
+            chunks += 1
+            filtered = timer.run("filter_data", filter_data, chunk, filters)
+            matched = timer.run("match_to_schema", match_to_schema, filtered, schema)
+            chunk_result = timer.run("perform_stat_test", perform_stat_test, matched, schema.get("statistics"))
+            test_result = chunk_result if test_result is None else merge_stat_results(test_result, chunk_result)
+    entry["chunks"] = chunks
+    if test_result is None:  # header only
+        test_result = perform_stat_test(pd.DataFrame(columns=list(schema["columns"])), schema.get("statistics"))
+    return test_result
+
+
+def run_pipeline(client_name, data_file, schema_file, output_dir="results", chunk_size=None,
+                 data_format=None, cache_dir=None):
+    """Run all steps for one site and write <client>_test_result.json; streams the data in
+    chunks of chunk_size rows when given. data_format is the declared format (questionnaire
+    label or reader name, or a list of them); with a cache_dir CSV input is read from a
+    cached Parquet copy. Returns a manifest entry: status, steps (with timings), result or
+    error."""
+    timer = StepTimer()
+    t0 = time.perf_counter()
+    entry: Dict[str, Any] = {"client": client_name, "data_file": str(data_file), "pid": os.getpid(),
+                             "mode": "stream" if chunk_size else "memory"}
+    try:
+        schema = load_schema(schema_file)
+        declared = [data_format] if isinstance(data_format, str) else data_format
+        fmt = resolve_format(data_file, declared)
+        entry["format"] = fmt
+        if fmt == "csv" and cache_dir:
+            cached = timer.run("cache_parquet", cached_parquet, data_file, schema, cache_dir)
+            entry["cache"] = {"path": cached["path"], "hit": cached["hit"]}
+            data_file, fmt = cached["path"], "parquet"
+        if chunk_size:
+            test_result = _run_streaming(timer, data_file, schema, fmt, chunk_size, entry)
+        else:
+            test_result = _run_in_memory(timer, data_file, schema, fmt)
+
+        output_file = Path(output_dir) / f"{client_name}_test_result.json"
+        with open(output_file, "w") as f:
+            json.dump(test_result, f, indent=2)
+        entry.update(status="ok", result=test_result, output_file=str(output_file))
+    except Exception as e:
+        entry.update(status="failed", failed_step=timer.current, error=f"{type(e).__name__}: {e}",
+                     traceback=traceback.format_exc())
+    entry["steps"] = timer.steps
+    entry["seconds"] = round(time.perf_counter() - t0, 6)
+    return entry
+
+
+def _site_worker(conn, client_name, data_file, schema_file, output_dir, options):
+    try:
+        conn.send(run_pipeline(client_name, data_file, schema_file, output_dir, **options))
+    finally:
+        conn.close()
+
+
+# ---------------- MANY SITES ----------------
+def _combined(schema_file, results, log):
+    try:
+        statistics = load_schema(schema_file).get("statistics")
+        return {"sites": len(results), **combine_results(results, statistics)}
+    except Exception as e:
+        log(f"Warning: could not combine site results: {e}")
+        return {"sites": len(results), "error": f"{type(e).__name__}: {e}"}
+
+
+def run_clients(client_files: Dict[str, Any], schema_file, output_dir="results", workers: Optional[int] = None,
+                timeout: Optional[float] = None, chunk_size: Optional[int] = None, data_format=None,
+                cache_dir=None, log: Callable[[str], None] = print) -> Dict[str, Any]:
+    """Run the pipeline for every site, at most `workers` processes at a time, streaming
+    each site's data in chunks of `chunk_size` rows when given.
+
+    A client's value is its data file path, or {"path": ..., "format": ...} to declare that
+    site's format; `data_format` is the default declaration and `cache_dir` enables the
+    CSV -> Parquet cache.
+
+    Sites that fail, crash their process or exceed `timeout` seconds are recorded as failed
+    and do not affect the others. Writes and returns the combined manifest.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    workers = max(1, workers or os.cpu_count() or 1)
+    pending = list(client_files.items())
+    running: Dict[Any, Dict[str, Any]] = {}  # pipe connection -> {client, process, started}
+    entries: Dict[str, Dict[str, Any]] = {}
+    started_at = datetime.now(timezone.utc)
+    t0 = time.perf_counter()
+
+    def finish(conn, entry):
+        info = running.pop(conn)
+        info["process"].join(timeout=5)
+        conn.close()
+        entries[info["client"]] = entry
+        if entry["status"] == "ok":
+            # The full result (statistics, sketches) stays in the manifest
+            log(f"{info['client']} done in {entry['seconds']:.2f}s: {entry['status']}, "
+                f"{(entry.get('result') or {}).get('row_count')} rows")
+        else:
+            log(f"Pipeline failed for {info['client']}: {entry.get('error')}")
+
+    while pending or running:
+        while pending and len(running) < workers:
+            client_name, spec = pending.pop(0)
+            data_file = spec["path"] if isinstance(spec, dict) else spec
+            options = {"chunk_size": chunk_size, "cache_dir": cache_dir,
+                       "data_format": spec.get("format", data_format) if isinstance(spec, dict) else data_format}
+            log(f"Processing {client_name}...")
+            parent_conn, child_conn = mp.Pipe(duplex=False)
+            proc = mp.Process(target=_site_worker, name=f"fdp-{client_name}",
+                              args=(child_conn, client_name, data_file, schema_file, str(output_dir), options))
+            proc.start()
+            child_conn.close()
+            running[parent_conn] = {"client": client_name, "data_file": str(data_file),
+                                    "process": proc, "started": time.perf_counter()}
+
+        for conn in wait(list(running), timeout=1.0):
+            info = running[conn]
+            try:
+                entry = conn.recv()
+            except EOFError:
+                # The worker died without reporting (segfault, OOM kill, os._exit, ...)
+                info["process"].join(timeout=5)
+                entry = {"client": info["client"], "data_file": info["data_file"], "status": "failed",
+                         "error": f"worker process exited with code {info['process'].exitcode}", "steps": [],
+                         "seconds": round(time.perf_counter() - info["started"], 6)}
+            finish(conn, entry)
+
+        if timeout is not None:
+            now = time.perf_counter()
+            for conn, info in list(running.items()):
+                if now - info["started"] > timeout:
+                    info["process"].kill()
+                    finish(conn, {"client": info["client"], "data_file": info["data_file"], "status": "failed",
+                                  "error": f"timed out after {timeout}s", "steps": [],
+                                  "seconds": round(now - info["started"], 6)})
+
+    wall = time.perf_counter() - t0
+    manifest = {
+        "started_at": started_at.isoformat(),
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+        "schema_file": str(schema_file),
+        "workers": workers,
+        "chunk_size": chunk_size,
+        "cache_dir": str(cache_dir) if cache_dir else None,
+        "wall_seconds": round(wall, 6),
+        "sum_site_seconds": round(sum(e.get("seconds", 0) for e in entries.values()), 6),
+        "succeeded": sorted(c for c, e in entries.items() if e["status"] == "ok"),
+        "failed": sorted(c for c, e in entries.items() if e["status"] != "ok"),
+        "combined": _combined(schema_file, [e["result"] for e in entries.values() if e["status"] == "ok"], log),
+        "clients": {name: entries[name] for name in client_files if name in entries},
+    }
+    with open(output_dir / MANIFEST_NAME, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
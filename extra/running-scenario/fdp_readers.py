@@ -0,0 +1,288 @@
+"""Format-aware readers for the FDP pipeline.
+
+The reader is chosen from the file format the provider declared in the data-format
+questionnaire (provided.storage.files, e.g. "Parquet", "CSV/TSV") and the file extension.
+Columnar files (Parquet, Arrow/Feather, ORC) are read through pyarrow.dataset with column
+projection (only the schema's columns) and predicate pushdown (the not-null check of
+filter_data and any schema "filters"), so row groups that cannot match are skipped.
+
+CSV files can optionally be converted to Parquet on first read (cached_parquet) and the
+Parquet copy is reused until the source file's mtime or size, or the schema, changes.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only CSV/JSON/Excel can be read without it
+    pa = None
+
+# Questionnaire labels (storage.files) -> reader
+DECLARED_FORMATS = {
+    "CSV/TSV": "csv",
+    "Parquet": "parquet",
+    "Arrow/Feather": "feather",
+    "ORC": "orc",
+    "NDJSON/JSONL": "ndjson",
+    "JSON": "json",
+    "Excel (XLSX)": "excel",
+}
+EXTENSIONS = {
+    ".csv": "csv", ".tsv": "csv", ".txt": "csv",
+    ".parquet": "parquet", ".pq": "parquet",
+    ".feather": "feather", ".arrow": "feather", ".ipc": "feather",
+    ".orc": "orc",
+    ".ndjson": "ndjson", ".jsonl": "ndjson",
+    ".json": "json",
+    ".xlsx": "excel",
+}
+COLUMNAR = ("parquet", "feather", "orc")
+CACHE_KEY = b"fdp_source"
+
+# filter operators allowed in schema["filters"]: [[column, op, value], ...]
+_OPS = {
+    "==": lambda a, v: a == v,
+    "!=": lambda a, v: a != v,
+    "<": lambda a, v: a < v,
+    "<=": lambda a, v: a <= v,
+    ">": lambda a, v: a > v,
+    ">=": lambda a, v: a >= v,
+}
+
+
+def _require_pyarrow(what):
+    if pa is None:
+        raise RuntimeError(f"pyarrow is required to {what}")
+
+
+def normalize_format(fmt: str) -> str:
+    """Questionnaire label, reader name or extension -> reader name"""
+    if fmt in DECLARED_FORMATS:
+        return DECLARED_FORMATS[fmt]
+    key = str(fmt).strip().lower()
+    if key in DECLARED_FORMATS.values():
+        return key
+    if ("." + key.lstrip(".")) in EXTENSIONS:
+        return EXTENSIONS["." + key.lstrip(".")]
+    raise ValueError(f"Unsupported data format: {fmt}")
+
+
+def declared_formats(answers_file) -> List[str]:
+    """File formats a provider declared in a data-format answers record"""
+    with open(answers_file, "r") as f:
+        rec = json.load(f)
+    files = ((rec.get("data_format") or {}).get("storage") or {}).get("files")
+    if files is None:
+        files = (rec.get("answers") or {}).get("storage.files")
+    if isinstance(files, str):
+        files = [files]
+    return list(files or [])
+
+
+def resolve_format(data_file, declared: Optional[Iterable[str]] = None) -> str:
+    """Reader for a file: its extension when that format is declared (or nothing is
+    declared), otherwise the first readable declared format."""
+    by_ext = EXTENSIONS.get(Path(data_file).suffix.lower())
+    readable = []
+    for fmt in declared or ():
+        try:
+            readable.append(normalize_format(fmt))
+        except ValueError:
+            continue
+    if by_ext and (not readable or by_ext in readable):
+        return by_ext
+    if readable:
+        return readable[0]
+    return by_ext or "csv"
+
+
+# ---------------- FILTERS ----------------
+def schema_filters(schema) -> List[List[Any]]:
+    filters = schema.get("filters") or []
+    for flt in filters:
+        if len(flt) != 3 or (flt[1] not in _OPS and flt[1] not in ("in", "not in")):
+            raise ValueError(f"Invalid filter {flt!r}: expected [column, op, value]")
+    return filters
+
+
+def apply_filters(df, filters):
+    """Keep rows matching all [column, op, value] filters"""
+    if not filters:
+        return df
+    mask = pd.Series(True, index=df.index)
+    for col, op, value in filters:
+        if op == "in":
+            mask &= df[col].isin(value)
+        elif op == "not in":
+            mask &= ~df[col].isin(value)
+        else:
+            mask &= _OPS[op](df[col], value)
+    return df[mask.fillna(False)]
+
+
+def pushdown_expression(schema):
+    """pyarrow expression for the not-null check on the schema's columns and its filters"""
+    expr = None
+    for col in schema["columns"]:
+        e = pc.field(col).is_valid()
+        expr = e if expr is None else expr & e
+    for col, op, value in schema_filters(schema):
+        field = pc.field(col)
+        if op == "in":
+            e = field.isin(value)
+        elif op == "not in":
+            e = ~field.isin(value)
+        else:
+            e = _OPS[op](field, value)
+        expr = e if expr is None else expr & e
+    return expr
+
+
+# ---------------- READERS ----------------
+def _csv_options(data_file):
+    return {"sep": "\t"} if Path(data_file).suffix.lower() == ".tsv" else {}
+
+
+def _dataset(data_file, fmt):
+    _require_pyarrow(f"read {fmt} files")
+    return ds.dataset(str(data_file), format="ipc" if fmt == "feather" else fmt)
+
+
+def read_columnar(data_file, fmt, schema) -> pd.DataFrame:
+    dataset = _dataset(data_file, fmt)
+    return dataset.to_table(columns=list(schema["columns"]), filter=pushdown_expression(schema)).to_pandas()
+
+
+def iter_columnar(data_file, fmt, schema, chunk_size) -> Iterator[pd.DataFrame]:
+    dataset = _dataset(data_file, fmt)
+    # Bounded readahead: the default prefetches 16 batches, which defeats the chunk size
+    for batch in dataset.to_batches(columns=list(schema["columns"]), filter=pushdown_expression(schema),
+                                    batch_size=chunk_size, batch_readahead=1, fragment_readahead=1):
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def read_frame(data_file, fmt, schema=None) -> pd.DataFrame:
+    """Whole file as a DataFrame. With a schema only its columns are kept (those present;
+    missing ones are left for the schema check to report), as in the streaming readers,
+    and columnar formats also get the schema's filters pushed down."""
+    if fmt in COLUMNAR:
+        if schema is not None:
+            return read_columnar(data_file, fmt, schema)
+        return _dataset(data_file, fmt).to_table().to_pandas()
+    columns = list(schema["columns"]) if schema is not None else None
+    if fmt == "csv":
+        usecols = (lambda c: c in columns) if columns is not None else None
+        return pd.read_csv(data_file, usecols=usecols, **_csv_options(data_file))
+    if fmt == "ndjson":
+        df = pd.read_json(data_file, lines=True)
+    elif fmt == "json":
+        df = pd.read_json(data_file)
+    elif fmt == "excel":
+        df = pd.read_excel(data_file)
+    else:
+        raise ValueError(f"Unsupported data format: {fmt}")
+    return df if columns is None else df[[c for c in columns if c in df.columns]]
+
+
+def header_columns(data_file, fmt) -> List[str]:
+    if fmt in COLUMNAR:
+        return list(_dataset(data_file, fmt).schema.names)
+    if fmt == "csv":
+        return list(pd.read_csv(data_file, nrows=0, **_csv_options(data_file)).columns)
+    if fmt == "ndjson":
+        with pd.read_json(data_file, lines=True, chunksize=1) as r:
+            return list(next(iter(r), pd.DataFrame()).columns)
+    return list(read_frame(data_file, fmt).columns)
+
+
+def iter_frames(data_file, fmt, schema, chunk_size, csv_options=None) -> Iterator[pd.DataFrame]:
+    """Chunks of at most chunk_size rows. JSON and Excel cannot be parsed incrementally and
+    are read whole, then sliced."""
+    if fmt in COLUMNAR:
+        yield from iter_columnar(data_file, fmt, schema, chunk_size)
+    elif fmt == "csv":
+        with pd.read_csv(data_file, chunksize=chunk_size, **_csv_options(data_file), **(csv_options or {})) as r:
+            yield from r
+    elif fmt == "ndjson":
+        with pd.read_json(data_file, lines=True, chunksize=chunk_size) as r:
+            for chunk in r:
+                yield chunk[list(schema["columns"])]
+    else:
+        df = read_frame(data_file, fmt)[list(schema["columns"])]
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+
+
+# ---------------- CSV -> PARQUET CACHE ----------------
+def _arrow_type(col_type):
+    """Arrow type for a declared pandas dtype, or None to let the CSV reader infer it"""
+    name = str(col_type)
+    if name in ("str", "string", "object"):
+        return pa.string()
+    if name.startswith("datetime"):
+        return pa.timestamp("ns")
+    try:
+        dtype = pd.api.types.pandas_dtype(col_type)
+    except TypeError:
+        return None
+    if dtype.kind in "iu":
+        # A CSV written from a frame with missing values holds ints as "63.0"; match_to_schema
+        # casts back to the declared int type after filtering
+        return pa.float64()
+    try:
+        return pa.from_numpy_dtype(dtype)
+    except (TypeError, pa.ArrowNotImplementedError):
+        return None
+
+
+def _source_key(data_file, schema) -> str:
+    st = os.stat(data_file)
+    return json.dumps({"path": os.path.abspath(data_file), "mtime_ns": st.st_mtime_ns, "size": st.st_size,
+                       "columns": schema["columns"]}, sort_keys=True)
+
+
+def cached_parquet(data_file, schema, cache_dir) -> Dict[str, Any]:
+    """Parquet copy of a CSV (schema columns only), converted on first use and reused
+    until the CSV's mtime/size or the schema's columns change. The conversion streams
+    record batches, so it needs no more memory than a chunked read.
+    Returns {"path", "hit"}."""
+    _require_pyarrow("cache CSV files as Parquet")
+    key = _source_key(data_file, schema)
+    name = Path(data_file).stem + "-" + hashlib.sha1(os.path.abspath(data_file).encode()).hexdigest()[:12]
+    path = Path(cache_dir) / f"{name}.parquet"
+    if path.exists():
+        try:
+            meta = pq.read_schema(path).metadata or {}
+            if meta.get(CACHE_KEY) == key.encode():
+                return {"path": str(path), "hit": True}
+        except (OSError, pa.ArrowInvalid):
+            pass  # unreadable or partial cache file: rebuild it
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    column_types = {c: t for c, t in ((c, _arrow_type(t)) for c, t in schema["columns"].items()) if t is not None}
+    reader = pa_csv.open_csv(
+        data_file,
+        parse_options=pa_csv.ParseOptions(delimiter="\t" if Path(data_file).suffix.lower() == ".tsv" else ","),
+        convert_options=pa_csv.ConvertOptions(include_columns=list(schema["columns"]), column_types=column_types),
+    )
+    arrow_schema = reader.schema.with_metadata({CACHE_KEY: key.encode()})
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with pq.ParquetWriter(tmp, arrow_schema) as writer:
+            for batch in reader:
+                writer.write_batch(batch)
+        os.replace(tmp, path)  # concurrent runs never see a partial file
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return {"path": str(path), "hit": False}
@@ -0,0 +1,308 @@
+"""Mergeable summary statistics for the FDP pipeline.
+
+Each statistic is computed per site with vectorised numpy/pandas updates (one per chunk in
+streaming mode), serialised to a small JSON state, and merged centrally without any raw rows
+leaving the site:
+
+    Moments     count, mean, variance (Welford / Chan et al. parallel update), min, max
+    Histogram   counts over fixed bin edges shared by all sites, plus below/above counts
+    KLLSketch   approximate quantiles (KLL sketch; rank error ~1.7/k)
+    CountTable  counts per combination of column values (contingency table)
+
+Which statistics to compute is declared in schema.json under "statistics":
+
+    "statistics": {
+        "moments": ["age", "bmi"],
+        "histogram": {"age": {"edges": [18, 30, 45, 60, 90]}, "bmi": {"min": 10, "max": 50, "bins": 8}},
+        "quantiles": {"columns": ["bmi"], "k": 200, "probabilities": [0.25, 0.5, 0.75]},
+        "counts": [["site"], ["site", "visits"]]
+    }
+"""
+import datetime
+import math
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_K = 200
+DEFAULT_PROBABILITIES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+def _values(series) -> np.ndarray:
+    return np.asarray(series, dtype=np.float64)
+
+
+class Moments:
+    """Count, mean and sum of squared deviations (M2), merged with Chan et al.'s pairwise
+    update so the result does not depend on how the rows were split."""
+    type = "moments"
+
+    def __init__(self, count=0, mean=0.0, m2=0.0, min=None, max=None):
+        self.count, self.mean, self.m2, self.min, self.max = int(count), float(mean), float(m2), min, max
+
+    def update(self, values):
+        x = _values(values)
+        if x.size:
+            mean = float(x.mean())
+            d = x - mean
+            self.merge(Moments(x.size, mean, float(np.dot(d, d)), float(x.min()), float(x.max())))
+        return self
+
+    def merge(self, other: "Moments"):
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2, self.min, self.max = other.count, other.mean, other.m2, other.min, other.max
+            return self
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / n
+        self.m2 += other.m2 + delta * delta * self.count * other.count / n
+        self.count = n
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+        return self
+
+    def to_dict(self):
+        return {"type": self.type, "count": self.count, "mean": self.mean, "m2": self.m2,
+                "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["count"], d["mean"], d["m2"], d.get("min"), d.get("max"))
+
+    def summary(self, **_):
+        variance = self.m2 / (self.count - 1) if self.count > 1 else None
+        return {"count": self.count, "mean": self.mean if self.count else None, "variance": variance,
+                "std": math.sqrt(variance) if variance is not None else None, "min": self.min, "max": self.max}
+
+
+class Histogram:
+    """Counts over fixed bin edges (last bin closed); values outside go to below/above.
+    All sites must use the same edges to be mergeable."""
+    type = "histogram"
+
+    def __init__(self, edges, counts=None, below=0, above=0):
+        self.edges = [float(e) for e in edges]
+        if len(self.edges) < 2 or any(b <= a for a, b in zip(self.edges, self.edges[1:])):
+            raise ValueError("histogram edges must be at least two increasing values")
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64) if counts is None else np.asarray(counts, np.int64)
+        self.below, self.above = int(below), int(above)
+
+    @classmethod
+    def from_spec(cls, spec):
+        if "edges" in spec:
+            return cls(spec["edges"])
+        return cls(np.linspace(spec["min"], spec["max"], int(spec["bins"]) + 1).tolist())
+
+    def update(self, values):
+        x = _values(values)
+        edges = np.asarray(self.edges)
+        self.below += int(np.count_nonzero(x < edges[0]))
+        self.above += int(np.count_nonzero(x > edges[-1]))
+        self.counts += np.histogram(x, bins=edges)[0]
+        return self
+
+    def merge(self, other: "Histogram"):
+        if other.edges != self.edges:
+            raise ValueError("cannot merge histograms with different edges")
+        self.counts += other.counts
+        self.below += other.below
+        self.above += other.above
+        return self
+
+    def to_dict(self):
+        return {"type": self.type, "edges": self.edges, "counts": self.counts.tolist(),
+                "below": self.below, "above": self.above}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["edges"], d["counts"], d.get("below", 0), d.get("above", 0))
+
+    def summary(self, **_):
+        return {"edges": self.edges, "counts": self.counts.tolist(), "below": self.below, "above": self.above}
+
+
+class KLLSketch:
+    """KLL quantile sketch (Karnin, Lang, Liberty 2016). Level h holds items of weight 2^h;
+    a full level is sorted and every other item (random offset) is promoted. Level
+    capacities shrink geometrically (factor 2/3) from the top, so the sketch keeps O(k)
+    items for any stream length and merges by concatenating levels."""
+    type = "kll"
+
+    def __init__(self, k=DEFAULT_K, levels=None, n=0, min=None, max=None):
+        self.k = int(k)
+        self.levels: List[np.ndarray] = [np.asarray(lv, np.float64) for lv in (levels or [[]])]
+        self.n, self.min, self.max = int(n), min, max
+
+    def _capacity(self, level):
+        depth = len(self.levels) - 1 - level
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        while True:
+            full = [h for h, items in enumerate(self.levels) if items.size > self._capacity(h)]
+            if not full:
+                return
+            level = full[0]
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(self.levels[level])
+            odd = items.size % 2
+            # Deterministic for a given stream, but unbiased over compactions
+            offset = int(np.random.default_rng(self.n * 31 + level).integers(2))
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], items[odd:][offset::2]])
+            self.levels[level] = items[:odd]  # an odd item stays at this level
+
+    def update(self, values):
+        x = _values(values)
+        if x.size:
+            self.n += int(x.size)
+            lo, hi = float(x.min()), float(x.max())
+            self.min = lo if self.min is None else min(self.min, lo)
+            self.max = hi if self.max is None else max(self.max, hi)
+            self.levels[0] = np.concatenate([self.levels[0], x])
+            self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch"):
+        if other.n == 0:
+            return self
+        self.k = min(self.k, other.k)
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self._compress()
+        return self
+
+    def quantiles(self, probabilities) -> List[Optional[float]]:
+        if self.n == 0:
+            return [None for _ in probabilities]
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(lv.size, 2 ** h, dtype=np.float64) for h, lv in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cum = items[order], np.cumsum(weights[order])
+        out = []
+        for p in probabilities:
+            if p <= 0:
+                out.append(self.min)
+            elif p >= 1:
+                out.append(self.max)
+            else:
+                idx = min(int(np.searchsorted(cum, p * cum[-1])), items.size - 1)
+                out.append(float(items[idx]))
+        return out
+
+    def to_dict(self):
+        return {"type": self.type, "k": self.k, "n": self.n, "min": self.min, "max": self.max,
+                "levels": [lv.tolist() for lv in self.levels]}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["k"], d["levels"], d["n"], d.get("min"), d.get("max"))
+
+    def summary(self, probabilities=DEFAULT_PROBABILITIES, **_):
+        return {"n": self.n, "min": self.min, "max": self.max,
+                "quantiles": {str(p): q for p, q in zip(probabilities, self.quantiles(probabilities))}}
+
+
+def _plain(value):
+    """Plain JSON-serialisable value: numpy scalars to Python, datetimes to ISO strings"""
+    if isinstance(value, np.datetime64):
+        value = pd.Timestamp(value)
+    if value is pd.NaT:
+        return None
+    if isinstance(value, (datetime.date, datetime.time)):  # includes pd.Timestamp
+        return value.isoformat()
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class CountTable:
+    """Row counts per combination of values of one or more columns."""
+    type = "counts"
+
+    def __init__(self, columns, counts=None):
+        self.columns = list(columns)
+        self.counts: Dict[tuple, int] = dict(counts or {})
+
+    def update(self, df):
+        if len(df):
+            for key, count in df.value_counts(subset=self.columns, sort=False, dropna=False).items():
+                key = tuple(_plain(v) for v in (key if isinstance(key, tuple) else (key,)))
+                self.counts[key] = self.counts.get(key, 0) + int(count)
+        return self
+
+    def merge(self, other: "CountTable"):
+        if other.columns != self.columns:
+            raise ValueError("cannot merge count tables over different columns")
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        return self
+
+    def to_dict(self):
+        return {"type": self.type, "columns": self.columns,
+                "rows": [[*key, count] for key, count in sorted(self.counts.items(), key=lambda kv: str(kv[0]))]}
+
+    @classmethod
+    def from_dict(cls, d):
+        width = len(d["columns"])
+        return cls(d["columns"], {tuple(r[:width]): int(r[width]) for r in d["rows"]})
+
+    def summary(self, **_):
+        return self.to_dict()
+
+
+STAT_TYPES = {cls.type: cls for cls in (Moments, Histogram, KLLSketch, CountTable)}
+
+
+def build_statistics(spec) -> Dict[str, Any]:
+    """Empty statistics for a schema's "statistics" section, keyed "<type>:<columns>"."""
+    stats: Dict[str, Any] = {}
+    spec = spec or {}
+    for col in spec.get("moments", []):
+        stats[f"moments:{col}"] = Moments()
+    for col, hist in (spec.get("histogram") or {}).items():
+        stats[f"histogram:{col}"] = Histogram.from_spec(hist)
+    quantiles = spec.get("quantiles") or {}
+    for col in quantiles.get("columns", []):
+        stats[f"kll:{col}"] = KLLSketch(quantiles.get("k", DEFAULT_K))
+    for cols in spec.get("counts", []):
+        cols = [cols] if isinstance(cols, str) else list(cols)
+        stats[f"counts:{','.join(cols)}"] = CountTable(cols)
+    return stats
+
+
+def update_statistics(stats: Dict[str, Any], df: pd.DataFrame):
+    for key, stat in stats.items():
+        if isinstance(stat, CountTable):
+            stat.update(df)
+        else:
+            stat.update(df[key.split(":", 1)[1]])
+    return stats
+
+
+def compute_statistics(df: pd.DataFrame, spec) -> Dict[str, Dict[str, Any]]:
+    """Serialised statistics of one frame (a whole site, or one chunk of it)."""
+    return {key: stat.to_dict() for key, stat in update_statistics(build_statistics(spec), df).items()}
+
+
+def load_statistic(state: Dict[str, Any]):
+    return STAT_TYPES[state["type"]].from_dict(state)
+
+
+def merge_statistics(a: Dict[str, Dict[str, Any]], b: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Merge two serialised statistics dicts (e.g. two chunks, or two sites)."""
+    merged = dict(a)
+    for key, state in b.items():
+        merged[key] = load_statistic(a[key]).merge(load_statistic(state)).to_dict() if key in a else state
+    return merged
+
+
+def summarize_statistics(states: Dict[str, Dict[str, Any]], spec=None) -> Dict[str, Dict[str, Any]]:
+    """Final values (mean/variance, quantiles, ...) from merged statistics."""
+    probabilities = ((spec or {}).get("quantiles") or {}).get("probabilities", DEFAULT_PROBABILITIES)
+    return {key: load_statistic(state).summary(probabilities=probabilities) for key, state in states.items()}
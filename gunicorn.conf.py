@@ -1 +1,8 @@
-timeout = 120
\ No newline at end of file
+import os
+
+# Streamed assistant replies (/assistant/chat with "stream": true) keep a connection
+# open for the whole generation; threaded workers keep other requests flowing meanwhile.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
@@ -1,6 +1,16 @@
+import os
+import threading
 import requests
 import json
 
+from src.clientRegistryPublisher import ClientRegistryPublisher
+from src.federatedIntake import ClientRegistry, DuplicateUpdate, IntakeFull, UpdateIntake, deserialize_update
+from src.privacyLedger import BudgetExceeded, PrivacyLedger
+
+# data.privacy_config as loaded into OPA; used when OPA does not have it (yet)
+PRIVACY_CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'extra', 'opa-checker', 'opa', 'data',
+                                   'privacy_config.json')
+
 
 class OPAClient:
     def __init__(self, opa_url="http://localhost:8181"):
@@ -18,6 +28,27 @@ class OPAClient:
         resp.raise_for_status()
         return True
 
+    def get_data(self, data_path: str):
+        """Read a document under /v1/data; None if it does not exist."""
+        url = f"{self.opa_url}/v1/data/{data_path.strip('/')}"
+        resp = requests.get(url)
+        resp.raise_for_status()
+        return resp.json().get("result")
+
+    def put_data(self, data_path: str, document):
+        """Create or replace a base document under /v1/data (e.g. 'privacy_state')."""
+        url = f"{self.opa_url}/v1/data/{data_path.strip('/')}"
+        resp = requests.put(url, json=document, headers={"Content-Type": "application/json"})
+        resp.raise_for_status()
+        return True
+
+    def patch_data(self, data_path: str, operations: list):
+        """Apply JSON Patch operations to a base document, so only changed values are sent."""
+        url = f"{self.opa_url}/v1/data/{data_path.strip('/')}"
+        resp = requests.patch(url, json=operations, headers={"Content-Type": "application/json-patch+json"})
+        resp.raise_for_status()
+        return True
+
     def query_data_path(self, data_path: str, input_obj: dict):
         """Query a data path decision endpoint (REST) with given input.
         data_path: e.g., 'data/format/decision' or 'data/data/format/decision' depending on package
@@ -83,6 +114,60 @@ class OPAClient:
         result = response.json()
         return result.get("result", False)
 
+    def check_enrollments(self, clients):
+        """Check a whole round's enrollment requests in one policy query.
+        clients: list of client_info dicts (each with an 'id').
+        Returns {client_id: {"allowed": bool, "reasons": [...]}}; clients without a decision are denied.
+        """
+        policy_path = "v1/data/federated/enrollment/batch_decisions"
+
+        response = requests.post(
+            f"{self.opa_url}/{policy_path}",
+            json={"input": {"clients": list(clients)}},
+            headers={"Content-Type": "application/json"}
+        )
+        response.raise_for_status()
+        decisions = response.json().get("result") or []
+
+        # Decisions come back in input order; key them by the ids we sent
+        results = {}
+        for i, client in enumerate(clients):
+            decision = decisions[i] if i < len(decisions) else {}
+            results[client.get("id")] = {
+                "allowed": decision.get("allowed") is True,
+                "reasons": sorted(decision.get("reasons") or []),
+            }
+        return results
+
+    def validate_model_updates(self, updates, round_number):
+        """Validate all model updates of a round in one policy query.
+        updates: {client_id: model_data}.
+        Returns {client_id: {"valid": bool, "checks": {...}}}; updates without a report are rejected.
+        """
+        policy_path = "v1/data/federated/model_validation/batch_reports"
+
+        client_ids = list(updates)
+        payload = {
+            "input": {
+                "round_number": round_number,
+                "updates": [{"client": {"id": cid}, "model": updates[cid]} for cid in client_ids]
+            }
+        }
+
+        response = requests.post(
+            f"{self.opa_url}/{policy_path}",
+            json=payload,
+            headers={"Content-Type": "application/json"}
+        )
+        response.raise_for_status()
+        reports = response.json().get("result") or []
+
+        results = {}
+        for i, cid in enumerate(client_ids):
+            report = reports[i] if i < len(reports) else {}
+            results[cid] = {"valid": report.get("valid") is True, "checks": report.get("checks") or {}}
+        return results
+
     def check_aggregation(self, participants, round_info):
         """Check if aggregation can proceed"""
         policy_path = "v1/data/federated/aggregation/allow_aggregation"
@@ -105,9 +190,64 @@ class OPAClient:
 
 # Usage in FL Server
 class FederatedServer:
-    def __init__(self):
-        self.opa = OPAClient()
-        self.enrolled_clients = []
+    def __init__(self, intake_workers=None, intake_queue_size=None):
+        self.opa = OPAClient(os.getenv('OPA_URL', 'http://localhost:8181'))
+        self.clients = ClientRegistry()
+        # Blacklist, capabilities and round selection as keyed objects in OPA data
+        self.registry_publisher = ClientRegistryPublisher(self.opa)
+        # Running FedAvg sums per round; updates are folded in on acceptance and not kept
+        self.rounds = {}
+        self._rounds_lock = threading.Lock()
+        self.memmap_dir = os.getenv('FL_AGGREGATION_MEMMAP_DIR') or None
+        # Privacy budget per project; totals are pushed to OPA as data.privacy_state
+        self.project_id = os.getenv('FL_PROJECT_ID', 'default')
+        self.round_epsilon = float(os.getenv('FL_ROUND_EPSILON', '0.5'))
+        self.round_delta = float(os.getenv('FL_ROUND_DELTA', '0'))
+        # Budgets default to the policy's data.privacy_config; PRIVACY_* variables override them
+        config = self._privacy_config()
+        epsilon_budget = os.getenv('PRIVACY_EPSILON_BUDGET', config.get('total_epsilon_budget'))
+        delta_budget = os.getenv('PRIVACY_DELTA_BUDGET', config.get('total_delta_budget'))
+        max_contributions = os.getenv('PRIVACY_MAX_CONTRIBUTIONS', config.get('max_contributions_per_client'))
+        self.ledger = PrivacyLedger(
+            publisher=self.opa,
+            epsilon_budget=float(epsilon_budget) if epsilon_budget is not None else None,
+            delta_budget=float(delta_budget) if delta_budget is not None else None,
+            max_contributions=int(max_contributions) if max_contributions is not None else None,
+        )
+        # The policies read the totals from OPA data: push them now rather than on the first change
+        self.ledger.publish()
+        # Updates are validated by a worker pool, started on the first submitted update;
+        # the bounded queue pushes back on clients when full.
+        # The numpy-backed FL modules are imported here so importing this module stays light.
+        from src.federatedModelStats import policy_input, prepare_update
+        self.intake = UpdateIntake(
+            lambda updates, round_number: self.opa.validate_model_updates(
+                {cid: policy_input(m) for cid, m in updates.items()}, round_number),
+            deserialize=lambda payload: prepare_update(deserialize_update(payload)),
+            workers=intake_workers or int(os.getenv('FL_INTAKE_WORKERS', '4')),
+            queue_size=intake_queue_size or int(os.getenv('FL_INTAKE_QUEUE_SIZE', '256')),
+            on_accept=lambda round_number, client_id, model_data: self.process_update(client_id, model_data, round_number),
+        )
+
+    def _privacy_config(self):
+        """data.privacy_config from OPA, else from PRIVACY_CONFIG_PATH (the policy's data file)."""
+        try:
+            config = self.opa.get_data('privacy_config')
+            if config:
+                return config
+        except Exception as e:
+            print(f"Warning: could not read privacy_config from OPA: {e}")
+        path = os.getenv('PRIVACY_CONFIG_PATH', PRIVACY_CONFIG_PATH)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('privacy_config') or {}
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not load privacy config from {path}: {e}")
+            return {}
+
+    @property
+    def enrolled_clients(self):
+        return self.clients.values()
 
     def enroll_client(self, client_info):
         """Enroll a new client"""
@@ -116,28 +256,168 @@ class FederatedServer:
             return {"status": "denied", "reason": "Policy violation"}
 
         # Proceed with enrollment
-        self.enrolled_clients.append(client_info)
+        self.clients.add(client_info)
+        self.registry_publisher.clients_registered([client_info])
         return {"status": "accepted", "client_id": client_info["id"]}
 
+    def enroll_clients(self, client_infos):
+        """Enroll many clients with a single policy query.
+        Returns {client_id: result} with the same results as enroll_client."""
+        decisions = self.opa.check_enrollments(client_infos)
+        results, enrolled = {}, []
+        for client_info in client_infos:
+            client_id = client_info.get("id")
+            if not decisions.get(client_id, {}).get("allowed"):
+                results[client_id] = {"status": "denied", "reason": "Policy violation",
+                                      "details": decisions.get(client_id, {}).get("reasons", [])}
+                continue
+            self.clients.add(client_info)
+            enrolled.append(client_info)
+            results[client_id] = {"status": "accepted", "client_id": client_id}
+        self.registry_publisher.clients_registered(enrolled)
+        return results
+
+    def blacklist_clients(self, client_ids):
+        """Blacklist clients: they are unenrolled and denied by the enrollment policy."""
+        client_ids = list(client_ids)
+        for client_id in client_ids:
+            self.clients.remove(client_id)
+        self.registry_publisher.clients_removed(client_ids)
+        self.registry_publisher.blacklist_add(client_ids)
+
+    def unblacklist_clients(self, client_ids):
+        self.registry_publisher.blacklist_remove(client_ids)
+
+    def select_round_clients(self, round_number, client_ids):
+        """Select the enrolled clients allowed to submit updates in a round."""
+        selected = [cid for cid in client_ids if cid in self.clients]
+        self.registry_publisher.select_round(round_number, selected)
+        return selected
+
     def receive_model_update(self, client_id, model_data, round_number):
         """Receive and validate model update"""
+        from src.federatedModelStats import policy_input, prepare_update
+        # Statistics the policy checks are computed here, not taken from the client
+        try:
+            model_data = prepare_update(model_data)
+        except (TypeError, ValueError) as e:
+            return {"status": "rejected", "reason": f"Malformed model update: {e}"}
+
         # Validate with OPA
-        if not self.opa.validate_model_update(client_id, model_data, round_number):
+        if not self.opa.validate_model_update(client_id, policy_input(model_data), round_number):
             return {"status": "rejected", "reason": "Invalid model update"}
 
         # Process the model update
-        self.process_update(client_id, model_data)
+        try:
+            self.process_update(client_id, model_data, round_number)
+        except ValueError as e:
+            return {"status": "rejected", "reason": str(e)}
         return {"status": "accepted"}
 
-    def aggregate_models(self, round_number):
+    def receive_model_updates(self, updates, round_number):
+        """Validate a round's updates ({client_id: model_data}) with a single policy query
+        and process the accepted ones. Returns {client_id: result}."""
+        from src.federatedModelStats import policy_input, prepare_update
+        results, prepared = {}, {}
+        for client_id, model_data in updates.items():
+            try:
+                prepared[client_id] = prepare_update(model_data)
+            except (TypeError, ValueError) as e:
+                results[client_id] = {"status": "rejected", "reason": f"Malformed model update: {e}"}
+        reports = self.opa.validate_model_updates(
+            {cid: policy_input(m) for cid, m in prepared.items()}, round_number) if prepared else {}
+        for client_id, model_data in prepared.items():
+            report = reports.get(client_id, {})
+            if not report.get("valid"):
+                failed = sorted(name for name, ok in report.get("checks", {}).items() if not ok)
+                results[client_id] = {"status": "rejected", "reason": "Invalid model update", "failed_checks": failed}
+                continue
+            try:
+                self.process_update(client_id, model_data, round_number)
+            except ValueError as e:
+                results[client_id] = {"status": "rejected", "reason": str(e)}
+                continue
+            results[client_id] = {"status": "accepted"}
+        return results
+
+    def submit_model_update(self, client_id, payload, round_number, timeout=None):
+        """Queue a (possibly serialised) update for concurrent validation.
+        Returns immediately; 'busy' tells the client to retry later (backpressure)."""
+        if client_id not in self.clients:
+            return {"status": "rejected", "reason": "Client not enrolled"}
+        try:
+            self.intake.submit(client_id, payload, round_number, timeout=timeout)
+        except IntakeFull as e:
+            return {"status": "busy", "reason": str(e)}
+        except DuplicateUpdate as e:
+            return {"status": "rejected", "reason": str(e)}
+        return {"status": "queued"}
+
+    def collect_round(self, round_number, timeout=None):
+        """Wait for the round's queued updates to be validated; returns {client_id: result}.
+        Raises IntakeTimeout (carrying the partial results) if the timeout passes first."""
+        return self.intake.collect(round_number, timeout=timeout)
+
+    def close(self):
+        """Stop the intake workers after the queued updates are processed."""
+        self.intake.close()
+
+    def aggregate_models(self, round_number, epsilon_cost=None, delta_cost=None):
         """Aggregate models from participants"""
+        # Let queued updates of this round finish validation first
+        self.intake.collect(round_number)
         participants = self.get_round_participants(round_number)
-        round_info = {"number": round_number, "epsilon_cost": 0.5}
+        round_info = {
+            "number": round_number,
+            "project_id": self.project_id,
+            "epsilon_cost": self.round_epsilon if epsilon_cost is None else epsilon_cost,
+            "delta_cost": self.round_delta if delta_cost is None else delta_cost,
+        }
 
-        # Check aggregation policy
+        # Check aggregation policy against current ledger totals (OPA may have restarted)
+        self.ledger.publish()
         if not self.opa.check_aggregation(participants, round_info):
             return {"status": "failed", "reason": "Aggregation policy not satisfied"}
 
+        # Reserve the round's privacy cost; spent only if aggregation succeeds
+        try:
+            reservation = self.ledger.reserve(self.project_id, round_number, round_info["epsilon_cost"],
+                                              round_info["delta_cost"], [p["client_id"] for p in participants])
+        except BudgetExceeded as e:
+            return {"status": "failed", "reason": str(e)}
+
         # Perform aggregation
-        aggregated_model = self.perform_aggregation(participants)
-        return {"status": "success", "model": aggregated_model}
\ No newline at end of file
+        try:
+            aggregated_model = self.perform_aggregation(participants, round_number)
+        except Exception:
+            self.ledger.release(reservation)
+            raise
+        self.ledger.commit(reservation)
+        return {"status": "success", "model": aggregated_model}
+
+    def _round(self, round_number):
+        from src.federatedAggregation import StreamingFedAvg
+        with self._rounds_lock:
+            if round_number not in self.rounds:
+                self.rounds[round_number] = StreamingFedAvg(round_number, memmap_dir=self.memmap_dir)
+            return self.rounds[round_number]
+
+    def process_update(self, client_id, model_data, round_number):
+        """Fold an accepted update ({"parameters": ..., "num_samples": n}) into the round's FedAvg."""
+        self._round(round_number).add(client_id, model_data.get("parameters"), model_data.get("num_samples"))
+
+    def get_round_participants(self, round_number):
+        """[{"client_id", "num_samples"}] of the updates folded into the round so far."""
+        with self._rounds_lock:
+            fedavg = self.rounds.get(round_number)
+        return fedavg.participant_list() if fedavg else []
+
+    def perform_aggregation(self, participants, round_number):
+        """Weighted average (by num_samples) of the round's updates; releases the round's state."""
+        with self._rounds_lock:
+            fedavg = self.rounds.pop(round_number)
+        try:
+            return fedavg.result()
+        finally:
+            fedavg.close()
+            self.intake.discard(round_number)
\ No newline at end of file
@@ -0,0 +1,177 @@
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.jsonPointer import json_pointer
+
+# Capability fields the enrollment policy checks
+CAPABILITY_FIELDS = ('dataset_size', 'cpu_cores', 'memory_gb')
+
+
+class ClientRegistryPublisher:
+    """Publishes client registry data to OPA as keyed objects, so policies look clients up
+    in O(1) instead of scanning arrays:
+
+      data.blacklist.clients[<id>]       = true
+      data.registry.clients[<id>]        = {dataset_size, cpu_cores, memory_gb}
+      data.current_round.selected[<id>]  = true   (plus data.current_round.round_number)
+
+    A local mirror of the three collections is kept; every change is sent as a JSON Patch
+    with only the touched keys. Local changes are also kept in a journal until OPA has them.
+    Before the first change, and before any wholesale replace after a failed push, the mirror
+    is re-read from OPA (which other workers or a data file may have changed) and the journal
+    is replayed on top, so neither side's entries are lost or resurrected.
+    """
+
+    def __init__(self, opa, blacklist: Iterable[str] = ()):
+        self.opa = opa
+        self._lock = threading.Lock()
+        self._published = False
+        self._synced = False
+        self.blacklist = set()
+        self.capabilities: Dict[str, Dict[str, Any]] = {}
+        self.round_number: Optional[int] = None
+        self.selected = set()
+        self._journal: List[Tuple] = []  # local changes OPA may not have yet
+        for cid in blacklist:
+            self._record(('blacklist_add', str(cid)))
+
+    # --- mirror queries ---
+
+    def is_blacklisted(self, client_id: str) -> bool:
+        return client_id in self.blacklist
+
+    def is_selected(self, client_id: str) -> bool:
+        return client_id in self.selected
+
+    # --- updates ---
+
+    def _apply(self, change: Tuple):
+        kind = change[0]
+        if kind == 'register':
+            self.capabilities[change[1]] = change[2]
+        elif kind == 'unregister':
+            self.capabilities.pop(change[1], None)
+        elif kind == 'blacklist_add':
+            self.blacklist.add(change[1])
+        elif kind == 'blacklist_remove':
+            self.blacklist.discard(change[1])
+        elif kind == 'select':
+            self.round_number, self.selected = change[1], set(change[2])
+
+    def _record(self, change: Tuple):
+        self._journal.append(change)
+        self._apply(change)
+
+    def clients_registered(self, client_infos: Iterable[Dict[str, Any]]):
+        ops = []
+        with self._lock:
+            self._sync()
+            for info in client_infos:
+                cid = str(info['id'])
+                caps = {k: info[k] for k in CAPABILITY_FIELDS if k in info}
+                if self.capabilities.get(cid) != caps:
+                    self._record(('register', cid, caps))
+                    ops.append(('registry', {'op': 'add', 'path': json_pointer('clients', cid), 'value': caps}))
+            self._push(ops)
+
+    def clients_removed(self, client_ids: Iterable[str]):
+        with self._lock:
+            self._sync()
+            ops = []
+            for cid in map(str, client_ids):
+                if cid in self.capabilities:
+                    ops.append(('registry', {'op': 'remove', 'path': json_pointer('clients', cid)}))
+                self._record(('unregister', cid))
+            self._push(ops)
+
+    def blacklist_add(self, client_ids: Iterable[str]):
+        with self._lock:
+            self._sync()
+            ops = []
+            for cid in map(str, client_ids):
+                if cid not in self.blacklist:
+                    ops.append(('blacklist', {'op': 'add', 'path': json_pointer('clients', cid), 'value': True}))
+                self._record(('blacklist_add', cid))
+            self._push(ops)
+
+    def blacklist_remove(self, client_ids: Iterable[str]):
+        with self._lock:
+            self._sync()
+            ops = []
+            for cid in map(str, client_ids):
+                if cid in self.blacklist:
+                    ops.append(('blacklist', {'op': 'remove', 'path': json_pointer('clients', cid)}))
+                self._record(('blacklist_remove', cid))
+            self._push(ops)
+
+    def select_round(self, round_number: int, client_ids: Iterable[str]):
+        """Set the clients selected for a round; only the difference to the previous selection is sent."""
+        with self._lock:
+            self._sync()
+            selected = {str(c) for c in client_ids}
+            ops = [('current_round', {'op': 'add', 'path': json_pointer('round_number'), 'value': round_number})]
+            ops += [('current_round', {'op': 'remove', 'path': json_pointer('selected', cid)})
+                    for cid in sorted(self.selected - selected)]
+            ops += [('current_round', {'op': 'add', 'path': json_pointer('selected', cid), 'value': True})
+                    for cid in sorted(selected - self.selected)]
+            self._record(('select', round_number, frozenset(selected)))
+            self._push(ops)
+
+    # --- OPA ---
+
+    def documents(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            'blacklist': {'clients': {cid: True for cid in self.blacklist}},
+            'registry': {'clients': dict(self.capabilities)},
+            'current_round': {'round_number': self.round_number, 'selected': {cid: True for cid in self.selected}},
+        }
+
+    def publish_all(self):
+        with self._lock:
+            self._synced = False
+            self._sync()
+            self._push([], full=True)
+
+    def _sync(self):
+        """Rebuild the mirror from OPA's documents plus the journal; no-op while in sync."""
+        if self._synced:
+            return
+        try:
+            blacklist = self.opa.get_data('blacklist') or {}
+            registry = self.opa.get_data('registry') or {}
+            current = self.opa.get_data('current_round') or {}
+        except Exception as e:
+            print(f"Warning: failed to read client registry from OPA: {e}")
+            return
+        self.blacklist = {str(c) for c in (blacklist.get('clients') or {})}
+        self.capabilities = {str(cid): caps for cid, caps in (registry.get('clients') or {}).items()}
+        self.round_number = current.get('round_number')
+        self.selected = {str(c) for c in (current.get('selected') or {})}
+        for change in self._journal:
+            self._apply(change)
+        self._synced = True
+
+    def _push(self, ops: List, full: bool = False):
+        if self._published and not full and not ops:
+            return
+        try:
+            if full or not self._published:
+                if not self._synced:
+                    # Replacing the documents without OPA's current state would drop other writers' entries
+                    print("Warning: client registry not published; OPA state could not be read")
+                    return
+                for path, document in self.documents().items():
+                    self.opa.put_data(path, document)
+            else:
+                by_doc: Dict[str, List[Dict[str, Any]]] = {}
+                for path, op in ops:
+                    by_doc.setdefault(path, []).append(op)
+                for path, doc_ops in by_doc.items():
+                    self.opa.patch_data(path, doc_ops)
+            self._published = True
+            self._journal.clear()
+        except Exception as e:
+            # The mirror and journal keep the change; re-read OPA and replace the documents on the next change
+            self._published = False
+            self._synced = False
+            print(f"Warning: failed to publish client registry to OPA: {e}")
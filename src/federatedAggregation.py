@@ -0,0 +1,106 @@
+import os
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+def load_parameters(parameters: Any, allow_files: bool = False) -> Dict[str, np.ndarray]:
+    """Normalise a model update's parameters to {name: ndarray}.
+
+    Accepts a dict of arrays/lists or a single array/list (named 'weights'). Only trusted
+    server-side callers may pass allow_files=True to also accept a path to a .npy file
+    (memory-mapped, so it is paged in while being folded) or an .npz archive; client
+    payloads must never name files. Raises ValueError on a path when files are not allowed
+    or on non-numeric parameters.
+    """
+    if isinstance(parameters, (str, bytes, os.PathLike)):
+        if not allow_files:
+            raise ValueError("parameters must be numeric arrays, not a file path")
+        path = os.fspath(parameters)
+        if path.endswith('.npz'):
+            archive = np.load(path)
+            arrays = {name: archive[name] for name in archive.files}
+        else:
+            arrays = {'weights': np.load(path, mmap_mode='r')}
+    elif isinstance(parameters, dict):
+        arrays = {name: np.asarray(value) for name, value in parameters.items()}
+    else:
+        arrays = {'weights': np.asarray(parameters)}
+    for name, a in arrays.items():
+        if a.dtype.kind not in 'biuf':
+            raise ValueError(f"parameters {name!r} are not numeric (dtype {a.dtype})")
+    return arrays
+
+
+class StreamingFedAvg:
+    """Weighted FedAvg over one round, computed as a running sum.
+
+    Each update is folded in as sum += num_samples * params and then dropped, so memory is
+    O(model) regardless of the number of clients; result() divides by the total sample count.
+    With `memmap_dir` the accumulators are memory-mapped files instead of RAM arrays.
+    """
+
+    def __init__(self, round_number: int, dtype=np.float64, memmap_dir: Optional[str] = None):
+        self.round_number = round_number
+        self.dtype = np.dtype(dtype)
+        self.memmap_dir = memmap_dir
+        self._lock = threading.Lock()
+        self._sums: Optional[Dict[str, np.ndarray]] = None
+        self._shapes: Dict[str, tuple] = {}
+        self.total_samples = 0
+        self.participants: Dict[str, int] = {}  # client_id -> num_samples
+
+    def _accumulator(self, index: int, shape: tuple) -> np.ndarray:
+        if not self.memmap_dir:
+            return np.zeros(shape, dtype=self.dtype)
+        os.makedirs(self.memmap_dir, exist_ok=True)
+        # Named by layer index, never by the (client-supplied) layer name, and unique per round
+        fd, path = tempfile.mkstemp(prefix=f"round{self.round_number}_{index}_", suffix=".acc", dir=self.memmap_dir)
+        os.close(fd)
+        return np.memmap(path, dtype=self.dtype, mode='w+', shape=shape)
+
+    def add(self, client_id: str, parameters: Any, num_samples: int):
+        """Fold one client's update into the round. Raises ValueError on a duplicate client,
+        a non-positive sample count or parameters that don't match the model's shape.
+        Parameters are arrays; load trusted files first with load_parameters(path, allow_files=True)."""
+        if num_samples is None or num_samples <= 0:
+            raise ValueError(f"num_samples must be positive for client {client_id}")
+        arrays = load_parameters(parameters)
+        with self._lock:
+            if client_id in self.participants:
+                raise ValueError(f"client {client_id} already contributed to round {self.round_number}")
+            if self._sums is None:
+                self._shapes = {name: a.shape for name, a in arrays.items()}
+                self._sums = {name: self._accumulator(i, shape) for i, (name, shape) in enumerate(self._shapes.items())}
+            elif {name: a.shape for name, a in arrays.items()} != self._shapes:
+                raise ValueError(f"update from client {client_id} does not match the model shape")
+            for name, a in arrays.items():
+                # Accumulate in self.dtype (float64 by default) whatever the update's dtype
+                np.add(self._sums[name], np.multiply(a, num_samples, dtype=self.dtype), out=self._sums[name])
+            self.participants[client_id] = int(num_samples)
+            self.total_samples += int(num_samples)
+
+    def participant_list(self) -> List[Dict[str, Any]]:
+        """Participants in the shape aggregation_rules.rego expects."""
+        with self._lock:
+            return [{"client_id": cid, "num_samples": n} for cid, n in self.participants.items()]
+
+    def result(self) -> Dict[str, np.ndarray]:
+        with self._lock:
+            if not self._sums or self.total_samples <= 0:
+                raise ValueError(f"no updates to aggregate for round {self.round_number}")
+            return {name: np.asarray(s) / self.total_samples for name, s in self._sums.items()}
+
+    def close(self):
+        """Release the accumulators (and delete their files when memory-mapped)."""
+        with self._lock:
+            sums, self._sums = self._sums or {}, None
+            paths = [s.filename for s in sums.values() if isinstance(s, np.memmap)]
+            sums.clear()
+            for path in paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
@@ -0,0 +1,251 @@
+import json
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set
+
+
+class IntakeFull(Exception):
+    """Raised when the intake queue stays full for longer than the submit timeout."""
+
+
+class DuplicateUpdate(ValueError):
+    """Raised by submit() when the client already has an update queued or accepted in the round."""
+
+
+class IntakeTimeout(TimeoutError):
+    """Raised by collect() when a round's updates are still being validated at the timeout.
+    `results` holds the results available so far and `pending` the number still queued."""
+
+    def __init__(self, round_number: int, pending: int, results: Dict[str, Dict[str, Any]]):
+        super().__init__(f"{pending} update(s) of round {round_number} still pending")
+        self.round_number = round_number
+        self.pending = pending
+        self.results = results
+
+
+class ClientRegistry:
+    """Enrolled clients keyed by id (O(1) membership instead of scanning a list)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, client_info: Dict[str, Any]):
+        with self._lock:
+            self._clients[client_info["id"]] = client_info
+
+    def remove(self, client_id: str):
+        with self._lock:
+            self._clients.pop(client_id, None)
+
+    def get(self, client_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._clients.get(client_id)
+
+    def __contains__(self, client_id) -> bool:
+        with self._lock:
+            return client_id in self._clients
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._clients)
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return list(self._clients)
+
+    def values(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._clients.values())
+
+
+def deserialize_update(payload: Any) -> Any:
+    """Model updates arrive as JSON bytes/str or as already decoded objects."""
+    if isinstance(payload, (bytes, bytearray)):
+        payload = payload.decode("utf-8")
+    if isinstance(payload, str):
+        return json.loads(payload)
+    return payload
+
+
+class UpdateIntake:
+    """Concurrent intake for model updates.
+
+    Submitted updates go into a bounded queue; when it is full, submit blocks for up to
+    `put_timeout` seconds and then raises IntakeFull, so callers can push back on clients.
+    A pool of worker threads takes up to `batch_size` queued updates at a time, deserialises
+    them and validates each round's share with one call to `validate_batch`
+    ({client_id: model_data}, round_number) -> {client_id: {"valid": bool, ...}} (e.g.
+    OPAClient.validate_model_updates). Accepted updates are passed to `on_accept`
+    (round_number, client_id, model_data) and dropped, e.g. to fold them into a running
+    aggregate; without it they are accumulated per round (see accepted()). collect(round)
+    waits until that round's queued updates are validated and returns the per-client results.
+
+    A client has at most one update queued or accepted per round; a second one is refused by
+    submit() with DuplicateUpdate rather than replacing the first in its batch.
+
+    Worker threads are started by start() or the first submit(); close() stops them.
+    """
+
+    def __init__(self, validate_batch: Callable[[Dict[str, Any], int], Dict[str, Dict[str, Any]]],
+                 deserialize: Callable[[Any], Any] = deserialize_update, workers: int = 4,
+                 queue_size: int = 256, batch_size: int = 32, put_timeout: Optional[float] = 5.0,
+                 on_accept: Optional[Callable[[int, str, Any], None]] = None):
+        self.validate_batch = validate_batch
+        self.on_accept = on_accept
+        self.deserialize = deserialize
+        self.batch_size = max(1, batch_size)
+        self.put_timeout = put_timeout
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, queue_size))
+        self._cond = threading.Condition()
+        self._pending: Dict[int, int] = {}                           # round -> queued or in-flight updates
+        self._queued: Dict[int, Set[str]] = {}                       # round -> clients queued or in flight
+        self._accepted: Dict[int, Dict[str, Any]] = {}               # round -> client_id -> model_data
+        self._results: Dict[int, Dict[str, Dict[str, Any]]] = {}     # round -> client_id -> result
+        self.workers = max(1, workers)
+        self._workers: List[threading.Thread] = []
+
+    def start(self):
+        """Start the worker threads (no-op when running)."""
+        with self._cond:
+            if self._workers:
+                return
+            self._workers = [threading.Thread(target=self._run, name=f"update-intake-{i}", daemon=True)
+                             for i in range(self.workers)]
+            for t in self._workers:
+                t.start()
+
+    def submit(self, client_id: str, payload: Any, round_number: int, timeout: Optional[float] = None):
+        """Queue an update; raises IntakeFull if no slot frees up within the timeout and
+        DuplicateUpdate if the client's update for the round is already queued or accepted
+        (a rejected update may be resubmitted)."""
+        self.start()
+        with self._cond:
+            queued = self._queued.setdefault(round_number, set())
+            previous = self._results.get(round_number, {}).get(client_id, {})
+            if client_id in queued or previous.get("status") == "accepted":
+                raise DuplicateUpdate(f"client {client_id} already submitted an update for round {round_number}")
+            queued.add(client_id)
+            self._pending[round_number] = self._pending.get(round_number, 0) + 1
+        try:
+            self._queue.put((client_id, payload, round_number), timeout=self.put_timeout if timeout is None else timeout)
+        except queue.Full:
+            self._done(round_number, [client_id])
+            raise IntakeFull(f"intake queue full ({self._queue.maxsize} updates)")
+
+    def _done(self, round_number: int, client_ids: List[str]):
+        with self._cond:
+            self._queued.get(round_number, set()).difference_update(client_ids)
+            self._pending[round_number] -= len(client_ids)
+            if self._pending[round_number] <= 0:
+                self._pending.pop(round_number, None)
+                self._queued.pop(round_number, None)
+                self._cond.notify_all()
+
+    def _next_batch(self) -> Optional[List]:
+        item = self._queue.get()
+        if item is None:
+            self._queue.put(None)  # stop marker stays for the other workers
+            return None
+        batch = [item]
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            by_round: Dict[int, List] = {}
+            for client_id, payload, round_number in batch:
+                by_round.setdefault(round_number, []).append((client_id, payload))
+            for round_number, items in by_round.items():
+                try:
+                    self._validate_round(round_number, items)
+                except Exception as e:
+                    # Never let one bad batch take a worker down; record it and keep serving
+                    print(f"Warning: model update intake failed for round {round_number}: {e}")
+                    with self._cond:
+                        self._results.setdefault(round_number, {}).update(
+                            {cid: {"status": "rejected", "reason": f"Intake error: {e}"} for cid, _ in items})
+                finally:
+                    self._done(round_number, [cid for cid, _ in items])
+
+    def _validate_round(self, round_number: int, items: List):
+        results: Dict[str, Dict[str, Any]] = {}
+        updates: Dict[str, Any] = {}
+        for client_id, payload in items:
+            try:
+                updates[client_id] = self.deserialize(payload)
+            except Exception as e:
+                results[client_id] = {"status": "rejected", "reason": f"Malformed model update: {e}"}
+        reports: Dict[str, Dict[str, Any]] = {}
+        if updates:
+            try:
+                reports = self.validate_batch(updates, round_number) or {}
+            except Exception as e:
+                print(f"Warning: model update validation failed for round {round_number}: {e}")
+                reports = {cid: {"valid": False, "error": str(e)} for cid in updates}
+        accepted = {}
+        for client_id, model_data in updates.items():
+            report = reports.get(client_id, {})
+            if report.get("valid"):
+                if self.on_accept is not None:
+                    try:
+                        self.on_accept(round_number, client_id, model_data)
+                    except Exception as e:
+                        results[client_id] = {"status": "rejected", "reason": str(e)}
+                        continue
+                else:
+                    accepted[client_id] = model_data
+                results[client_id] = {"status": "accepted"}
+            else:
+                failed = sorted(name for name, ok in (report.get("checks") or {}).items() if not ok)
+                results[client_id] = {"status": "rejected",
+                                      "reason": "Validation error" if report.get("error") else "Invalid model update",
+                                      "failed_checks": failed}
+        with self._cond:
+            self._accepted.setdefault(round_number, {}).update(accepted)
+            self._results.setdefault(round_number, {}).update(results)
+
+    def pending(self, round_number: int) -> int:
+        with self._cond:
+            return self._pending.get(round_number, 0)
+
+    def accepted(self, round_number: int) -> Dict[str, Any]:
+        with self._cond:
+            return dict(self._accepted.get(round_number, {}))
+
+    def collect(self, round_number: int, timeout: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """Wait until every queued update of the round is validated; returns the per-client results.
+        Raises IntakeTimeout (with the partial results) if updates are still pending at the timeout."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: round_number not in self._pending, timeout=timeout):
+                raise IntakeTimeout(round_number, self._pending.get(round_number, 0),
+                                    dict(self._results.get(round_number, {})))
+            return dict(self._results.get(round_number, {}))
+
+    def discard(self, round_number: int):
+        """Drop a finished round's accumulated updates and results."""
+        with self._cond:
+            self._accepted.pop(round_number, None)
+            self._results.pop(round_number, None)
+
+    def close(self):
+        """Stop the worker threads once the queued updates are processed."""
+        with self._cond:
+            workers, self._workers = self._workers, []
+        if not workers:
+            return
+        self._queue.put(None)
+        for t in workers:
+            t.join()
+        self._queue.get_nowait()  # remove the stop marker so start() can run again
@@ -0,0 +1,83 @@
+import math
+import sys
+from typing import Any, Dict
+
+import numpy as np
+
+from src.federatedAggregation import load_parameters
+
+# Elements per chunk: bounds the float64 scratch copy to 8 MB whatever the model size
+DEFAULT_CHUNK = 1 << 20
+
+# Fields model_validation.rego reads; always computed here, never taken from the client
+STAT_FIELDS = ('size_bytes', 'parameter_count', 'gradient_norm', 'contains_nan', 'max_parameter_value')
+
+
+def parameter_stats(arrays: Dict[str, np.ndarray], chunk_size: int = DEFAULT_CHUNK) -> Dict[str, Any]:
+    """Statistics of a model update for the validation policy, in one chunked pass.
+
+    gradient_norm is the L2 norm over all parameters, max_parameter_value the largest absolute
+    value. contains_nan is true for any non-finite value (NaN or ±inf); those values are ignored
+    by the norm and maximum so the remaining checks still report meaningful numbers. Every
+    statistic is finite (the OPA input is strict JSON): a norm that overflows float64 is
+    clamped to sys.float_info.max, which any max-norm check rejects.
+    """
+    size_bytes = 0
+    count = 0
+    sum_sq = 0.0
+    max_abs = 0.0
+    non_finite = False
+    with np.errstate(over='ignore', invalid='ignore'):  # overflow is handled below, not warned about
+        for a in arrays.values():
+            size_bytes += int(a.nbytes)
+            count += int(a.size)
+            flat = a.reshape(-1)
+            for start in range(0, flat.size, chunk_size):
+                chunk = np.asarray(flat[start:start + chunk_size], dtype=np.float64)
+                sq = float(np.dot(chunk, chunk))
+                if math.isfinite(sq):
+                    hi, lo = float(chunk.max()), float(chunk.min())
+                else:
+                    # Rare path: NaN/inf present (or huge float64 values whose squares overflow)
+                    finite = np.isfinite(chunk)
+                    if not finite.all():
+                        chunk = chunk[finite]
+                        non_finite = True
+                    sq = float(np.dot(chunk, chunk)) if chunk.size else 0.0
+                    hi, lo = (float(chunk.max()), float(chunk.min())) if chunk.size else (0.0, 0.0)
+                sum_sq += sq
+                max_abs = max(max_abs, hi, -lo)
+    return {
+        'size_bytes': size_bytes,
+        'parameter_count': count,
+        'gradient_norm': min(math.sqrt(sum_sq), sys.float_info.max),
+        'contains_nan': non_finite,
+        'max_parameter_value': max_abs,
+    }
+
+
+def _num_samples(value: Any) -> int:
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, (int, np.integer)) or value <= 0:
+        raise ValueError(f"num_samples must be a positive integer, got {value!r}")
+    return int(value)
+
+
+def prepare_update(model_data: Dict[str, Any], chunk_size: int = DEFAULT_CHUNK) -> Dict[str, Any]:
+    """Decode an update's parameters to arrays and overwrite any self-reported statistics with
+    values computed here. The decoded arrays are kept so aggregation does not decode again.
+    Raises ValueError for any malformed update (not an object, missing or non-numeric
+    parameters, num_samples not a positive integer), so callers reject it in one place."""
+    if not isinstance(model_data, dict):
+        raise ValueError(f"model update must be an object, got {type(model_data).__name__}")
+    if model_data.get('parameters') is None:
+        raise ValueError("model update has no parameters")
+    num_samples = _num_samples(model_data.get('num_samples'))
+    arrays = load_parameters(model_data['parameters'])
+    return {**model_data, 'parameters': arrays, 'num_samples': num_samples, **parameter_stats(arrays, chunk_size)}
+
+
+def policy_input(model_data: Dict[str, Any]) -> Dict[str, Any]:
+    """The model object sent to OPA: everything except the parameter arrays."""
+    return {k: v for k, v in model_data.items() if k != 'parameters'}
@@ -0,0 +1,230 @@
+import re
+from typing import Any, Dict, List, Optional
+
+# Chunks stay below the 1500 characters the assistant sends per source, so
+# nothing retrieved gets cut off in the prompt.
+MAX_CHUNK_CHARS = 1400
+OVERLAP_CHARS = 200
+
+# Running headers/footers of the Official Journal PDF, e.g.
+# "4.5.2016 EN Official Journal of the European Union L 119/1"
+_PAGE_NOISE = re.compile(
+    r"^\s*(\d{1,2}\.\d{1,2}\.\d{4}\s+)?(EN\s+)?Official Journal of the European Union.*$"
+    r"|^\s*L\s*\d+/\d+\s*$"
+    r"|^\s*EN\s*$",
+    re.MULTILINE,
+)
+_ENACTING_MARKER = re.compile(r"HAVE\s+ADOPTED\s+THIS\s+REGULATION\s*:?", re.IGNORECASE)
+_RECITAL = re.compile(r"^\((\d{1,3})\)\s+", re.MULTILINE)
+_CHAPTER = re.compile(r"^CHAPTER\s+([IVXLC]+)\s*$")
+_SECTION = re.compile(r"^Section\s+(\d+)\s*$")
+_ARTICLE = re.compile(r"^Article\s+(\d+)\s*$")
+_PARAGRAPH = re.compile(r"^(\d{1,2})\.\s+")
+_SENTENCE_END = re.compile(r"(?<=[.;:])\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Strip page headers/footers and re-join words hyphenated across line breaks."""
+    text = text.replace("\r\n", "\n").replace("\u00ad", "")
+    text = _PAGE_NOISE.sub("", text)
+    text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)
+    text = re.sub(r"[ \t]+", " ", text)
+    return text
+
+
+def _join_lines(lines: List[str]) -> str:
+    return re.sub(r"\s+", " ", " ".join(l.strip() for l in lines)).strip()
+
+
+def _split_long(text: str, max_chars: int) -> List[str]:
+    """Split a single oversized unit on sentence boundaries, hard-cutting as a last resort."""
+    pieces: List[str] = []
+    current = ""
+    for sentence in _SENTENCE_END.split(text):
+        while len(sentence) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _tail(text: str, overlap: int) -> str:
+    """Last `overlap` characters of text, starting at a word boundary."""
+    if overlap <= 0 or len(text) <= overlap:
+        return text if overlap > 0 else ""
+    tail = text[-overlap:]
+    space = tail.find(" ")
+    return tail[space + 1:] if space != -1 else tail
+
+
+def pack_units(units: List[Dict[str, Any]], header: str, max_chars: int = MAX_CHUNK_CHARS,
+               overlap: int = OVERLAP_CHARS) -> List[Dict[str, Any]]:
+    """Greedily pack consecutive units (paragraphs) into chunks of at most max_chars.
+    Each chunk starts with `header` and, except the first, with the tail of the previous chunk.
+    Returns dicts with `text` and the list of unit `ids` it covers.
+    """
+    budget = max(max_chars - len(header) - 1, 200)
+    pieces: List[Dict[str, Any]] = []
+    for unit in units:
+        for part in _split_long(unit["text"], budget):
+            pieces.append({"id": unit.get("id"), "text": part})
+
+    chunks: List[Dict[str, Any]] = []
+    body, ids = "", []
+    for piece in pieces:
+        if body and len(body) + 1 + len(piece["text"]) > budget:
+            chunks.append({"body": body, "ids": ids})
+            carry = _tail(body, min(overlap, budget - len(piece["text"]) - 1))
+            body, ids = carry, []
+        body = f"{body} {piece['text']}".strip() if body else piece["text"]
+        if piece["id"] is not None and piece["id"] not in ids:
+            ids.append(piece["id"])
+    if body:
+        chunks.append({"body": body, "ids": ids})
+
+    return [{"text": f"{header}\n{c['body']}" if header else c["body"], "ids": c["ids"]} for c in chunks]
+
+
+def parse_recitals(preamble: str) -> List[Dict[str, Any]]:
+    """Return [{recital: int, text: str}] for every numbered recital in the preamble."""
+    matches = list(_RECITAL.finditer(preamble))
+    recitals = []
+    for i, m in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(preamble)
+        body = _join_lines(preamble[m.end():end].splitlines())
+        if body:
+            recitals.append({"recital": int(m.group(1)), "text": body})
+    return recitals
+
+
+def parse_articles(enacting: str) -> List[Dict[str, Any]]:
+    """Walk the enacting terms line by line and group them into articles.
+    Each article carries its chapter/section context and a list of numbered paragraphs
+    (unnumbered articles get a single paragraph with id None).
+    """
+    lines = [l.strip() for l in enacting.splitlines()]
+    articles: List[Dict[str, Any]] = []
+    chapter: Optional[str] = None
+    chapter_title: Optional[str] = None
+    section: Optional[int] = None
+    section_title: Optional[str] = None
+    article: Optional[Dict[str, Any]] = None
+    paragraph: Optional[Dict[str, Any]] = None
+    expect = None  # which heading the next non-empty line is the title of
+
+    def close_paragraph():
+        nonlocal paragraph
+        if article is not None and paragraph is not None and paragraph["lines"]:
+            article["paragraphs"].append({"id": paragraph["id"], "text": _join_lines(paragraph["lines"])})
+        paragraph = None
+
+    for line in lines:
+        if not line:
+            continue
+        if expect is not None:
+            if expect == "chapter":
+                chapter_title = line
+            elif expect == "section":
+                section_title = line
+            elif expect == "article" and article is not None:
+                article["article_title"] = line
+            expect = None
+            continue
+        m = _CHAPTER.match(line)
+        if m:
+            close_paragraph()
+            chapter, chapter_title, section, section_title = m.group(1), None, None, None
+            expect = "chapter"
+            continue
+        m = _SECTION.match(line)
+        if m:
+            close_paragraph()
+            section, section_title = int(m.group(1)), None
+            expect = "section"
+            continue
+        m = _ARTICLE.match(line)
+        if m:
+            close_paragraph()
+            article = {
+                "article": int(m.group(1)),
+                "article_title": None,
+                "chapter": chapter,
+                "chapter_title": chapter_title,
+                "section": section,
+                "section_title": section_title,
+                "paragraphs": [],
+            }
+            articles.append(article)
+            expect = "article"
+            continue
+        if article is None:
+            continue
+        m = _PARAGRAPH.match(line)
+        if m:
+            close_paragraph()
+            paragraph = {"id": int(m.group(1)), "lines": [line]}
+            continue
+        if paragraph is None:
+            paragraph = {"id": None, "lines": []}
+        paragraph["lines"].append(line)
+    close_paragraph()
+    return articles
+
+
+def chunk_gdpr_text(text: str, max_chars: int = MAX_CHUNK_CHARS, overlap: int = OVERLAP_CHARS,
+                    regulation: str = "GDPR", source: str = "gdpr.pdf") -> List[Dict[str, Any]]:
+    """Split the full text of the GDPR into structure-aware chunks.
+    Recitals and articles are chunked separately; a chunk never spans two articles
+    or two recitals. Returns a list of Qdrant-ready payload dicts with `text` plus
+    `article`/`recital` ids and chapter/section context.
+    """
+    text = normalize_text(text)
+    marker = _ENACTING_MARKER.search(text)
+    preamble, enacting = (text[:marker.start()], text[marker.end():]) if marker else ("", text)
+
+    chunks: List[Dict[str, Any]] = []
+
+    for rec in parse_recitals(preamble):
+        header = f"{regulation} Recital ({rec['recital']})"
+        for i, c in enumerate(pack_units([{"id": None, "text": rec["text"]}], header, max_chars, overlap)):
+            chunks.append({
+                "text": c["text"],
+                "regulation": regulation,
+                "source": source,
+                "kind": "recital",
+                "recital": rec["recital"],
+                "chunk_index": i,
+            })
+
+    for art in parse_articles(enacting):
+        if not art["paragraphs"]:
+            continue
+        header = f"{regulation} Article {art['article']}"
+        if art["article_title"]:
+            header += f" - {art['article_title']}"
+        for i, c in enumerate(pack_units(art["paragraphs"], header, max_chars, overlap)):
+            payload = {
+                "text": c["text"],
+                "regulation": regulation,
+                "source": source,
+                "kind": "article",
+                "article": art["article"],
+                "chunk_index": i,
+            }
+            if c["ids"]:
+                payload["paragraphs"] = c["ids"]
+            for key in ("article_title", "chapter", "chapter_title", "section", "section_title"):
+                if art[key] is not None:
+                    payload[key] = art[key]
+            chunks.append(payload)
+
+    return chunks
@@ -0,0 +1,6 @@
+from typing import Any
+
+
+def json_pointer(*parts: Any) -> str:
+    """JSON Pointer (RFC 6901) from path segments, e.g. for OPA JSON Patch operations."""
+    return ''.join('/' + str(p).replace('~', '~0').replace('/', '~1') for p in parts)
@@ -0,0 +1,276 @@
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are not serialised across processes
+    fcntl = None
+
+from src.jsonPointer import json_pointer
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), '..', 'static', 'data', 'db', 'privacy_ledger.jsonl')
+OPA_DATA_PATH = 'privacy_state'
+
+
+class BudgetExceeded(Exception):
+    """Raised when a reservation would exceed a project's epsilon/delta budget or a client's
+    contribution limit."""
+
+
+class PrivacyLedger:
+    """Differential-privacy budget ledger per project and client.
+
+    Every change is an event appended to a JSONL log (reserve, commit, release), which is the
+    source of truth; totals are kept in memory and rebuilt by replaying the log at startup.
+    Appends take an exclusive flock on the log and first replay anything other processes
+    appended, so the budget check and the append are atomic across workers.
+
+    A round reserves its (epsilon, delta) cost before aggregating and commits it afterwards
+    (or releases it on failure); reserved amounts count against the budget, so concurrent
+    rounds cannot overspend. A reservation expires `reservation_ttl` seconds after it was made
+    (PRIVACY_RESERVATION_TTL, default one hour), so one left behind by a crashed process does
+    not hold budget forever: the next writer appends a release event for it. Committing also increments each participant's contribution
+    count, read in O(1) by contributions(). After each change only the touched totals are
+    pushed to OPA (JSON Patch on data.privacy_state), when a publisher is given.
+    """
+
+    def __init__(self, path: Optional[str] = None, publisher=None,
+                 epsilon_budget: Optional[float] = None, delta_budget: Optional[float] = None,
+                 max_contributions: Optional[int] = None, reservation_ttl: Optional[float] = None):
+        self.path = os.path.abspath(path or os.getenv('PRIVACY_LEDGER_PATH') or DEFAULT_PATH)
+        self.publisher = publisher
+        self.epsilon_budget = epsilon_budget
+        self.delta_budget = delta_budget
+        self.max_contributions = max_contributions
+        self.reservation_ttl = float(reservation_ttl if reservation_ttl is not None
+                                     else os.getenv('PRIVACY_RESERVATION_TTL', '3600'))
+        self._lock = threading.RLock()
+        self._offset = 0
+        self._published = False
+        self._opa_projects = set()  # projects whose object exists in OPA data
+        self.projects: Dict[str, Dict[str, Any]] = {}
+        self.reservations: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            self._catch_up()
+
+    # --- replay ---
+
+    def _project(self, project_id: str) -> Dict[str, Any]:
+        if project_id not in self.projects:
+            self.projects[project_id] = {'epsilon_spent': 0.0, 'delta_spent': 0.0,
+                                         'epsilon_reserved': 0.0, 'delta_reserved': 0.0,
+                                         'rounds': 0, 'contribution_counts': {}}
+        return self.projects[project_id]
+
+    def _apply(self, event: Dict[str, Any]) -> Tuple[str, List[str]]:
+        """Apply one event to the totals; returns (project_id, clients whose counts changed)."""
+        kind = event.get('type')
+        if kind == 'reserve':
+            self.reservations[event['id']] = event
+            state = self._project(event['project_id'])
+            state['epsilon_reserved'] += event['epsilon']
+            state['delta_reserved'] += event['delta']
+            return event['project_id'], []
+        res = self.reservations.pop(event.get('id'), None)
+        if res is None:
+            return '', []
+        state = self._project(res['project_id'])
+        for key, amount in (('epsilon_reserved', res['epsilon']), ('delta_reserved', res['delta'])):
+            left = state[key] - amount
+            state[key] = left if left > 1e-9 * state[key] else 0.0  # drop float residue
+        if kind != 'commit':
+            return res['project_id'], []
+        state['epsilon_spent'] += res['epsilon']
+        state['delta_spent'] += res['delta']
+        state['rounds'] += 1
+        counts = state['contribution_counts']
+        for cid in res['clients']:
+            counts[cid] = counts.get(cid, 0) + 1
+        return res['project_id'], list(res['clients'])
+
+    def _catch_up(self) -> Dict[str, set]:
+        """Apply events appended since the last read (by this or another process)."""
+        changed: Dict[str, set] = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                f.seek(self._offset)
+                while True:
+                    line = f.readline()
+                    if not line.endswith('\n'):
+                        break  # end of file, or a partial line still being written
+                    self._offset = f.tell()
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        print(f"Warning: skipping malformed privacy ledger line at {self._offset}")
+                        continue
+                    project_id, clients = self._apply(event)
+                    if project_id:
+                        changed.setdefault(project_id, set()).update(clients)
+        except FileNotFoundError:
+            pass
+        return changed
+
+    def _expired(self, now: float) -> List[str]:
+        """Ids of open reservations past their expiry (events logged before expires_at existed
+        expire reservation_ttl after their timestamp)."""
+        return [rid for rid, res in self.reservations.items()
+                if res.get('expires_at', res.get('ts', now) + self.reservation_ttl) <= now]
+
+    def _write(self, f, events: List[Dict[str, Any]]):
+        now = time.time()
+        f.seek(0, os.SEEK_END)
+        f.write(''.join(json.dumps({**e, 'ts': now}, separators=(',', ':')) + '\n' for e in events))
+        f.flush()
+        os.fsync(f.fileno())
+
+    def _append(self, event: Optional[Dict[str, Any]], check=None) -> Dict[str, set]:
+        """Append an event under the file lock, after replaying other writers' events,
+        releasing expired reservations and running `check` (which may raise) against the
+        up-to-date totals. With event=None only the expired reservations are released."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        changed: Dict[str, set] = {}
+
+        def catch_up():
+            for project_id, clients in self._catch_up().items():
+                changed.setdefault(project_id, set()).update(clients)
+
+        with self._lock:
+            try:
+                with open(self.path, 'a+', encoding='utf-8') as f:
+                    if fcntl is not None:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                    try:
+                        catch_up()
+                        expired = self._expired(time.time())
+                        if expired:
+                            self._write(f, [{'type': 'release', 'id': rid, 'reason': 'expired'} for rid in expired])
+                            catch_up()
+                        if check is not None:
+                            check()
+                        if event is not None:
+                            self._write(f, [event])
+                            catch_up()
+                    finally:
+                        if fcntl is not None:
+                            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            finally:
+                # Also when check() raised: replayed events and expired releases are applied
+                self._publish(changed)
+            return changed
+
+    # --- budget operations ---
+
+    def reserve(self, project_id: str, round_number: int, epsilon: float, delta: float,
+                clients: Iterable[str]) -> str:
+        """Reserve a round's privacy cost; returns the reservation id. Raises BudgetExceeded."""
+        project_id = str(project_id)
+        clients = sorted({str(c) for c in clients})
+        if epsilon < 0 or delta < 0:
+            raise ValueError("epsilon and delta must be non-negative")
+
+        def check():
+            state = self._project(project_id)
+            if self.epsilon_budget is not None and \
+                    state['epsilon_spent'] + state['epsilon_reserved'] + epsilon > self.epsilon_budget + 1e-12:
+                raise BudgetExceeded(f"epsilon budget exhausted for project {project_id}")
+            if self.delta_budget is not None and \
+                    state['delta_spent'] + state['delta_reserved'] + delta > self.delta_budget + 1e-18:
+                raise BudgetExceeded(f"delta budget exhausted for project {project_id}")
+            if self.max_contributions is not None:
+                over = [c for c in clients if state['contribution_counts'].get(c, 0) >= self.max_contributions]
+                if over:
+                    raise BudgetExceeded(f"contribution limit reached for clients: {', '.join(over)}")
+
+        reservation_id = uuid.uuid4().hex
+        self._append({'type': 'reserve', 'id': reservation_id, 'project_id': project_id,
+                      'round': round_number, 'epsilon': float(epsilon), 'delta': float(delta),
+                      'clients': clients, 'expires_at': time.time() + self.reservation_ttl}, check=check)
+        return reservation_id
+
+    def commit(self, reservation_id: str):
+        """Turn a reservation into spent budget and count the round's contributions."""
+        def check():
+            if reservation_id not in self.reservations:
+                raise KeyError(f"unknown, expired or finished reservation {reservation_id}")
+        self._append({'type': 'commit', 'id': reservation_id}, check=check)
+
+    def release(self, reservation_id: str):
+        """Give back a reservation whose round was not aggregated."""
+        def check():
+            if reservation_id not in self.reservations:
+                raise KeyError(f"unknown, expired or finished reservation {reservation_id}")
+        self._append({'type': 'release', 'id': reservation_id}, check=check)
+
+    # --- reads ---
+
+    def refresh(self):
+        with self._lock:
+            changed = self._catch_up()
+            if self._expired(time.time()):
+                self._append(None)
+            self._publish(changed)
+
+    def publish(self):
+        """Replay the log and push the full data.privacy_state document to OPA, e.g. at startup
+        or before a policy decision that reads it (OPA may have restarted without it)."""
+        with self._lock:
+            self._catch_up()
+            self._published = False
+            if self._expired(time.time()):
+                self._append(None)  # publishes the full document, with the releases applied
+            else:
+                self._publish({})
+
+    def contributions(self, project_id: str, client_id: str) -> int:
+        with self._lock:
+            state = self.projects.get(str(project_id))
+            return state['contribution_counts'].get(str(client_id), 0) if state else 0
+
+    def totals(self, project_id: str) -> Dict[str, Any]:
+        with self._lock:
+            state = self.projects.get(str(project_id))
+            if state is None:
+                return {'epsilon_spent': 0.0, 'delta_spent': 0.0, 'epsilon_reserved': 0.0,
+                        'delta_reserved': 0.0, 'rounds': 0}
+            return {k: v for k, v in state.items() if k != 'contribution_counts'}
+
+    def opa_document(self) -> Dict[str, Any]:
+        """Full data.privacy_state document: {"projects": {id: totals + contribution_counts}}."""
+        with self._lock:
+            return {'projects': json.loads(json.dumps(self.projects))}
+
+    # --- OPA ---
+
+    def _publish(self, changed: Dict[str, set]):
+        if self.publisher is None or (self._published and not changed):
+            return
+        try:
+            if not self._published:
+                self.publisher.put_data(OPA_DATA_PATH, self.opa_document())
+                self._published = True
+                self._opa_projects = set(self.projects)
+                return
+            ops = []
+            for project_id, clients in changed.items():
+                state = self.projects[project_id]
+                base = ('projects', project_id)
+                if project_id not in self._opa_projects:
+                    ops.append({'op': 'add', 'path': json_pointer(*base), 'value': json.loads(json.dumps(state))})
+                    self._opa_projects.add(project_id)
+                    continue
+                for key in ('epsilon_spent', 'delta_spent', 'epsilon_reserved', 'delta_reserved', 'rounds'):
+                    ops.append({'op': 'add', 'path': json_pointer(*base, key), 'value': state[key]})
+                for cid in sorted(clients):
+                    ops.append({'op': 'add', 'path': json_pointer(*base, 'contribution_counts', cid),
+                                'value': state['contribution_counts'][cid]})
+            if ops:
+                self.publisher.patch_data(OPA_DATA_PATH, ops)
+        except Exception as e:
+            # Fall back to a full push next time
+            self._published = False
+            print(f"Warning: failed to publish privacy state to OPA: {e}")
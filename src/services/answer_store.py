@@ -0,0 +1,229 @@
+import gzip
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are not serialised across processes
+    fcntl = None
+
+COLLECTIONS = ('onboarding_answers', 'data_format_answers', 'data_format_expectations')
+DB_REL = 'static/data/db'
+SEGMENT_DIR = 'segments'
+INDEX_FILE = 'index.jsonl'
+MODES = ('files', 'segments')
+_TS = re.compile(r'(\d{8}T\d{6}Z)$')
+_UNSAFE = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+class AnswerStore:
+    """Storage for questionnaire submissions.
+
+    files     one pretty-printed JSON file per submission: <collection>/<key>.json (default)
+    segments  compact JSON records appended to <collection>/segments/<month|project>.jsonl.gz,
+              each record its own gzip member, with <collection>/segments/index.jsonl mapping
+              key -> (segment, offset, length). A read seeks to the offset and inflates one member.
+
+    Records are addressed by the same logical path in both modes
+    (static/data/db/<collection>/<key>.json), so `answers_file` / `data_answers_file` links in
+    onboarding_requests.json stay valid after switching modes or converting old files.
+    """
+
+    def __init__(self, base_dir: str, mode: Optional[str] = None, partition: Optional[str] = None):
+        self.base_dir = base_dir
+        self.mode = mode or os.getenv('ANSWER_STORE_MODE', 'files')
+        if self.mode not in MODES:
+            print(f"Warning: unknown ANSWER_STORE_MODE '{self.mode}', using 'files'")
+            self.mode = 'files'
+        self.partition = partition or os.getenv('ANSWER_STORE_PARTITION', 'month')
+        self._lock = threading.Lock()
+        # collection -> {'pos': bytes of index.jsonl consumed, 'entries': {key: (segment, offset, length)}}
+        self._indexes: Dict[str, Dict[str, Any]] = {}
+
+    # --- paths ---
+
+    def collection_dir(self, collection: str) -> str:
+        return os.path.join(self.base_dir, *DB_REL.split('/'), collection)
+
+    def _segment_dir(self, collection: str) -> str:
+        return os.path.join(self.collection_dir(collection), SEGMENT_DIR)
+
+    def link(self, collection: str, key: str) -> str:
+        """Logical path of a record, relative to base_dir (stored in request records)."""
+        return f"{DB_REL}/{collection}/{key}.json"
+
+    def parse_link(self, rel_path: str) -> Optional[Tuple[str, str]]:
+        """(collection, key) for a link into one of the answer collections, else None."""
+        parts = (rel_path or '').replace('\\', '/').rsplit('/', 2)
+        if len(parts) == 3 and parts[0] == DB_REL and parts[1] in COLLECTIONS and parts[2].endswith('.json'):
+            return parts[1], parts[2][:-5]
+        return None
+
+    def _segment_name(self, key: str, payload: Dict[str, Any]) -> str:
+        if self.partition == 'project' and payload.get('project_id'):
+            return _UNSAFE.sub('_', str(payload['project_id'])) + '.jsonl.gz'
+        m = _TS.search(str(payload.get('submitted_at') or '')) or _TS.search(key)
+        month = f"{m.group(1)[:4]}-{m.group(1)[4:6]}" if m else 'undated'
+        return f"{month}.jsonl.gz"
+
+    # --- index ---
+
+    def _index(self, collection: str) -> Dict[str, Tuple[str, int, int]]:
+        """Index entries, reading only the lines appended since the last call."""
+        path = os.path.join(self._segment_dir(collection), INDEX_FILE)
+        with self._lock:
+            state = self._indexes.setdefault(collection, {'pos': 0, 'entries': {}})
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                state['pos'], state['entries'] = 0, {}
+                return state['entries']
+            if size < state['pos']:
+                state['pos'], state['entries'] = 0, {}
+            if size > state['pos']:
+                with open(path, 'rb') as f:
+                    f.seek(state['pos'])
+                    chunk = f.read(size - state['pos'])
+                # Only consume complete lines; a concurrent writer may be mid-append
+                end = chunk.rfind(b'\n') + 1
+                for line in chunk[:end].splitlines():
+                    try:
+                        e = json.loads(line)
+                        state['entries'][e['key']] = (e['segment'], int(e['offset']), int(e['length']))
+                    except Exception:
+                        continue
+                state['pos'] += end
+            return state['entries']
+
+    # --- write ---
+
+    def save(self, collection: str, key: str, payload: Dict[str, Any]) -> str:
+        """Persist one submission and return its link. Raises on I/O errors."""
+        if self.mode == 'files':
+            os.makedirs(self.collection_dir(collection), exist_ok=True)
+            path = os.path.join(self.collection_dir(collection), f"{key}.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, ensure_ascii=False, indent=2)
+        else:
+            self._append(collection, key, payload)
+        return self.link(collection, key)
+
+    def _append(self, collection: str, key: str, payload: Dict[str, Any]):
+        seg_dir = self._segment_dir(collection)
+        os.makedirs(seg_dir, exist_ok=True)
+        segment = self._segment_name(key, payload)
+        member = gzip.compress(json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), mtime=0)
+        # The index file doubles as the per-collection lock so concurrent workers
+        # never interleave writes to a segment or record a wrong offset.
+        with open(os.path.join(seg_dir, INDEX_FILE), 'ab') as idx:
+            if fcntl is not None:
+                fcntl.flock(idx.fileno(), fcntl.LOCK_EX)
+            try:
+                with open(os.path.join(seg_dir, segment), 'ab') as seg:
+                    seg.seek(0, os.SEEK_END)
+                    offset = seg.tell()
+                    seg.write(member)
+                    seg.flush()
+                    os.fsync(seg.fileno())
+                entry = {'key': key, 'segment': segment, 'offset': offset, 'length': len(member)}
+                idx.write((json.dumps(entry, separators=(',', ':')) + '\n').encode('utf-8'))
+                idx.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(idx.fileno(), fcntl.LOCK_UN)
+
+    # --- read ---
+
+    def load(self, collection: str, key: str) -> Optional[Dict[str, Any]]:
+        """Load a record by key from its JSON file or, failing that, its segment."""
+        path = os.path.join(self.collection_dir(collection), f"{key}.json")
+        if os.path.isfile(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        loc = self._index(collection).get(key)
+        if loc is None:
+            return None
+        segment, offset, length = loc
+        with open(os.path.join(self._segment_dir(collection), segment), 'rb') as f:
+            f.seek(offset)
+            return json.loads(gzip.decompress(f.read(length)).decode('utf-8'))
+
+    def exists(self, collection: str, key: str) -> bool:
+        return (os.path.isfile(os.path.join(self.collection_dir(collection), f"{key}.json"))
+                or key in self._index(collection))
+
+    def resolve(self, rel_path: str) -> Optional[Dict[str, Any]]:
+        """Load the record behind an `answers_file`-style link (None if it does not exist)."""
+        target = self.parse_link(rel_path)
+        if target is not None:
+            return self.load(*target)
+        abs_path = os.path.join(self.base_dir, (rel_path or '').replace('/', os.sep))
+        if rel_path and os.path.isfile(abs_path):
+            with open(abs_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return None
+
+    def link_exists(self, rel_path: str) -> bool:
+        target = self.parse_link(rel_path)
+        if target is not None:
+            return self.exists(*target)
+        return bool(rel_path) and os.path.isfile(os.path.join(self.base_dir, rel_path.replace('/', os.sep)))
+
+    def is_plain_file(self, rel_path: str) -> bool:
+        """True when the link points to a real file (e.g. servable from /static)."""
+        return bool(rel_path) and os.path.isfile(os.path.join(self.base_dir, rel_path.replace('/', os.sep)))
+
+    def keys(self, collection: str, prefix: str = '') -> List[str]:
+        """All record keys with the given prefix, in both storage forms, sorted ascending."""
+        found = set(k for k in self._index(collection) if k.startswith(prefix))
+        directory = self.collection_dir(collection)
+        if os.path.isdir(directory):
+            found.update(f[:-5] for f in os.listdir(directory) if f.startswith(prefix) and f.endswith('.json'))
+        return sorted(found)
+
+    def latest(self, collection: str, prefix: str) -> Optional[str]:
+        """Key of the newest record with prefix (keys end in a sortable UTC timestamp)."""
+        keys = self.keys(collection, prefix)
+        return keys[-1] if keys else None
+
+    # --- conversion ---
+
+    def convert(self, collection: str, remove: bool = False) -> Dict[str, int]:
+        """Append every legacy <key>.json of a collection to segments (skipping keys already
+        indexed). With remove=True the JSON files are deleted once their record is indexed;
+        links keep resolving through the index."""
+        directory = self.collection_dir(collection)
+        stats = {'converted': 0, 'skipped': 0, 'removed': 0, 'bytes_before': 0, 'bytes_after': 0}
+        if not os.path.isdir(directory):
+            return stats
+        indexed = self._index(collection)
+        for fname in sorted(f for f in os.listdir(directory) if f.endswith('.json')):
+            key = fname[:-5]
+            path = os.path.join(directory, fname)
+            if key in indexed:
+                stats['skipped'] += 1
+            else:
+                with open(path, 'r', encoding='utf-8') as f:
+                    payload = json.load(f)
+                self._append(collection, key, payload)
+                stats['converted'] += 1
+                stats['bytes_before'] += os.path.getsize(path)
+                stats['bytes_after'] += self._index(collection)[key][2]
+            if remove:
+                os.remove(path)
+                stats['removed'] += 1
+        return stats
+
+
+_stores: Dict[str, AnswerStore] = {}
+
+
+def get_store(base_dir: str) -> AnswerStore:
+    """Process-wide store for an application root (mode and partition from the environment)."""
+    store = _stores.get(base_dir)
+    if store is None:
+        store = _stores.setdefault(base_dir, AnswerStore(base_dir))
+    return store
@@ -0,0 +1,220 @@
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Context windows (tokens) by model prefix; the effective budget is the smaller of the
+# window minus the reserved output and ASSISTANT_CONTEXT_BUDGET.
+MODEL_CONTEXT_WINDOWS = {
+    'gpt-5': 400000,
+    'gpt-4.1': 1000000,
+    'gpt-4o': 128000,
+    'gpt-4': 8192,
+    'claude': 200000,
+}
+DEFAULT_CONTEXT_WINDOW = 128000
+DEFAULT_BUDGET = 16000
+DEFAULT_MAX_OUTPUT_TOKENS = 2000
+
+# Share of the budget left after system prompt + user message that each block may use
+# before spilling into the next one. History receives whatever is left.
+SOURCES_SHARE = 0.45
+EXTRA_CONTEXT_SHARE = 0.25
+SUMMARY_SHARE = 0.10
+
+MAX_HISTORY_TURNS = 200
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+
+
+_encodings: Dict[str, Any] = {}
+
+
+def _openai_encoding(model: str):
+    """tiktoken encoding for a model (imported on first use; None if tiktoken is missing)."""
+    if model not in _encodings:
+        try:
+            import tiktoken
+        except Exception:
+            _encodings[model] = None
+            return None
+        try:
+            _encodings[model] = tiktoken.encoding_for_model(model)
+        except Exception:
+            try:
+                _encodings[model] = tiktoken.get_encoding('o200k_base')
+            except Exception:
+                _encodings[model] = None
+    return _encodings[model]
+
+
+class TokenCounter:
+    """Counts tokens for a provider/model. Uses tiktoken for OpenAI models when it is
+    installed and a characters-per-token approximation otherwise (Anthropic does not
+    ship a local tokenizer).
+    """
+
+    def __init__(self, provider: str, model: str):
+        self.provider = provider
+        self.model = model
+        self._enc = None
+        if provider == 'openai':
+            self._enc = _openai_encoding(model)
+        self.chars_per_token = 3.5 if provider == 'anthropic' else 4.0
+        self.method = 'tiktoken' if self._enc is not None else 'approx'
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._enc is not None:
+            return len(self._enc.encode(text, disallowed_special=()))
+        return int(len(text) / self.chars_per_token) + 1
+
+    def count_message(self, message: Dict[str, Any]) -> int:
+        # ~4 tokens of role/formatting overhead per message
+        return self.count(message.get('content') or '') + 4
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ''
+        if self.count(text) <= max_tokens:
+            return text
+        if self._enc is not None:
+            return self._enc.decode(self._enc.encode(text, disallowed_special=())[:max_tokens])
+        return text[:int(max_tokens * self.chars_per_token)]
+
+
+def context_window(model: str) -> int:
+    model = (model or '').lower()
+    for prefix in sorted(MODEL_CONTEXT_WINDOWS, key=len, reverse=True):
+        if model.startswith(prefix):
+            return MODEL_CONTEXT_WINDOWS[prefix]
+    return DEFAULT_CONTEXT_WINDOW
+
+
+def summarize_turns(turns: List[Dict[str, str]], max_words: int = 30) -> str:
+    """Extractive summary of older turns: the first sentence of each, capped at max_words."""
+    lines = []
+    for t in turns:
+        first = _SENTENCE.split((t.get('content') or '').strip(), 1)[0]
+        words = first.split()
+        if not words:
+            continue
+        snippet = ' '.join(words[:max_words]) + (' ...' if len(words) > max_words else '')
+        lines.append(f"- {'User' if t.get('role') == 'user' else 'Assistant'}: {snippet}")
+    return '\n'.join(lines)
+
+
+def build_context(system_prompt: str, user_message: str, history: List[Dict[str, str]],
+                  sources: List[Dict[str, Any]], extra_context: str, provider: str, model: str,
+                  budget: Optional[int] = None, max_output_tokens: Optional[int] = None) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+    """Assemble the chat messages within a token budget.
+    Priority: system prompt and current user message are always kept; then retrieved
+    sources (in rank order), extra context, and history (newest first). History turns that
+    no longer fit are folded into a short summary. Returns (messages, usage breakdown).
+    """
+    counter = TokenCounter(provider, model)
+    max_output_tokens = max_output_tokens or int(os.getenv('ASSISTANT_MAX_OUTPUT_TOKENS', DEFAULT_MAX_OUTPUT_TOKENS))
+    configured = budget or int(os.getenv('ASSISTANT_CONTEXT_BUDGET', DEFAULT_BUDGET))
+    budget = max(min(configured, context_window(model) - max_output_tokens), 1024)
+
+    system_msg = {"role": "system", "content": system_prompt}
+    used_system = counter.count_message(system_msg)
+    user_msg = None
+    used_user = 0
+    if user_message:
+        user_msg = {"role": "user", "content": counter.truncate(user_message, max(budget // 2, 256))}
+        used_user = counter.count_message(user_msg)
+    available = max(budget - used_system - used_user, 0)
+    left = available
+
+    # Retrieved sources, each kept whole if possible, the last one trimmed to fit
+    sources_cap = min(int(available * SOURCES_SHARE), left)
+    source_parts, used_sources, dropped_sources = [], 0, 0
+    header = "Relevant retrieved context:\n"
+    for i, c in enumerate(sources or []):
+        room = sources_cap - used_sources - (counter.count(header) if not source_parts else 0)
+        part = f"Source {i+1}: {c.get('text', '')}"
+        cost = counter.count(part) + 2
+        if cost > room:
+            if room > 64:
+                part = counter.truncate(part, room - 2)
+                cost = counter.count(part) + 2
+            else:
+                dropped_sources += 1
+                continue
+        source_parts.append(part)
+        used_sources += cost
+    sources_msg = None
+    if source_parts:
+        sources_msg = {"role": "system", "content": header + "\n\n".join(source_parts)}
+        used_sources = counter.count_message(sources_msg)
+    left -= used_sources
+
+    # Extra questionnaire/specification context, truncated to its share
+    extra_msg = None
+    used_extra = 0
+    truncated_extra = False
+    if extra_context:
+        extra_cap = min(int(available * EXTRA_CONTEXT_SHARE) + max(sources_cap - used_sources, 0), left)
+        prefix = "Additional questionnaire/specification context provided by the user:\n"
+        body_cap = extra_cap - counter.count(prefix) - 4
+        if body_cap > 32:
+            body = counter.truncate(extra_context, body_cap)
+            truncated_extra = len(body) < len(extra_context)
+            extra_msg = {"role": "system", "content": prefix + body}
+            used_extra = counter.count_message(extra_msg)
+    left -= used_extra
+
+    # History: newest turns verbatim, older ones summarised
+    turns = [m for m in (history or [])[-MAX_HISTORY_TURNS:]
+             if isinstance(m, dict) and m.get('role') in ('user', 'assistant') and isinstance(m.get('content'), str)]
+    summary_cap = int(available * SUMMARY_SHARE) if len(turns) > 1 else 0
+    history_cap = max(left - summary_cap, 0)
+    kept: List[Dict[str, str]] = []
+    used_history = 0
+    for m in reversed(turns):
+        cost = counter.count_message(m)
+        if used_history + cost > history_cap:
+            break
+        kept.append({"role": m['role'], "content": m['content']})
+        used_history += cost
+    kept.reverse()
+    older = turns[:len(turns) - len(kept)]
+    left -= used_history
+
+    summary_msg = None
+    used_summary = 0
+    if older:
+        summary = summarize_turns(older)
+        if summary:
+            prefix = f"Summary of {len(older)} earlier conversation turns:\n"
+            body = counter.truncate(summary, left - counter.count(prefix) - 4)
+            if body:
+                summary_msg = {"role": "system", "content": prefix + body}
+                used_summary = counter.count_message(summary_msg)
+
+    messages = [system_msg]
+    for m in (sources_msg, extra_msg, summary_msg):
+        if m is not None:
+            messages.append(m)
+    messages.extend(kept)
+    if user_msg is not None:
+        messages.append(user_msg)
+
+    usage = {
+        'budget': budget,
+        'max_output_tokens': max_output_tokens,
+        'counter': counter.method,
+        'system': used_system,
+        'sources': used_sources,
+        'extra_context': used_extra,
+        'history_summary': used_summary,
+        'history': used_history,
+        'user': used_user,
+        'total': used_system + used_sources + used_extra + used_summary + used_history + used_user,
+        'sources_included': len(source_parts),
+        'sources_dropped': dropped_sources,
+        'extra_context_truncated': truncated_extra,
+        'history_turns_included': len(kept),
+        'history_turns_summarized': len(older),
+    }
+    return messages, usage
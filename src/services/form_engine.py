@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+SCHEMA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'static', 'data', 'schemas')
+
+# Questionnaire name -> (input schema file, how answers are shaped into the stored object)
+#   nested:   dotted ids become nested objects; values are coerced to the schema type
+#   grouped:  first id segment is the group (schema top-level keys), the rest is kept as one key
+#   prefixed: ids under `expect.` are nested below the prefix, anything else goes to meta
+FORM_SHAPES = {
+    'onboarding': ('onboarding_input_schema.json', 'nested'),
+    'data_format': ('data_format_input_schema.json', 'grouped'),
+    'data_format_expectations': ('data_format_expectations_input_schema.json', 'prefixed'),
+}
+EXPECT_PREFIX = 'expect'
+LIST_TYPES = ('multiselect', 'checklist')
+
+
+def yn_to_bool(v):
+    s = str(v).strip().lower()
+    return True if s in ("yes", "true", "1") else False if s in ("no", "false", "0") else None
+
+
+def _as_list(v):
+    return v or []
+
+
+def _or_none(v):
+    return v or None
+
+
+def _identity(v):
+    return v
+
+
+def schema_node(schema: Dict[str, Any], path: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+    """Follow `properties` along path; None if the schema does not describe it."""
+    node = schema
+    for p in path:
+        props = node.get('properties') if isinstance(node, dict) else None
+        if not isinstance(props, dict) or p not in props:
+            return None
+        node = props[p]
+    return node
+
+
+def _coercer(node: Optional[Dict[str, Any]]) -> Callable[[Any], Any]:
+    t = (node or {}).get('type')
+    types = t if isinstance(t, list) else [t]
+    if 'boolean' in types and 'string' not in types:
+        return yn_to_bool
+    if 'array' in types:
+        return _as_list
+    return _or_none
+
+
+def _extractor(field) -> Callable[[Any], Any]:
+    """Reader for one field of a submitted form (werkzeug MultiDict or plain dict of lists)."""
+    key = field.form_key
+    other_key = key + '__other'
+    if field.type in LIST_TYPES:
+        def read(form):
+            vals = form.getlist(key)
+            other_val = form.get(other_key, '').strip() if field.other_option else ''
+            if other_val:
+                vals.append(other_val)
+            return vals
+    elif field.type == 'radio' and field.other_option:
+        def read(form):
+            val = form.get(key, '').strip()
+            # Free text without a selected option counts as choosing "Other"
+            if not val and form.get(other_key, '').strip():
+                return 'Other'
+            return val
+    else:
+        def read(form):
+            return form.get(key, '').strip()
+    return read
+
+
+def _other_extractor(field) -> Optional[Callable[[Any], str]]:
+    """Free-text 'other' reader for radio questions; stored next to the answer, since the
+    answer itself must stay one of the schema's enum values."""
+    if field.type != 'radio' or not field.other_option:
+        return None
+    other_key = field.form_key + '__other'
+    return lambda form: form.get(other_key, '').strip()
+
+
+class CompiledForm:
+    """A questionnaire compiled for one shape: a flat list of
+    (answer id, extractor, target path, coercion, 'other' extractor) steps run once per submission."""
+
+    def __init__(self, name: str, fields, schema: Dict[str, Any], shape: str):
+        self.name = name
+        self.shape = shape
+        self.unmapped: List[str] = []
+        self.skeleton: Tuple[str, ...] = ()
+        if shape == 'grouped':
+            self.skeleton = tuple((schema.get('properties') or {}).keys()) or ('meta',)
+        steps = []
+        for f in fields:
+            path, coerce = self._plan(f.id, schema, shape)
+            steps.append((f.id, _extractor(f), path, coerce, _other_extractor(f)))
+        self.steps = tuple(steps)
+
+    def _plan(self, qid: str, schema: Dict[str, Any], shape: str):
+        parts = tuple(qid.split('.'))
+        if shape == 'nested':
+            node = schema_node(schema, parts)
+            if node is None:
+                self.unmapped.append(qid)
+            return parts, _coercer(node)
+        if shape == 'grouped':
+            grp, _, rest = qid.partition('.')
+            path = (grp, rest) if rest and grp in self.skeleton else ('meta', qid)
+        else:
+            path = parts[1:] if len(parts) >= 3 and parts[0] == EXPECT_PREFIX else ('meta', qid)
+        if path[0] != 'meta' and schema_node(schema, path) is None:
+            self.unmapped.append(qid)
+        return path, _identity
+
+    def parse(self, form) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Return (flat answers by question id, structured object for the input schema)."""
+        answers: Dict[str, Any] = {}
+        structured: Dict[str, Any] = {grp: {} for grp in self.skeleton}
+        for qid, read, path, coerce, read_other in self.steps:
+            val = read(form)
+            answers[qid] = val
+            if read_other is not None:
+                other_val = read_other(form)
+                if other_val:
+                    answers[qid + '__other'] = other_val
+            node = structured
+            for p in path[:-1]:
+                node = node.setdefault(p, {})
+            node[path[-1]] = coerce(val)
+        return answers, structured
+
+
+class FormEngine:
+    """Compiles each questionnaire from the registry once (again only after the registry
+    reloads a changed file) and parses submissions with the compiled plan.
+    Input schemas are read once; ids the schema does not describe are reported at compile time.
+    """
+
+    def __init__(self, registry, schema_dir: str = SCHEMA_DIR, shapes: Dict[str, Tuple[str, str]] = None):
+        self.registry = registry
+        self.schema_dir = schema_dir
+        self.shapes = shapes or FORM_SHAPES
+        self.schemas = {name: self._load_schema(name) for name in self.shapes}
+        self._compiled: Dict[str, Tuple[Any, CompiledForm]] = {}
+        self._lock = threading.Lock()
+
+    def _load_schema(self, name: str) -> Dict[str, Any]:
+        path = os.path.join(self.schema_dir, self.shapes[name][0])
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Warning: could not load input schema for '{name}': {e}")
+            return {}
+
+    def compiled(self, name: str) -> CompiledForm:
+        fields = self.registry.fields(name)
+        with self._lock:
+            cached = self._compiled.get(name)
+            if cached is not None and cached[0] is fields:
+                return cached[1]
+            form = CompiledForm(name, fields, self.schemas[name], self.shapes[name][1])
+            if form.unmapped:
+                print(f"Warning: questionnaire '{name}' has answers not described by its input schema: {', '.join(form.unmapped)}")
+            self._compiled[name] = (fields, form)
+            return form
+
+    def compile_all(self):
+        for name in self.shapes:
+            self.compiled(name)
+
+    def parse(self, name: str, form) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        return self.compiled(name).parse(form)
@@ -1,7 +1,7 @@
-import json
-import os
 from typing import Any, Dict, Tuple
 
+from src.services.answer_store import get_store
+
 
 def _flatten_input_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
     """Flatten payload['input'] if present, otherwise return payload.get('answers', {})."""
@@ -30,10 +30,8 @@ def load_flat_answers_for_request(rec: Dict[str, Any], base_dir: str) -> Tuple[D
     if not rel_path:
         return answers, None
     try:
-        abs_path = os.path.join(base_dir, rel_path.replace('/', os.sep))
-        with open(abs_path, 'r', encoding='utf-8') as f:
-            payload = json.load(f)
-        answers = _flatten_input_payload(payload)
+        payload = get_store(base_dir).resolve(rel_path)
+        answers = _flatten_input_payload(payload or {})
         return answers, rel_path
     except Exception:
         return {}, rel_path
@@ -0,0 +1,183 @@
+import bisect
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text: Any) -> List[str]:
+    if isinstance(text, (list, tuple)):
+        return [t for item in text for t in tokenize(item)]
+    return _TOKEN.findall(str(text or '').lower())
+
+
+def _indexed_text(project: Dict[str, Any]) -> List[Any]:
+    fdp = project.get('fdp') if isinstance(project.get('fdp'), dict) else {}
+    return [
+        project.get('title'),
+        project.get('tags') or [],
+        fdp.get('study_objective'),
+        fdp.get('data_types_required') or [],
+        fdp.get('data_sensitivity_level'),
+    ]
+
+
+def _sensitivity(project: Dict[str, Any]) -> Optional[str]:
+    fdp = project.get('fdp') if isinstance(project.get('fdp'), dict) else {}
+    return fdp.get('data_sensitivity_level') or None
+
+
+class ProjectSearchIndex:
+    """In-memory inverted index over the project catalog for the explore page.
+
+    Terms come from the title, tags, FDP study objective, required data types and sensitivity
+    level. Query terms are ANDed and each matches as a prefix (bisect over the sorted
+    vocabulary), so partially typed words find results. Tag and sensitivity facets are kept as
+    posting sets. Results keep catalog order and are paged with an offset cursor.
+    Maintained by the create, edit and delete handlers via add/update/remove.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seq = 0
+        self.projects: Dict[str, Dict[str, Any]] = {}
+        self._order: Dict[str, int] = {}
+        self._terms: Dict[str, Set[str]] = {}       # term -> project ids
+        self._vocabulary: Optional[List[str]] = []  # sorted terms, for prefix lookups
+        # Indexed values per project: handlers edit project dicts in place, so removal must
+        # not re-derive them from the (already changed) project
+        self._doc_terms: Dict[str, Set[str]] = {}
+        self._doc_tags: Dict[str, Set[str]] = {}
+        self._doc_sensitivity: Dict[str, Optional[str]] = {}
+        self._tags: Dict[str, Set[str]] = {}
+        self._sensitivity: Dict[str, Set[str]] = {}
+
+    def build(self, projects: Iterable[Dict[str, Any]]):
+        with self._lock:
+            self._seq = 0
+            self.projects, self._order, self._terms, self._doc_terms = {}, {}, {}, {}
+            self._doc_tags, self._doc_sensitivity, self._tags, self._sensitivity = {}, {}, {}, {}
+            self._vocabulary = None  # sorted once after the bulk load
+            for p in projects:
+                self._add(p)
+            self._vocabulary = sorted(self._terms)
+
+    # --- maintenance ---
+
+    def _add(self, project: Dict[str, Any], seq: Optional[int] = None):
+        pid = str(project.get('id'))
+        self.projects[pid] = project
+        if seq is None:
+            seq, self._seq = self._seq, self._seq + 1
+        self._order[pid] = seq
+        terms = set(tokenize(_indexed_text(project)))
+        self._doc_terms[pid] = terms
+        for term in terms:
+            if term not in self._terms:
+                self._terms[term] = set()
+                if self._vocabulary is not None:
+                    bisect.insort(self._vocabulary, term)
+            self._terms[term].add(pid)
+        tags = {str(t).lower() for t in (project.get('tags') or [])}
+        self._doc_tags[pid] = tags
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(pid)
+        level = _sensitivity(project)
+        self._doc_sensitivity[pid] = level
+        if level:
+            self._sensitivity.setdefault(level, set()).add(pid)
+
+    def _remove(self, pid: str) -> Optional[int]:
+        project = self.projects.pop(pid, None)
+        if project is None:
+            return None
+        for term in self._doc_terms.pop(pid, set()):
+            postings = self._terms.get(term)
+            if postings is None:
+                continue
+            postings.discard(pid)
+            if not postings:
+                del self._terms[term]
+                i = bisect.bisect_left(self._vocabulary, term)
+                if i < len(self._vocabulary) and self._vocabulary[i] == term:
+                    del self._vocabulary[i]
+        tags = self._doc_tags.pop(pid, set())
+        for facet, values in ((self._tags, tags), (self._sensitivity, {self._doc_sensitivity.pop(pid, None)})):
+            for value in values:
+                ids = facet.get(value)
+                if ids is not None:
+                    ids.discard(pid)
+                    if not ids:
+                        del facet[value]
+        return self._order.pop(pid, None)
+
+    def add(self, project: Dict[str, Any]):
+        with self._lock:
+            self._add(project)
+
+    def update(self, project: Dict[str, Any]):
+        """Re-index an edited project, keeping its position."""
+        with self._lock:
+            seq = self._remove(str(project.get('id')))
+            self._add(project, seq)
+
+    def remove(self, project_id: Any):
+        with self._lock:
+            self._remove(str(project_id))
+
+    # --- queries ---
+
+    def _match_term(self, prefix: str) -> Set[str]:
+        ids: Set[str] = set()
+        i = bisect.bisect_left(self._vocabulary, prefix)
+        while i < len(self._vocabulary) and self._vocabulary[i].startswith(prefix):
+            ids |= self._terms[self._vocabulary[i]]
+            i += 1
+        return ids
+
+    def search(self, q: str = '', tags: Iterable[str] = (), sensitivity: Iterable[str] = (),
+               exclude: Iterable[str] = (), limit: int = DEFAULT_LIMIT, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """One page of projects matching the text query and facet filters.
+        `tags` are ANDed, `sensitivity` levels ORed; `exclude` drops project ids (e.g. the
+        user's own). Returns {'items', 'total', 'facets': {'tag', 'sensitivity'}, 'next_cursor'}.
+        """
+        limit = max(1, min(int(limit or DEFAULT_LIMIT), MAX_LIMIT))
+        try:
+            offset = max(0, int(cursor)) if cursor else 0
+        except (TypeError, ValueError):
+            raise ValueError("invalid cursor")
+        tags = [str(t).lower() for t in tags if t]
+        sensitivity = [s for s in sensitivity if s]
+
+        with self._lock:
+            matches: Optional[Set[str]] = None
+            for term in sorted(set(tokenize(q)), key=len, reverse=True):
+                ids = self._match_term(term)
+                matches = ids if matches is None else matches & ids
+                if not matches:
+                    break
+            if matches is None:
+                matches = set(self.projects)
+            matches = matches - set(str(e) for e in exclude)
+            for tag in tags:
+                matches &= self._tags.get(tag, set())
+            if sensitivity:
+                matches &= set().union(*(self._sensitivity.get(s, set()) for s in sensitivity))
+
+            facets = {
+                'tag': {t: len(ids & matches) for t, ids in self._tags.items() if ids & matches},
+                'sensitivity': {s: len(ids & matches) for s, ids in self._sensitivity.items() if ids & matches},
+            }
+            ordered = sorted(matches, key=self._order.__getitem__)
+            page = [self.projects[pid] for pid in ordered[offset:offset + limit]]
+        return {
+            'items': page,
+            'total': len(ordered),
+            'facets': {name: dict(sorted(counts.items(), key=lambda kv: (-kv[1], kv[0])))
+                       for name, counts in facets.items()},
+            'next_cursor': str(offset + limit) if offset + limit < len(ordered) else None,
+        }
@@ -0,0 +1,176 @@
+import copy
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+QUESTIONNAIRE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'static', 'data', 'questionnairs')
+
+# Registry name -> (file name, fallback title used when the file is missing or invalid)
+QUESTIONNAIRES = {
+    'onboarding': ('onboarding_questionnaire.json', 'Onboarding Questionnaire'),
+    'data_format': ('data_format_questionnaire.json', 'Data Format Questionnaire'),
+    'data_format_expectations': ('data_format_expectations_questionnaire.json', 'Expected Data Formats'),
+    'new_project': ('new_project_questionnaire.json', 'New FDP Project'),
+}
+
+QUESTION_TYPES = ('text', 'email', 'textarea', 'radio', 'multiselect', 'select', 'checklist')
+CHOICE_TYPES = ('radio', 'multiselect', 'select', 'checklist')
+
+
+class Field(NamedTuple):
+    """Precomputed per-question data used to read a submitted form."""
+    id: str
+    form_key: str
+    type: str
+    other_option: bool
+    required: bool
+
+
+def form_key_for(question: Dict[str, Any]) -> str:
+    """HTML field name: explicit `name`, otherwise the id with '.' replaced by '__'."""
+    return question.get('name') or question['id'].replace('.', '__')
+
+
+def validate_questionnaire(data: Any) -> List[str]:
+    """Structural checks for a questionnaire definition. Returns a list of problems (empty if valid)."""
+    errors: List[str] = []
+    if not isinstance(data, dict):
+        return ['questionnaire must be a JSON object']
+    sections = data.get('sections')
+    if not isinstance(sections, list):
+        return ['"sections" must be a list']
+    seen_ids = set()
+    seen_keys = set()
+    for s_idx, section in enumerate(sections):
+        where = f"sections[{s_idx}]"
+        if not isinstance(section, dict):
+            errors.append(f"{where} must be an object")
+            continue
+        questions = section.get('questions', [])
+        if not isinstance(questions, list):
+            errors.append(f"{where}.questions must be a list")
+            continue
+        for q_idx, q in enumerate(questions):
+            qwhere = f"{where}.questions[{q_idx}]"
+            if not isinstance(q, dict) or not isinstance(q.get('id'), str) or not q.get('id'):
+                errors.append(f"{qwhere} must have a string id")
+                continue
+            qid = q['id']
+            if qid in seen_ids:
+                errors.append(f"{qwhere}: duplicate id '{qid}'")
+            seen_ids.add(qid)
+            key = form_key_for(q)
+            if key in seen_keys:
+                errors.append(f"{qwhere}: duplicate form key '{key}'")
+            seen_keys.add(key)
+            qtype = q.get('type', 'text')
+            if qtype not in QUESTION_TYPES:
+                errors.append(f"{qwhere} ('{qid}'): unknown type '{qtype}'")
+            if qtype in CHOICE_TYPES and not isinstance(q.get('options'), list):
+                errors.append(f"{qwhere} ('{qid}'): '{qtype}' question needs an options list")
+    return errors
+
+
+def compile_fields(definition: Dict[str, Any]) -> Tuple[Field, ...]:
+    fields = []
+    for section in definition.get('sections', []):
+        for q in section.get('questions', []):
+            fields.append(Field(
+                id=q['id'],
+                form_key=q['form_key'],
+                type=q.get('type', 'text'),
+                other_option=bool(q.get('otherOption')),
+                required=bool(q.get('required')),
+            ))
+    return tuple(fields)
+
+
+class QuestionnaireRegistry:
+    """Loads and validates every questionnaire definition once and serves them from memory.
+    Each question gets a precomputed `form_key`; `fields(name)` returns the flat field list
+    used by the form parsers. Files are re-stat'ed at most every `check_interval` seconds
+    and reloaded when they change; an invalid edit keeps the last good version.
+    """
+
+    def __init__(self, directory: str = QUESTIONNAIRE_DIR, files: Dict[str, Tuple[str, str]] = None,
+                 check_interval: float = 2.0):
+        self.directory = directory
+        self.files = files or QUESTIONNAIRES
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._last_check = 0.0
+        self.errors: Dict[str, List[str]] = {}
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, self.files[name][0])
+
+    def _fallback(self, name: str) -> Dict[str, Any]:
+        return {"title": self.files[name][1], "sections": []}
+
+    def _load(self, name: str, mtime: Optional[float]):
+        path = self._path(name)
+        previous = self._entries.get(name)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            problems = validate_questionnaire(data)
+        except FileNotFoundError:
+            data, problems = None, [f"{path} not found"]
+        except ValueError as e:
+            data, problems = None, [f"{path}: invalid JSON ({e})"]
+        if problems:
+            self.errors[name] = problems
+            print(f"Warning: questionnaire '{name}' failed validation: {'; '.join(problems)}")
+            definition = previous['definition'] if previous else self._fallback(name)
+        else:
+            self.errors.pop(name, None)
+            definition = copy.deepcopy(data)
+            for section in definition.get('sections', []):
+                for q in section.get('questions', []):
+                    q['form_key'] = form_key_for(q)
+        self._entries[name] = {
+            'mtime': mtime,
+            'definition': definition,
+            'fields': compile_fields(definition),
+        }
+
+    def _mtime(self, name: str) -> Optional[float]:
+        try:
+            return os.path.getmtime(self._path(name))
+        except OSError:
+            return None
+
+    def load_all(self):
+        with self._lock:
+            for name in self.files:
+                self._load(name, self._mtime(name))
+            self._last_check = time.monotonic()
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self.check_interval is None or now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        for name in self.files:
+            mtime = self._mtime(name)
+            entry = self._entries.get(name)
+            if entry is None or entry['mtime'] != mtime:
+                self._load(name, mtime)
+
+    def _entry(self, name: str) -> Dict[str, Any]:
+        with self._lock:
+            if name not in self._entries:
+                self._load(name, self._mtime(name))
+            else:
+                self._refresh()
+            return self._entries[name]
+
+    def get(self, name: str) -> Dict[str, Any]:
+        """Questionnaire definition (shared, treat as read-only)."""
+        return self._entry(name)['definition']
+
+    def fields(self, name: str) -> Tuple[Field, ...]:
+        return self._entry(name)['fields']
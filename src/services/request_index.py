@@ -0,0 +1,163 @@
+import base64
+import bisect
+import heapq
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+SORTS = ('pending', 'newest', 'oldest')
+STATUSES = ('submitted', 'accepted', 'rejected')
+DEFAULT_LIMIT = 25
+MAX_LIMIT = 200
+
+
+def _sort_key(sort: str, rid: int, rec: Dict[str, Any]) -> Tuple:
+    """Ascending key for a sort; 'pending' and 'newest' are iterated from the end.
+    'pending' puts submitted (undecided) requests first, then newest first."""
+    ts = str(rec.get('submitted_at') or '')
+    if sort == 'pending':
+        return (1 if rec.get('status', 'submitted') == 'submitted' else 0, ts, rid)
+    return (ts, rid)
+
+
+def encode_cursor(sort: str, key: Tuple) -> str:
+    raw = json.dumps([sort, list(key)], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[str, Tuple]]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        sort, key = json.loads(raw)
+        if sort not in SORTS or not isinstance(key, list):
+            return None
+        return sort, tuple(key)
+    except Exception:
+        return None
+
+
+def _date_bound(value: Optional[str], end: bool) -> Optional[str]:
+    """'YYYY-MM-DD' (or 'YYYYMMDD') -> comparable prefix of submitted_at ('YYYYMMDDTHHMMSSZ')."""
+    if not value:
+        return None
+    digits = value.replace('-', '')[:8]
+    if len(digits) != 8 or not digits.isdigit():
+        raise ValueError(f"invalid date '{value}', expected YYYY-MM-DD")
+    return digits + ('T999999Z' if end else 'T000000Z')
+
+
+class RequestIndex:
+    """Secondary indexes over onboarding_requests.json for paged listings.
+
+    For each project and applicant it keeps the request ids sorted by every supported order,
+    so a page is read by bisecting to the cursor in the relevant lists and merging them lazily
+    (heapq.merge) until `limit` matching rows are found; nothing is sorted per request.
+    Request ids stay the positions in the store, as used by /requests/<id>. The index is
+    rebuilt when the store file changes, which also picks up writes from other workers.
+    """
+
+    def __init__(self, path: str, loader: Callable[[], List[Dict[str, Any]]]):
+        self.path = path
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._signature = None
+        self.records: List[Dict[str, Any]] = []
+        self.by_project: Dict[str, Dict[str, List[Tuple]]] = {}
+        self.by_applicant: Dict[str, Dict[str, List[Tuple]]] = {}
+
+    def _file_signature(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def refresh(self, force: bool = False):
+        sig = self._file_signature()
+        with self._lock:
+            if not force and sig == self._signature and self._signature is not None:
+                return
+            records = self.loader()
+            by_project: Dict[str, Dict[str, List[Tuple]]] = {}
+            by_applicant: Dict[str, Dict[str, List[Tuple]]] = {}
+            for rid, rec in enumerate(records):
+                for postings, value in ((by_project, str(rec.get('project_id'))), (by_applicant, str(rec.get('username')))):
+                    lists = postings.setdefault(value, {s: [] for s in SORTS if s != 'oldest'})
+                    for sort in lists:
+                        lists[sort].append(_sort_key(sort, rid, rec))
+            for postings in (by_project, by_applicant):
+                for lists in postings.values():
+                    for keys in lists.values():
+                        keys.sort()
+            self.records, self.by_project, self.by_applicant = records, by_project, by_applicant
+            self._signature = sig
+
+    def _walk(self, lists: Iterable[List[Tuple]], sort: str, after: Optional[Tuple]) -> Iterator[Tuple]:
+        """Yield keys from several sorted lists in page order, strictly after `after`."""
+        descending = sort in ('pending', 'newest')
+        runs = []
+        for keys in lists:
+            if after is None:
+                runs.append(reversed(keys) if descending else iter(keys))
+            elif descending:
+                runs.append(reversed(keys[:bisect.bisect_left(keys, after)]))
+            else:
+                runs.append(iter(keys[bisect.bisect_right(keys, after):]))
+        return heapq.merge(*runs, reverse=descending)
+
+    def query(self, projects: Optional[Iterable[str]] = None, applicant: Optional[str] = None,
+              status: Optional[str] = None, date_from: Optional[str] = None, date_to: Optional[str] = None,
+              sort: str = 'pending', limit: int = DEFAULT_LIMIT, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """One page of requests matching all given filters.
+        `projects` restricts to those project ids (e.g. the projects a user owns); `applicant`
+        to one user's requests. Returns {'items': [(id, record)], 'next_cursor': str|None}.
+        """
+        if sort not in SORTS:
+            raise ValueError(f"sort must be one of {', '.join(SORTS)}")
+        if status and status not in STATUSES:
+            raise ValueError(f"status must be one of {', '.join(STATUSES)}")
+        limit = max(1, min(int(limit or DEFAULT_LIMIT), MAX_LIMIT))
+        lo, hi = _date_bound(date_from, False), _date_bound(date_to, True)
+        after = None
+        if cursor:
+            decoded = decode_cursor(cursor)
+            if decoded is None or decoded[0] != sort:
+                raise ValueError("invalid cursor")
+            after = decoded[1]
+
+        self.refresh()
+        list_sort = 'newest' if sort == 'oldest' else sort  # same (ts, id) keys, other direction
+        with self._lock:
+            records = self.records
+            if applicant is not None:
+                # One applicant's requests are few; the project filter is applied while walking
+                lists = [self.by_applicant.get(str(applicant), {}).get(list_sort, [])]
+            elif projects is not None:
+                lists = [self.by_project[str(p)][list_sort] for p in projects if str(p) in self.by_project]
+            else:
+                lists = [ls[list_sort] for ls in self.by_project.values()]
+            project_set = {str(p) for p in projects} if projects is not None else None
+
+            items, last_key, has_more = [], None, False
+            for key in self._walk(lists, sort, after):
+                rid = key[-1]
+                rec = records[rid]
+                if project_set is not None and str(rec.get('project_id')) not in project_set:
+                    continue
+                if applicant is not None and str(rec.get('username')) != str(applicant):
+                    continue
+                if status and rec.get('status', 'submitted') != status:
+                    continue
+                ts = str(rec.get('submitted_at') or '')
+                if (lo and ts < lo) or (hi and ts > hi):
+                    continue
+                if len(items) == limit:
+                    has_more = True
+                    break
+                items.append((rid, rec))
+                last_key = key
+        return {
+            'items': items,
+            'next_cursor': encode_cursor(sort, last_key) if has_more and last_key is not None else None,
+        }
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'static', 'data', 'cache', 'assistant_responses')
+
+
+def response_key(provider: str, model: str, messages: List[Dict[str, Any]]) -> str:
+    """Stable hash of (provider, model, full message list)."""
+    blob = json.dumps({'provider': provider, 'model': model, 'messages': messages},
+                      ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Assistant reply cache: a bounded in-memory LRU in front of one JSON file per entry
+    on disk, so replies survive restarts and are shared between gunicorn workers.
+    Entries older than ttl_seconds are ignored and removed on access; files nobody reads
+    again are removed by sweep(), run in the background on the first write and then at most
+    every sweep_interval seconds.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, ttl_seconds: float = 86400, max_memory_entries: int = 256,
+                 sweep_interval: float = 3600):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_entries = max_memory_entries
+        self.sweep_interval = sweep_interval
+        self._memory: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'writes': 0, 'swept': 0}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _fresh(self, entry: Dict[str, Any]) -> bool:
+        return time.time() - entry.get('created_at', 0) <= self.ttl_seconds
+
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self.get_entry(key)
+        return entry['reply'] if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """The cached entry ({'reply', 'provider', 'model', 'created_at'}) or None."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if self._fresh(entry):
+                    self._memory.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return dict(entry)
+                del self._memory[key]
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            entry = None
+        with self._lock:
+            if entry is None or not self._fresh(entry):
+                self.stats['misses'] += 1
+                if entry is not None:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                return None
+            self._remember(key, entry)
+            self.stats['hits'] += 1
+            self.stats['disk_hits'] += 1
+            return dict(entry)
+
+    def put(self, key: str, reply: str, provider: str = None, model: str = None):
+        if not reply:
+            return
+        now = time.time()
+        entry = {'created_at': now, 'provider': provider, 'model': model, 'reply': reply}
+        with self._lock:
+            self._remember(key, entry)
+            self.stats['writes'] += 1
+            sweep = now >= self._next_sweep
+            if sweep:
+                self._next_sweep = now + self.sweep_interval
+        if sweep:
+            threading.Thread(target=self.sweep, name='response-cache-sweep', daemon=True).start()
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # unique per process and thread: gthread workers may store the same key concurrently
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except Exception as e:
+            print(f"Warning: failed to persist assistant response cache entry: {e}")
+
+    def sweep(self) -> int:
+        """Delete entry files (and leftover temp files) older than the TTL; returns the count.
+        Uses file modification times, which match the entries' creation times."""
+        cutoff = time.time() - self.ttl_seconds
+        removed = 0
+        try:
+            shards = [d.path for d in os.scandir(self.cache_dir) if d.is_dir()]
+        except OSError:
+            return 0
+        for shard in shards:
+            try:
+                files = list(os.scandir(shard))
+            except OSError:
+                continue
+            for f in files:
+                try:
+                    if f.is_file() and f.stat().st_mtime < cutoff:
+                        os.remove(f.path)
+                        removed += 1
+                except OSError:
+                    pass
+        with self._lock:
+            self.stats['swept'] += removed
+        return removed
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                **self.stats,
+                'memory_entries': len(self._memory),
+                'ttl_seconds': self.ttl_seconds,
+                'hit_rate': round(self.stats['hits'] / lookups, 4) if lookups else 0.0,
+            }
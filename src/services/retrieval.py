@@ -0,0 +1,75 @@
+from typing import Any, Dict, List, Optional
+
+RRF_K = 60
+RETRIEVAL_MODES = ('dense', 'sparse', 'hybrid')
+
+# Payload fields the assistant may filter on (as written by src/gdprChunker.py)
+FILTER_FIELDS = {
+    'regulation': str,
+    'kind': str,
+    'source': str,
+    'chapter': str,
+    'article': int,
+    'recital': int,
+}
+
+
+def normalize_filters(raw: Any) -> Dict[str, Any]:
+    """Keep only known filter fields and coerce their values (e.g. "9" -> 9 for article).
+    Values may be scalars or lists; unknown keys and uncastable values are dropped.
+    """
+    if not isinstance(raw, dict):
+        return {}
+    out: Dict[str, Any] = {}
+    for key, cast in FILTER_FIELDS.items():
+        val = raw.get(key)
+        if val is None or val == '' or val == []:
+            continue
+        vals = val if isinstance(val, list) else [val]
+        try:
+            cast_vals = [cast(v).strip() if cast is str else cast(v) for v in vals]
+        except (TypeError, ValueError):
+            continue
+        if key == 'regulation':
+            cast_vals = [v.upper() for v in cast_vals]
+        out[key] = cast_vals if isinstance(val, list) else cast_vals[0]
+    return out
+
+
+def build_qdrant_filter(filters: Optional[Dict[str, Any]]):
+    """Translate normalized filters into a Qdrant payload Filter (None when empty)."""
+    if not filters:
+        return None
+    from qdrant_client.http import models
+    must = []
+    for key, val in filters.items():
+        if isinstance(val, list):
+            must.append(models.FieldCondition(key=key, match=models.MatchAny(any=val)))
+        else:
+            must.append(models.FieldCondition(key=key, match=models.MatchValue(value=val)))
+    return models.Filter(must=must)
+
+
+def _fusion_key(ctx: Dict[str, Any]):
+    if ctx.get('id') is not None:
+        return str(ctx['id'])
+    return ctx.get('text', '')
+
+
+def reciprocal_rank_fusion(result_lists: Dict[str, List[Dict[str, Any]]], limit: int = 5, k: int = RRF_K) -> List[Dict[str, Any]]:
+    """Merge ranked context lists (retriever name -> results) with reciprocal rank fusion:
+    score(d) = sum 1 / (k + rank). Contexts are matched on their point id (falling back to text).
+    The fused score replaces `score`; per-retriever ranks are kept under `ranks`.
+    """
+    fused: Dict[Any, Dict[str, Any]] = {}
+    for name, results in result_lists.items():
+        for rank, ctx in enumerate(results, start=1):
+            key = _fusion_key(ctx)
+            entry = fused.get(key)
+            if entry is None:
+                entry = {**ctx, 'score': 0.0, 'ranks': {}}
+                fused[key] = entry
+            entry['score'] += 1.0 / (k + rank)
+            entry['ranks'][name] = rank
+    ranked = sorted(fused.values(), key=lambda c: c['score'], reverse=True)
+    return ranked[:limit]
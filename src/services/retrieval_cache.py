@@ -0,0 +1,133 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.services.sparse_index import INDEX_DIR
+
+VERSIONS_FILE = os.path.join(INDEX_DIR, 'collection_versions.json')
+
+_WS = re.compile(r"\s+")
+_TRAILING_PUNCT = re.compile(r"[\s?!.]+$")
+
+
+def normalize_query(query: str) -> str:
+    """Case-, whitespace- and trailing-punctuation-insensitive form of a query."""
+    return _TRAILING_PUNCT.sub('', _WS.sub(' ', (query or '').strip().lower()))
+
+
+def _read_versions(path: str = VERSIONS_FILE) -> Dict[str, int]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+            return data if isinstance(data, dict) else {}
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def bump_collection_version(collection: str, path: str = VERSIONS_FILE) -> int:
+    """Increment a collection's version. Called by the ingestion scripts after (re)indexing,
+    which invalidates cached retrievals for that collection in every app worker.
+    """
+    versions = _read_versions(path)
+    versions[collection] = int(versions.get(collection, 0)) + 1
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(versions, f, indent=2)
+    os.replace(tmp, path)
+    return versions[collection]
+
+
+class RetrievalCache:
+    """TTL + LRU cache for RAG lookups, keyed by normalized query, collection, limit,
+    retrieval mode and filters. Entries remember the collection version they were
+    computed for and are dropped once ingestion bumps it.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600, versions_path: str = VERSIONS_FILE,
+                 version_check_interval: float = 5.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.versions_path = versions_path
+        self.version_check_interval = version_check_interval
+        self._entries: 'OrderedDict[Tuple, Tuple[float, int, List[Dict[str, Any]]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._versions_mtime: Optional[float] = None
+        self._versions_checked = 0.0
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'invalidations': 0}
+
+    @staticmethod
+    def make_key(query: str, collection: str, limit: int, mode: str = 'dense', filters: Optional[Dict[str, Any]] = None) -> Tuple:
+        frozen = tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in (filters or {}).items()))
+        return (normalize_query(query), collection, int(limit), mode, frozen)
+
+    def _current_version(self, collection: str) -> int:
+        """Collection version from disk, re-stat'ing the versions file at most every few seconds."""
+        now = time.monotonic()
+        if now - self._versions_checked >= self.version_check_interval:
+            self._versions_checked = now
+            try:
+                mtime = os.path.getmtime(self.versions_path)
+            except OSError:
+                mtime = None
+            if mtime != self._versions_mtime:
+                self._versions_mtime = mtime
+                self._versions = _read_versions(self.versions_path)
+        return int(self._versions.get(collection, 0))
+
+    def get(self, key: Tuple) -> Optional[List[Dict[str, Any]]]:
+        collection = key[1]
+        with self._lock:
+            version = self._current_version(collection)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            stored_at, stored_version, contexts = entry
+            if stored_version != version:
+                self._invalidate_collection(collection, version)
+                self.stats['misses'] += 1
+                return None
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return [dict(c) for c in contexts]
+
+    def put(self, key: Tuple, contexts: List[Dict[str, Any]]):
+        with self._lock:
+            version = self._current_version(key[1])
+            self._entries[key] = (time.monotonic(), version, [dict(c) for c in contexts])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def _invalidate_collection(self, collection: str, version: int):
+        stale = [k for k, (_, v, _) in self._entries.items() if k[1] == collection and v != version]
+        for k in stale:
+            del self._entries[k]
+        self.stats['invalidations'] += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                **self.stats,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hit_rate': round(self.stats['hits'] / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,171 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+# Directory next to the vector store persistence (see src/vectorizeDocument.py INDEX_PATH)
+INDEX_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'static', 'data', 'compliance_index')
+
+_WORD = re.compile(r"[a-z0-9]+")
+# "art" only as an abbreviation ("Art. 9", "art 9"); the number must end the word and roman
+# numerals must be well-formed, so "articles", "artificial" or "recital civil" yield no reference
+_REFERENCE = re.compile(
+    r"\b(articles?|recitals?|chapters?|art\.|art(?=\s))\s*\(?"
+    r"(\d+|(?=[ivxlc])c{0,3}(?:xc|xl|l?x{0,3})(?:ix|iv|v?i{0,3}))\)?(?![a-z0-9])",
+    re.IGNORECASE)
+_STOPWORDS = frozenset((
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it",
+    "its", "of", "on", "or", "shall", "should", "that", "the", "this", "to", "was", "were", "which",
+    "with", "what", "when", "where", "who", "how", "does", "do", "can", "under", "any", "such",
+))
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords, plus one compound token per
+    explicit reference such as "Article 9" -> "article:9", so that queries naming
+    an article or recital match it exactly instead of every chunk containing "9".
+    """
+    if not text:
+        return []
+    tokens = [t for t in _WORD.findall(text.lower()) if t not in _STOPWORDS]
+    for kind, num in _REFERENCE.findall(text):
+        kind = kind.lower().rstrip('.')
+        kind = 'article' if kind == 'art' else kind[:-1] if kind.endswith('s') else kind
+        tokens.append(f"{kind}:{num.lower()}")
+    return tokens
+
+
+def matches_filters(meta: Dict[str, Any], filters: Optional[Dict[str, Any]]) -> bool:
+    """True if every filter key equals the payload value (or is contained in it, for list payloads)."""
+    if not filters:
+        return True
+    for key, expected in filters.items():
+        actual = meta.get(key)
+        wanted = expected if isinstance(expected, list) else [expected]
+        if isinstance(actual, list):
+            if not any(a in wanted for a in actual):
+                return False
+        elif actual not in wanted:
+            return False
+    return True
+
+
+class BM25Index:
+    """Okapi BM25 inverted index over ingested chunks.
+    Documents are {id, text, meta}; `id` should be the Qdrant point id so sparse and
+    dense hits can be fused on it.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.docs: List[Dict[str, Any]] = []
+        self.doc_lens: List[int] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}  # term -> [(doc_idx, tf)]
+        self.avgdl = 0.0
+
+    @classmethod
+    def from_documents(cls, documents: List[Dict[str, Any]], **kwargs) -> 'BM25Index':
+        index = cls(**kwargs)
+        for doc in documents:
+            index.add(doc)
+        index._finalize()
+        return index
+
+    def add(self, doc: Dict[str, Any]):
+        idx = len(self.docs)
+        tokens = tokenize(doc.get('text', ''))
+        self.docs.append({'id': doc.get('id', idx), 'text': doc.get('text', ''), 'meta': doc.get('meta', {})})
+        self.doc_lens.append(len(tokens))
+        for term, tf in Counter(tokens).items():
+            self.postings.setdefault(term, []).append((idx, tf))
+
+    def _finalize(self):
+        self.avgdl = (sum(self.doc_lens) / len(self.doc_lens)) if self.doc_lens else 0.0
+        n = len(self.docs)
+        self._idf = {
+            term: math.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+            for term, plist in self.postings.items()
+        }
+
+    def search(self, query: str, limit: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Score documents containing at least one query term. Returns contexts shaped like
+        qdrant_search results: {id, text, meta, score}.
+        """
+        if not self.docs:
+            return []
+        scores: Dict[int, float] = {}
+        k1, b, avgdl = self.k1, self.b, self.avgdl or 1.0
+        for term in set(tokenize(query)):
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            idf = self._idf[term]
+            for idx, tf in plist:
+                denom = tf + k1 * (1 - b + b * self.doc_lens[idx] / avgdl)
+                scores[idx] = scores.get(idx, 0.0) + idf * tf * (k1 + 1) / denom
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+        results = []
+        for idx, score in ranked:
+            doc = self.docs[idx]
+            if not matches_filters(doc['meta'], filters):
+                continue
+            results.append({'id': doc['id'], 'text': doc['text'], 'meta': doc['meta'], 'score': score})
+            if len(results) >= limit:
+                break
+        return results
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = {
+            'k1': self.k1,
+            'b': self.b,
+            'docs': self.docs,
+            'doc_lens': self.doc_lens,
+            'postings': self.postings,
+        }
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'BM25Index':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        index = cls(k1=data.get('k1', 1.5), b=data.get('b', 0.75))
+        index.docs = data.get('docs', [])
+        index.doc_lens = data.get('doc_lens', [])
+        index.postings = {t: [tuple(p) for p in plist] for t, plist in data.get('postings', {}).items()}
+        index._finalize()
+        return index
+
+
+def index_path(collection: str, index_dir: str = INDEX_DIR) -> str:
+    return os.path.join(index_dir, f"{collection}_bm25.json")
+
+
+_loaded: Dict[str, Tuple[float, BM25Index]] = {}
+
+
+def get_index(collection: str, index_dir: str = INDEX_DIR) -> Optional[BM25Index]:
+    """Return the BM25 index for a collection, reloading it when the file on disk changes.
+    Returns None if the collection was ingested without a sparse index.
+    """
+    path = index_path(collection, index_dir)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    cached = _loaded.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    try:
+        index = BM25Index.load(path)
+    except Exception as e:
+        print(f"Warning: failed to load BM25 index {path}: {e}")
+        return None
+    _loaded[path] = (mtime, index)
+    return index
@@ -0,0 +1,157 @@
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Set
+
+STATUSES = ('submitted', 'accepted', 'rejected')
+
+
+class UserViews:
+    """Per-user materialised views for the dashboard and explore pages:
+
+    - owned projects and joined projects (participant but not owner),
+    - counts of the user's own requests by status,
+    - ids of pending requests awaiting the user's decision as project owner.
+
+    Built once from the registry and the request store, then maintained incrementally by the
+    handlers that change them (request submitted/decided, project created/deleted). Requests
+    written by another worker are picked up by a rebuild of the request-derived parts when
+    the store file signature changes.
+    """
+
+    def __init__(self, requests_path: str, load_requests: Callable[[], List[Dict[str, Any]]]):
+        self.requests_path = requests_path
+        self.load_requests = load_requests
+        self._lock = threading.RLock()
+        self._signature = None
+        self.projects: Dict[str, Dict[str, Any]] = {}       # project id -> project record
+        self._owned: Dict[str, Dict[str, None]] = {}         # user -> ordered set of project ids
+        self._joined: Dict[str, Set[str]] = {}
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._awaiting: Dict[str, Set[int]] = {}
+        self._project_requests: Dict[str, Set[int]] = {}     # project id -> request ids
+        self._requests: Dict[int, Dict[str, Any]] = {}       # request id -> (applicant, project, status)
+
+    def _file_signature(self):
+        try:
+            st = os.stat(self.requests_path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    # --- building ---
+
+    def rebuild(self, projects: Iterable[Dict[str, Any]], participants: Dict[str, List[str]]):
+        with self._lock:
+            self.projects, self._owned, self._joined = {}, {}, {}
+            for p in projects:
+                self._add_project(p, participants.get(str(p.get('id')), []))
+            self._rebuild_requests()
+
+    def _rebuild_requests(self):
+        self._counts, self._awaiting, self._project_requests, self._requests = {}, {}, {}, {}
+        self._signature = self._file_signature()
+        for rid, rec in enumerate(self.load_requests()):
+            self._add_request(rid, rec)
+
+    def _sync(self):
+        """Rebuild request-derived views if the store was written by another process."""
+        if self._file_signature() != self._signature:
+            self._rebuild_requests()
+
+    # --- incremental updates ---
+
+    def _add_project(self, project: Dict[str, Any], members: Iterable[str]):
+        pid = str(project.get('id'))
+        owner = project.get('owner')
+        self.projects[pid] = project
+        if owner:
+            self._owned.setdefault(owner, {})[pid] = None
+        for u in members:
+            if u != owner:
+                self._joined.setdefault(u, set()).add(pid)
+
+    def _add_request(self, rid: int, rec: Dict[str, Any]):
+        pid = str(rec.get('project_id'))
+        applicant = rec.get('username')
+        status = rec.get('status', 'submitted')
+        self._requests[rid] = {'applicant': applicant, 'project_id': pid, 'status': status}
+        self._project_requests.setdefault(pid, set()).add(rid)
+        if pid not in self.projects:
+            return  # requests of deleted projects are not shown anywhere
+        counts = self._counts.setdefault(applicant, dict.fromkeys(STATUSES, 0))
+        counts[status] = counts.get(status, 0) + 1
+        owner = self.projects[pid].get('owner')
+        if status == 'submitted' and owner:
+            self._awaiting.setdefault(owner, set()).add(rid)
+
+    def _remove_request(self, rid: int):
+        info = self._requests.get(rid)
+        if info is None or info['project_id'] not in self.projects:
+            return
+        counts = self._counts.get(info['applicant'])
+        if counts and counts.get(info['status'], 0) > 0:
+            counts[info['status']] -= 1
+        owner = self.projects[info['project_id']].get('owner')
+        self._awaiting.get(owner, set()).discard(rid)
+
+    def project_created(self, project: Dict[str, Any], members: Iterable[str]):
+        with self._lock:
+            self._add_project(project, members)
+
+    def project_deleted(self, project: Dict[str, Any], members: Iterable[str]):
+        with self._lock:
+            pid = str(project.get('id'))
+            for rid in self._project_requests.get(pid, set()):
+                self._remove_request(rid)
+            self._owned.get(project.get('owner'), {}).pop(pid, None)
+            for u in members:
+                self._joined.get(u, set()).discard(pid)
+            self.projects.pop(pid, None)
+
+    def request_submitted(self, rid: int, rec: Dict[str, Any]):
+        """Call after this process appended request `rid` to the store."""
+        with self._lock:
+            if rid != len(self._requests):
+                self._rebuild_requests()  # other requests were appended meanwhile
+            elif rid not in self._requests:
+                self._add_request(rid, rec)
+            self._signature = self._file_signature()
+
+    def request_decided(self, rid: int, rec: Dict[str, Any]):
+        """Call after this process stored the decision on request `rid`."""
+        with self._lock:
+            if rid not in self._requests:
+                self._rebuild_requests()
+            else:
+                self._remove_request(rid)
+                self._add_request(rid, rec)
+            pid = str(rec.get('project_id'))
+            if rec.get('status') == 'accepted' and pid in self.projects and rec.get('username') != self.projects[pid].get('owner'):
+                self._joined.setdefault(rec.get('username'), set()).add(pid)
+            self._signature = self._file_signature()
+
+    # --- reads ---
+
+    def owned_projects(self, username: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [self.projects[pid] for pid in self._owned.get(username, {}) if pid in self.projects]
+
+    def project_titles(self) -> Dict[str, Any]:
+        """Snapshot of {project id: title} for all current projects."""
+        with self._lock:
+            return {pid: p.get('title') for pid, p in self.projects.items()}
+
+    def member_project_ids(self, username: str) -> Set[str]:
+        """Projects the user owns or participates in."""
+        with self._lock:
+            return set(self._owned.get(username, {})) | self._joined.get(username, set())
+
+    def summary(self, username: str) -> Dict[str, Any]:
+        with self._lock:
+            self._sync()
+            return {
+                'owned': len(self._owned.get(username, {})),
+                'joined': len(self._joined.get(username, set())),
+                'requests': dict(self._counts.get(username) or dict.fromkeys(STATUSES, 0)),
+                'awaiting_decision': len(self._awaiting.get(username, set())),
+            }
@@ -0,0 +1,73 @@
+from typing import Any, Dict, List, Optional
+
+try:
+    import jsonschema
+except Exception:  # optional: submissions are stored unvalidated without it
+    jsonschema = None
+
+# Stored object path -> questionnaire id prefix (expectation answers are asked as `expect.*`)
+ID_PREFIXES = {'data_format_expectations': 'expect.'}
+MAX_ERRORS = 50
+
+
+def prune_unanswered(value: Any) -> Any:
+    """Drop None and '' (unanswered questions) so optional fields are not type-checked."""
+    if isinstance(value, dict):
+        return {k: prune_unanswered(v) for k, v in value.items() if v is not None and v != ''}
+    if isinstance(value, list):
+        return [prune_unanswered(v) for v in value if v is not None and v != '']
+    return value
+
+
+def question_labels(questionnaire: Dict[str, Any]) -> Dict[str, str]:
+    return {q['id']: q.get('text') or q['id']
+            for s in questionnaire.get('sections', []) for q in s.get('questions', []) if q.get('id')}
+
+
+class InputValidators:
+    """One validator per *_input_schema.json, built (and the schema itself checked) once at
+    startup. Building a jsonschema validator resolves the metaschema and refs, which costs far
+    more than validating one submission, so the instances are reused for every request.
+    """
+
+    def __init__(self, schemas: Dict[str, Dict[str, Any]]):
+        self.validators: Dict[str, Any] = {}
+        self.enabled = jsonschema is not None
+        if not self.enabled:
+            print("Warning: jsonschema is not installed; questionnaire submissions will not be validated")
+            return
+        for name, schema in schemas.items():
+            if not schema:
+                continue
+            try:
+                cls = jsonschema.validators.validator_for(schema)
+                cls.check_schema(schema)
+                self.validators[name] = cls(schema, format_checker=cls.FORMAT_CHECKER)
+            except Exception as e:
+                print(f"Warning: input schema for '{name}' is invalid, submissions will not be validated: {e}")
+
+    def validate(self, name: str, instance: Dict[str, Any], labels: Optional[Dict[str, str]] = None) -> List[Dict[str, str]]:
+        """Return field-level errors [{field, question, message}] (empty when valid or no validator).
+        `field` is the questionnaire id of the offending answer."""
+        validator = self.validators.get(name)
+        if validator is None:
+            return []
+        prefix = ID_PREFIXES.get(name, '')
+        labels = labels or {}
+        errors, seen = [], set()
+        for err in sorted(validator.iter_errors(prune_unanswered(instance)), key=lambda e: list(e.absolute_path)):
+            path = [str(p) for p in err.absolute_path if not isinstance(p, int)]
+            if err.validator == 'required' and isinstance(err.instance, dict):
+                # One entry per missing property, named after the property itself
+                fields = [(path + [p], "is required") for p in err.validator_value if p not in err.instance]
+            else:
+                fields = [(path, err.message)]
+            for parts, message in fields:
+                field = prefix + '.'.join(parts) if parts else '(root)'
+                if (field, message) in seen:
+                    continue
+                seen.add((field, message))
+                errors.append({'field': field, 'question': labels.get(field, field), 'message': message})
+            if len(errors) >= MAX_ERRORS:
+                break
+        return errors
@@ -1,5 +1,6 @@
 import os
 from api.qdrant_remote_client import get_remote_client
+from src.services.retrieval_cache import bump_collection_version
 
 # Llama
 from llama_index.core import SimpleDirectoryReader, StorageContext, load_index_from_storage
@@ -39,6 +40,7 @@ def build_text_index_remote():
         storage_context=storage_context
     )
     index.storage_context.persist(persist_dir="."+INDEX_PATH)
+    bump_collection_version(COLLECTION_NAME)
 
 
 def update_text_index_remote(documents):
@@ -48,6 +50,7 @@ def update_text_index_remote(documents):
     index = load_index_from_storage(storage_context)
     index.refresh_ref_docs(documents)
     index.storage_context.persist(persist_dir=".."+INDEX_PATH)
+    bump_collection_version(COLLECTION_NAME)
 
 
 if __name__ == "__main__":
@@ -1,4 +1,4 @@
-import re
+import os
 import uuid
 from sentence_transformers import SentenceTransformer
 from qdrant_client import QdrantClient
@@ -8,20 +8,23 @@ from qdrant_client.http.models import (
     PointStruct
 )
 from llama_index.readers.file import PDFReader  # you can replace with PyPDF if you prefer
+from src.gdprChunker import chunk_gdpr_text
+from src.services.sparse_index import BM25Index, index_path
+from src.services.retrieval_cache import bump_collection_version
 
 
 # ---------------------------
-# 1) Load PDF + Split Sections
+# 1) Load PDF + Split into Recitals/Articles
 # ---------------------------
-pdf_path = "../static/compliance/gdpr.pdf"
+pdf_path = os.path.join(os.path.dirname(__file__), "..", "static", "resources", "gdpr.pdf")
 pdf_reader = PDFReader()
 raw_docs = pdf_reader.load_data(file=pdf_path)
 
 # Concatenate pages
 full_text = "\n".join([doc.text for doc in raw_docs])
 
-# Split on empty lines (section-level chunks)
-sections = [sec.strip() for sec in re.split(r"\n\s*\n", full_text) if sec.strip()]
+# Structure-aware, size-bounded chunks with article/recital metadata
+sections = chunk_gdpr_text(full_text, source=os.path.basename(pdf_path))
 
 
 # ---------------------------
@@ -59,12 +62,12 @@ qdrant.recreate_collection(
 # ---------------------------
 points = []
 for sec in sections:
-    embedding = model.encode(sec).tolist()
+    embedding = model.encode(sec["text"]).tolist()
     points.append(
         PointStruct(
             id=str(uuid.uuid4()),
             vector=embedding,
-            payload={"text": sec}
+            payload=sec
         )
     )
 
@@ -76,6 +79,17 @@ qdrant.upsert(
 
 print(f"Inserted {len(points)} sections into Qdrant.")
 
+# Sparse BM25 index over the same chunks, keyed by point id for hybrid retrieval
+bm25 = BM25Index.from_documents([
+    {"id": p.id, "text": p.payload["text"], "meta": {k: v for k, v in p.payload.items() if k != "text"}}
+    for p in points
+])
+bm25.save(index_path(collection_name))
+print(f"Saved BM25 index for {collection_name} ({len(bm25.docs)} chunks).")
+
+# Invalidate cached retrievals for this collection in running app workers
+print(f"{collection_name} is now at version {bump_collection_version(collection_name)}.")
+
 
 # ---------------------------
 # 6) Semantic Query
@@ -89,7 +103,8 @@ def ask(query: str, top_k=5):
         limit=top_k
     )
 
-    return [(hit.score, hit.payload["text"]) for hit in results]
+    return [(hit.score, hit.payload["text"], hit.payload.get("article") or hit.payload.get("recital"))
+            for hit in results]
 
 
 # ---------------------------
@@ -97,5 +112,5 @@ def ask(query: str, top_k=5):
 # ---------------------------
 answers = ask("What are the data subject rights under GDPR?")
 print("\nTop Answers:\n")
-for score, text in answers:
-    print(f"- Score {score:.4f} → {text[:300]}...\n")
+for score, text, ref in answers:
+    print(f"- Score {score:.4f} [{ref}] → {text[:300]}...\n")
@@ -0,0 +1,69 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'extra', 'running-scenario'))
+
+from fdp_stats import compute_statistics, merge_statistics, summarize_statistics  # noqa: E402
+
+SPEC = {
+    "moments": ["age", "bmi"],
+    "histogram": {"age": {"edges": [18, 30, 45, 60, 90]}, "bmi": {"min": 10, "max": 50, "bins": 8}},
+    "quantiles": {"columns": ["bmi"], "k": 200, "probabilities": [0.1, 0.5, 0.9]},
+    "counts": [["site"], ["site", "visit_day"]],
+}
+
+
+def frame(rows=20_000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "age": rng.integers(10, 95, rows),
+        "bmi": rng.normal(25, 4, rows),
+        "site": rng.choice(["north", "south", "east"], rows),
+        "visit_day": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 3, rows), unit="D"),
+    })
+
+
+def merged_parts(df, parts):
+    merged = {}
+    for part in np.array_split(np.arange(len(df)), parts):
+        # Round-trip through JSON, as sites and chunks exchange only serialised states
+        state = json.loads(json.dumps(compute_statistics(df.iloc[part], SPEC), allow_nan=False))
+        merged = merge_statistics(merged, state)
+    return summarize_statistics(merged, SPEC)
+
+
+@pytest.mark.parametrize("parts", [2, 7])
+def test_merged_parts_match_whole_data(parts):
+    df = frame()
+    whole = summarize_statistics(compute_statistics(df, SPEC), SPEC)
+    merged = merged_parts(df, parts)
+    for col in ("age", "bmi"):
+        m, w = merged[f"moments:{col}"], whole[f"moments:{col}"]
+        assert m["count"] == w["count"] == len(df)
+        assert m["mean"] == pytest.approx(df[col].mean())
+        assert m["variance"] == pytest.approx(df[col].var())
+        assert (m["min"], m["max"]) == (w["min"], w["max"])
+        assert merged[f"histogram:{col}"] == whole[f"histogram:{col}"]
+    for key in ("counts:site", "counts:site,visit_day"):
+        assert merged[key] == whole[key]
+    assert merged["histogram:age"]["below"] == int((df["age"] < 18).sum())
+
+
+def test_quantiles_within_rank_error():
+    df = frame(50_000)
+    quantiles = merged_parts(df, 5)["kll:bmi"]["quantiles"]
+    values = np.sort(df["bmi"].to_numpy())
+    for p, q in quantiles.items():
+        rank = np.searchsorted(values, q) / len(values)
+        assert abs(rank - float(p)) < 0.02
+
+
+def test_datetime_counts_are_iso_strings():
+    counts = compute_statistics(frame(100), {"counts": [["visit_day"]]})["counts:visit_day"]
+    json.dumps(counts, allow_nan=False)
+    assert {row[0] for row in counts["rows"]} <= {"2024-01-01T00:00:00", "2024-01-02T00:00:00", "2024-01-03T00:00:00"}
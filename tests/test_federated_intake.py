@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+from src.federatedIntake import ClientRegistry, DuplicateUpdate, IntakeTimeout, UpdateIntake
+
+
+def accept_all(updates, round_number):
+    return {cid: {"valid": True} for cid in updates}
+
+
+def test_workers_start_lazily_and_stop_on_close():
+    before = threading.active_count()
+    intake = UpdateIntake(accept_all, workers=2)
+    assert threading.active_count() == before
+    intake.submit("a", '{"w": 1}', 1)
+    assert intake.collect(1, timeout=5) == {"a": {"status": "accepted"}}
+    assert intake.accepted(1) == {"a": {"w": 1}}
+    intake.close()
+    assert threading.active_count() == before
+
+
+def test_duplicate_update_in_a_round_is_rejected():
+    gate = threading.Event()
+
+    def slow(updates, round_number):
+        gate.wait(5)
+        return accept_all(updates, round_number)
+
+    intake = UpdateIntake(slow, workers=1)
+    intake.submit("a", {"w": 1}, 1)
+    with pytest.raises(DuplicateUpdate):
+        intake.submit("a", {"w": 2}, 1)  # still queued
+    gate.set()
+    intake.collect(1, timeout=5)
+    with pytest.raises(DuplicateUpdate):
+        intake.submit("a", {"w": 3}, 1)  # already accepted
+    intake.submit("a", {"w": 4}, 2)
+    assert intake.collect(2, timeout=5) == {"a": {"status": "accepted"}}
+    assert intake.accepted(1) == {"a": {"w": 1}}
+    intake.close()
+
+
+def test_rejected_update_can_be_resubmitted():
+    intake = UpdateIntake(lambda u, r: {cid: {"valid": m["ok"]} for cid, m in u.items()}, workers=1)
+    intake.submit("a", {"ok": False}, 1)
+    assert intake.collect(1, timeout=5)["a"]["status"] == "rejected"
+    intake.submit("a", {"ok": True}, 1)
+    assert intake.collect(1, timeout=5)["a"]["status"] == "accepted"
+    intake.close()
+
+
+def test_failures_reject_updates_without_killing_workers():
+    def on_accept(round_number, client_id, model_data):
+        if client_id == "bad":
+            raise TypeError("cannot fold")
+
+    intake = UpdateIntake(accept_all, workers=1, on_accept=on_accept)
+    intake.submit("bad", {}, 1)
+    intake.submit("broken", b"{not json", 1)
+    intake.submit("good", {}, 1)
+    results = intake.collect(1, timeout=5)
+    assert results["bad"] == {"status": "rejected", "reason": "cannot fold"}
+    assert results["broken"]["status"] == "rejected"
+    assert results["good"] == {"status": "accepted"}
+    intake.close()
+
+
+def test_collect_timeout_carries_partial_results():
+    gate = threading.Event()
+    intake = UpdateIntake(lambda u, r: gate.wait(5) and accept_all(u, r), workers=1)
+    intake.submit("a", {}, 1)
+    with pytest.raises(IntakeTimeout) as e:
+        intake.collect(1, timeout=0.05)
+    assert e.value.pending == 1 and e.value.results == {}
+    gate.set()
+    assert intake.collect(1, timeout=5) == {"a": {"status": "accepted"}}
+    intake.close()
+
+
+def test_client_registry():
+    registry = ClientRegistry()
+    registry.add({"id": "a", "cpu_cores": 2})
+    assert "a" in registry and len(registry) == 1 and registry.get("a")["cpu_cores"] == 2
+    registry.remove("a")
+    assert "a" not in registry and registry.ids() == []
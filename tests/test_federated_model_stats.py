@@ -0,0 +1,46 @@
+import json
+import math
+
+import numpy as np
+import pytest
+
+from src.federatedModelStats import parameter_stats, policy_input, prepare_update
+
+
+def test_stats_match_direct_computation_across_chunks():
+    rng = np.random.default_rng(0)
+    arrays = {'a': rng.standard_normal(1000).astype(np.float32), 'b': rng.standard_normal((7, 9))}
+    stats = parameter_stats(arrays, chunk_size=64)
+    flat = np.concatenate([a.reshape(-1).astype(np.float64) for a in arrays.values()])
+    assert stats['parameter_count'] == flat.size
+    assert stats['size_bytes'] == sum(a.nbytes for a in arrays.values())
+    assert stats['gradient_norm'] == pytest.approx(math.sqrt(np.dot(flat, flat)))
+    assert stats['max_parameter_value'] == pytest.approx(np.abs(flat).max())
+    assert stats['contains_nan'] is False
+
+
+@pytest.mark.parametrize('values', [[np.nan, 2.0], [np.inf, -np.inf, 3.0], [1e200, 1e200]])
+def test_stats_are_always_finite_json(values):
+    stats = parameter_stats({'w': np.array(values)})
+    json.dumps(stats, allow_nan=False)
+    assert stats['contains_nan'] is not all(np.isfinite(values))
+
+
+def test_prepare_update_overrides_reported_stats():
+    update = prepare_update({'parameters': {'w': [3.0, 4.0]}, 'num_samples': 10, 'gradient_norm': 0.0})
+    assert update['gradient_norm'] == pytest.approx(5.0)
+    assert 'parameters' not in policy_input(update)
+
+
+@pytest.mark.parametrize('model_data', [
+    ['not', 'an', 'object'],
+    {'num_samples': 10},
+    {'parameters': ['a', 'b'], 'num_samples': 10},
+    {'parameters': '/etc/passwd', 'num_samples': 10},
+    {'parameters': [1.0], 'num_samples': 'many'},
+    {'parameters': [1.0], 'num_samples': 0},
+    {'parameters': [1.0], 'num_samples': True},
+])
+def test_prepare_update_rejects_malformed_updates(model_data):
+    with pytest.raises(ValueError):
+        prepare_update(model_data)
@@ -0,0 +1,62 @@
+import time
+
+import pytest
+
+from src.privacyLedger import BudgetExceeded, PrivacyLedger
+
+
+class Publisher:
+    def __init__(self):
+        self.documents = []
+        self.patches = []
+
+    def put_data(self, path, document):
+        self.documents.append((path, document))
+
+    def patch_data(self, path, ops):
+        self.patches.append((path, ops))
+
+
+def test_reserve_commit_release_against_budget(tmp_path):
+    ledger = PrivacyLedger(str(tmp_path / 'ledger.jsonl'), epsilon_budget=1.0, max_contributions=1)
+    first = ledger.reserve('p', 1, 0.6, 0, ['a'])
+    with pytest.raises(BudgetExceeded):
+        ledger.reserve('p', 2, 0.6, 0, ['b'])  # the reservation counts against the budget
+    ledger.commit(first)
+    assert ledger.totals('p')['epsilon_spent'] == pytest.approx(0.6)
+    assert ledger.contributions('p', 'a') == 1
+    with pytest.raises(BudgetExceeded):
+        ledger.reserve('p', 2, 0.1, 0, ['a'])  # contribution limit
+    second = ledger.reserve('p', 2, 0.4, 0, ['b'])
+    ledger.release(second)
+    assert ledger.totals('p')['epsilon_reserved'] == 0
+    with pytest.raises(KeyError):
+        ledger.commit(second)
+
+
+def test_totals_replayed_by_another_instance(tmp_path):
+    path = str(tmp_path / 'ledger.jsonl')
+    a = PrivacyLedger(path, epsilon_budget=1.0)
+    a.commit(a.reserve('p', 1, 0.7, 0, ['a']))
+    b = PrivacyLedger(path, epsilon_budget=1.0)
+    assert b.totals('p')['epsilon_spent'] == pytest.approx(0.7)
+    with pytest.raises(BudgetExceeded):
+        b.reserve('p', 2, 0.5, 0, ['a'])
+
+
+def test_stale_reservation_expires_and_release_is_published(tmp_path):
+    path = str(tmp_path / 'ledger.jsonl')
+    crashed = PrivacyLedger(path, epsilon_budget=1.0, reservation_ttl=0.05)
+    stale = crashed.reserve('p', 1, 0.8, 0, ['a'])
+    publisher = Publisher()
+    ledger = PrivacyLedger(path, publisher=publisher, epsilon_budget=1.0, reservation_ttl=0.05)
+    ledger.publish()
+    assert publisher.documents[-1][1]['projects']['p']['epsilon_reserved'] == pytest.approx(0.8)
+    time.sleep(0.1)
+    # The expired reservation is released even though this reservation is refused
+    with pytest.raises(BudgetExceeded):
+        ledger.reserve('p', 2, 1.5, 0, ['b'])
+    assert ledger.totals('p')['epsilon_reserved'] == 0
+    assert {'op': 'add', 'path': '/projects/p/epsilon_reserved', 'value': 0.0} in publisher.patches[-1][1]
+    with pytest.raises(KeyError):
+        crashed.commit(stale)
@@ -0,0 +1,41 @@
+from src.services.project_search import ProjectSearchIndex
+
+
+def project(pid, title, tags, level):
+    return {'id': pid, 'title': title, 'tags': tags, 'fdp': {'data_sensitivity_level': level}}
+
+
+def test_search_prefix_and_facets():
+    index = ProjectSearchIndex()
+    index.build([project(1, 'Genome study', ['genomics'], 'high'), project(2, 'Imaging pilot', ['imaging'], 'low')])
+    result = index.search('gen')
+    assert [p['id'] for p in result['items']] == [1]
+    assert result['facets'] == {'tag': {'genomics': 1}, 'sensitivity': {'high': 1}}
+    assert index.search(sensitivity=['low', 'high'])['total'] == 2
+
+
+def test_update_after_in_place_edit_drops_old_facets_and_terms():
+    index = ProjectSearchIndex()
+    p = project(1, 'Genome study', ['genomics', 'fdp'], 'high')
+    index.build([p, project(2, 'Other', [], 'low')])
+    # project_edit changes the catalog dict in place before re-indexing it
+    p['title'] = 'Scan archive'
+    p['tags'] = ['imaging']
+    p['fdp']['data_sensitivity_level'] = 'low'
+    index.update(p)
+    assert index.search(tags=['genomics'])['total'] == 0
+    assert index.search(sensitivity=['high'])['total'] == 0
+    assert index.search('genome')['total'] == 0
+    result = index.search(tags=['imaging'])
+    assert [x['id'] for x in result['items']] == [1]
+    assert index.search()['facets'] == {'tag': {'imaging': 1}, 'sensitivity': {'low': 2}}
+
+
+def test_remove_and_paging():
+    index = ProjectSearchIndex()
+    index.build([project(i, f'Study {i}', ['t'], 'low') for i in range(5)])
+    index.remove(0)
+    first = index.search(limit=2)
+    assert [p['id'] for p in first['items']] == [1, 2]
+    second = index.search(limit=2, cursor=first['next_cursor'])
+    assert [p['id'] for p in second['items']] == [3, 4] and second['next_cursor'] is None
@@ -0,0 +1,26 @@
+import os
+import time
+
+from src.services.response_cache import ResponseCache, response_key
+
+
+def test_entry_keeps_provider_across_instances(tmp_path):
+    key = response_key('anthropic', 'claude', [{'role': 'user', 'content': 'hi'}])
+    ResponseCache(str(tmp_path)).put(key, 'hello', 'anthropic', 'claude')
+    entry = ResponseCache(str(tmp_path)).get_entry(key)
+    assert entry['reply'] == 'hello' and entry['provider'] == 'anthropic' and entry['model'] == 'claude'
+
+
+def test_sweep_removes_expired_files_only(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttl_seconds=60, sweep_interval=1e9)
+    cache._next_sweep = float('inf')  # no background sweep during the test
+    fresh = response_key('openai', 'gpt-5', [])
+    cache.put(fresh, 'new', 'openai', 'gpt-5')
+    stale = os.path.join(str(tmp_path), 'ff', 'ff' + '0' * 62 + '.json')
+    os.makedirs(os.path.dirname(stale))
+    with open(stale, 'w') as f:
+        f.write('{}')
+    os.utime(stale, (time.time() - 120, time.time() - 120))
+    assert cache.sweep() == 1
+    assert not os.path.exists(stale)
+    assert ResponseCache(str(tmp_path)).get(fresh) == 'new'
@@ -0,0 +1,18 @@
+from src.services.sparse_index import tokenize
+
+
+def references(text):
+    return [t for t in tokenize(text) if ':' in t]
+
+
+def test_explicit_references():
+    assert references("Article 9") == ["article:9"]
+    assert references("Art. 9(1) and art 17") == ["article:9", "article:17"]
+    assert references("Recital (26)") == ["recital:26"]
+    assert references("see Chapter IV") == ["chapter:iv"]
+    assert references("Articles 5") == ["article:5"]
+
+
+def test_words_starting_with_a_reference_kind_are_not_references():
+    for text in ("articles", "artificial intelligence", "chapter in", "recital civil", "article 9x"):
+        assert references(text) == [], text